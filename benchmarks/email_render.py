@@ -0,0 +1,82 @@
+"""
+Reservation confirmation rendering, per-call environment vs cached vs precompiled
+
+    python -m benchmarks.email_render [iterations]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+
+from jinja2 import Environment, FileSystemLoader
+
+from reshal_api.email.service import TemplatesService
+
+CONTEXT = {
+    "first_name": "Bench",
+    "facility_name": "Court 1",
+    "start_time": "2026-10-17 10:00",
+    "end_time": "2026-10-17 11:00",
+    "price": "$25.00",
+}
+
+
+def render_uncached() -> str:
+    """What every reservation did before, a new environment per email"""
+    environment = Environment(loader=FileSystemLoader(TemplatesService.TEMPLATES_DIR))
+    template = environment.get_template(TemplatesService.RESERVATION_CREATED)
+    return template.render(CONTEXT)
+
+
+async def measure(render, iterations: int) -> float:
+    start_time = time.perf_counter()
+    for _ in range(iterations):
+        await render()
+    return time.perf_counter() - start_time
+
+
+async def run(iterations: int) -> None:
+    cached = TemplatesService()
+    cached.preload()
+    with tempfile.TemporaryDirectory() as compiled_dir:
+        cached.compile(compiled_dir)
+        precompiled = TemplatesService(precompiled_dir=compiled_dir)
+        precompiled.preload()
+
+        async def uncached() -> str:
+            return render_uncached()
+
+        async def render_cached() -> str:
+            return await cached.render(cached.RESERVATION_CREATED, CONTEXT)
+
+        async def render_precompiled() -> str:
+            return await precompiled.render(cached.RESERVATION_CREATED, CONTEXT)
+
+        results = {
+            "uncached": await measure(uncached, iterations),
+            "cached": await measure(render_cached, iterations),
+            "precompiled": await measure(render_precompiled, iterations),
+        }
+
+    start_time = time.perf_counter()
+    await cached.render_many(
+        cached.RESERVATION_CREATED, (CONTEXT for _ in range(iterations))
+    )
+    results["batch"] = time.perf_counter() - start_time
+
+    print(f"{iterations} reservation confirmations")
+    for name, elapsed in results.items():
+        speedup = results["uncached"] / elapsed
+        print(
+            f"{name + ':':<13} {elapsed / iterations * 1e6:9.1f}us/email"
+            f"  {speedup:6.1f}x"
+        )
+
+
+def main(iterations: int = 2_000) -> None:
+    asyncio.run(run(iterations))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,58 @@
+"""
+Nearby facility search, in-memory geohash index vs full scan
+
+    python -m benchmarks.facility_nearby [points] [queries]
+"""
+
+import random
+import sys
+import timeit
+
+from reshal_api.facility.geo import GeohashIndex, nearby_full_scan
+
+RADIUS = 5000
+LIMIT = 20
+
+
+def main(points_count: int = 100_000, queries_count: int = 200) -> None:
+    rng = random.Random(121)
+    # Clustered around a few cities, like real facilities
+    centers = [(rng.uniform(-60, 60), rng.uniform(-180, 180)) for _ in range(50)]
+    points = []
+    for i in range(points_count):
+        lat, lon = rng.choice(centers)
+        points.append((i, lat + rng.gauss(0, 0.2), lon + rng.gauss(0, 0.2)))
+
+    queries = [
+        (lat + rng.gauss(0, 0.2), lon + rng.gauss(0, 0.2))
+        for lat, lon in (rng.choice(centers) for _ in range(queries_count))
+    ]
+
+    index: GeohashIndex[int] = GeohashIndex(precision=5)
+    build_time = timeit.timeit(lambda: index.add_many(points), number=1)
+
+    for lat, lon in queries[:10]:
+        assert [key for key, _ in index.nearby(lat, lon, RADIUS, LIMIT)] == [
+            key for key, _ in nearby_full_scan(points, lat, lon, RADIUS, LIMIT)
+        ]
+
+    index_time = timeit.timeit(
+        lambda: [index.nearby(lat, lon, RADIUS, LIMIT) for lat, lon in queries],
+        number=1,
+    )
+    scan_time = timeit.timeit(
+        lambda: [
+            nearby_full_scan(points, lat, lon, RADIUS, LIMIT) for lat, lon in queries
+        ],
+        number=1,
+    )
+
+    print(f"{points_count} points, {queries_count} queries, radius {RADIUS}m")
+    print(f"geohash index build: {build_time * 1000:.1f}ms")
+    print(f"geohash index:       {index_time / queries_count * 1000:.3f}ms/query")
+    print(f"full scan:           {scan_time / queries_count * 1000:.3f}ms/query")
+    print(f"speedup:             {scan_time / index_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,75 @@
+"""
+Argon2 cost calibration, picks the strongest parameters within a latency budget
+
+    python -m benchmarks.password_hash [target_ms] [parallelism]
+
+Prints the `APP_PASSWORD_HASH_*` settings to use on this host, stored hashes
+are upgraded on the next login of each user.
+"""
+
+import statistics
+import sys
+import time
+
+from passlib.hash import argon2
+
+PASSWORD = "CalibrationPassword123!"
+ROUNDS = 5
+# KiB, largest first, 19 MiB is the OWASP minimum for argon2id
+MEMORY_COSTS = (262144, 131072, 65536, 47104, 19456)
+MIN_TIME_COST = 2
+MAX_TIME_COST = 10
+
+
+def measure(time_cost: int, memory_cost: int, parallelism: int) -> float:
+    """Median hashing time in milliseconds"""
+    hasher = argon2.using(
+        time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism
+    )
+    timings = []
+    for _ in range(ROUNDS):
+        start_time = time.perf_counter()
+        hasher.hash(PASSWORD)
+        timings.append((time.perf_counter() - start_time) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(target_ms: float, parallelism: int) -> tuple[int, int, float] | None:
+    """
+    Largest memory cost that fits `MIN_TIME_COST` passes in the budget, then
+    as many passes as the remaining budget allows.
+    """
+    for memory_cost in MEMORY_COSTS:
+        elapsed = measure(MIN_TIME_COST, memory_cost, parallelism)
+        print(f"  m={memory_cost:>6} t={MIN_TIME_COST:<2} {elapsed:8.1f}ms")
+        if elapsed > target_ms:
+            continue
+
+        time_cost = MIN_TIME_COST
+        while time_cost < MAX_TIME_COST:
+            next_elapsed = measure(time_cost + 1, memory_cost, parallelism)
+            print(f"  m={memory_cost:>6} t={time_cost + 1:<2} {next_elapsed:8.1f}ms")
+            if next_elapsed > target_ms:
+                break
+            time_cost, elapsed = time_cost + 1, next_elapsed
+        return time_cost, memory_cost, elapsed
+
+    return None
+
+
+def main(target_ms: float = 250, parallelism: int = 8) -> None:
+    print(f"target {target_ms:.0f}ms per hash, parallelism {parallelism}")
+    result = calibrate(target_ms, parallelism)
+    if result is None:
+        print("no parameters fit the budget, raise the target or add CPU")
+        sys.exit(1)
+
+    time_cost, memory_cost, elapsed = result
+    print(f"selected t={time_cost} m={memory_cost} ({elapsed:.1f}ms)")
+    print(f"APP_PASSWORD_HASH_TIME_COST={time_cost}")
+    print(f"APP_PASSWORD_HASH_MEMORY_COST={memory_cost}")
+    print(f"APP_PASSWORD_HASH_PARALLELISM={parallelism}")
+
+
+if __name__ == "__main__":
+    main(*(float(arg) for arg in sys.argv[1:2]), *(int(arg) for arg in sys.argv[2:3]))
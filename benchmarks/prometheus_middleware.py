@@ -0,0 +1,144 @@
+"""
+Per-request overhead of PrometheusMiddleware, BaseHTTPMiddleware vs raw ASGI
+
+    python -m benchmarks.prometheus_middleware [requests]
+
+Requests are sent straight to the ASGI app, a route table the size of the
+API is matched on every request.
+"""
+
+import asyncio
+import sys
+import time
+
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Match
+from starlette.types import ASGIApp
+
+from reshal_api.opentelemetry import (
+    REQUESTS,
+    REQUESTS_IN_PROGRESS,
+    REQUESTS_PROCESSING_TIME,
+    RESPONSES,
+    PrometheusMiddleware,
+)
+
+RESOURCES = ("auth", "facilities", "reservations", "payments", "timeframes")
+
+
+class BaseHTTPPrometheusMiddleware(BaseHTTPMiddleware):
+    """The previous implementation, without the exception bookkeeping"""
+
+    def __init__(self, app: ASGIApp, app_name: str) -> None:
+        super().__init__(app)
+        self.app_name = app_name
+
+    @staticmethod
+    def get_path(request: Request) -> tuple[str, bool]:
+        for route in request.app.routes:
+            match, child_scope = route.matches(request.scope)
+            if match == Match.FULL:
+                return route.path, True
+        return request.url.path, False
+
+    async def dispatch(
+        self, request: Request, call_next: RequestResponseEndpoint
+    ) -> Response:
+        method = request.method
+        path, is_handled_path = self.get_path(request)
+        if not is_handled_path:
+            return await call_next(request)
+
+        labels = {"method": method, "path": path, "app_name": self.app_name}
+        REQUESTS_IN_PROGRESS.labels(**labels).inc()
+        REQUESTS.labels(**labels).inc()
+        start_time = time.perf_counter()
+        response = await call_next(request)
+        REQUESTS_PROCESSING_TIME.labels(**labels).observe(
+            time.perf_counter() - start_time
+        )
+        RESPONSES.labels(**labels, status_code=response.status_code).inc()
+        REQUESTS_IN_PROGRESS.labels(**labels).dec()
+        return response
+
+
+def create_app(middleware: type | None) -> FastAPI:
+    app = FastAPI()
+    if middleware is not None:
+        app.add_middleware(middleware, app_name="benchmark")
+
+    for resource in RESOURCES:
+
+        async def endpoint() -> dict:
+            return {}
+
+        app.get(f"/{resource}")(endpoint)
+        app.post(f"/{resource}")(endpoint)
+        app.get(f"/{resource}/me")(endpoint)
+        app.get(f"/{resource}/{{item_id}}")(endpoint)
+        app.put(f"/{resource}/{{item_id}}")(endpoint)
+        app.delete(f"/{resource}/{{item_id}}")(endpoint)
+        app.get(f"/{resource}/{{item_id}}/details")(endpoint)
+    return app
+
+
+async def call(app: FastAPI, path: str) -> None:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("test", 80),
+        "client": ("127.0.0.1", 12345),
+        "root_path": "",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "headers": [],
+    }
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        ...
+
+    await app(scope, receive, send)
+
+
+async def measure(app: FastAPI, paths: list[str], requests: int) -> float:
+    for path in paths:
+        await call(app, path)
+    start_time = time.perf_counter()
+    for i in range(requests):
+        await call(app, paths[i % len(paths)])
+    return time.perf_counter() - start_time
+
+
+async def run(requests: int) -> None:
+    # Last resource, the previous middleware matched every route before it
+    paths = [f"/{RESOURCES[-1]}", f"/{RESOURCES[-1]}/42/details"]
+    baseline = await measure(create_app(None), paths, requests)
+    results = {
+        "BaseHTTPMiddleware": await measure(
+            create_app(BaseHTTPPrometheusMiddleware), paths, requests
+        ),
+        "raw ASGI": await measure(create_app(PrometheusMiddleware), paths, requests),
+    }
+
+    print(f"{requests} requests, {baseline / requests * 1e6:.1f}us/request without")
+    for name, elapsed in results.items():
+        overhead = (elapsed - baseline) / requests * 1e6
+        print(f"{name + ':':<20} +{overhead:7.1f}us/request")
+
+
+def main(requests: int = 20_000) -> None:
+    asyncio.run(run(requests))
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
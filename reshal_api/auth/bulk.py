@@ -0,0 +1,113 @@
+"""
+Bulk user import from CSV or NDJSON
+
+    python -m reshal_api.auth.bulk users.csv [--format csv|ndjson] [--workers N]
+
+CSV files need a header row, columns and NDJSON keys are the `UserImport` fields
+"""
+
+import argparse
+import asyncio
+import csv
+import os
+import sys
+from enum import Enum
+from typing import Any, Iterable, Iterator, TextIO
+
+import orjson
+
+from reshal_api.database import async_engine, sessionmaker
+
+from .schemas import UserImportReport, UserImportResult, UserImportStatus
+from .security import PasswordHasher
+from .service import AuthService
+
+
+class ImportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+    @classmethod
+    def from_filename(cls, filename: str | None) -> "ImportFormat":
+        if filename and filename.lower().endswith((".ndjson", ".jsonl")):
+            return cls.ndjson
+        return cls.csv
+
+
+def parse_csv(lines: Iterable[str]) -> Iterator[tuple[int, dict[str, Any]]]:
+    reader = csv.DictReader(lines)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def parse_ndjson(lines: Iterable[str]) -> Iterator[tuple[int, dict[str, Any]]]:
+    for line_num, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            data = None
+        # Invalid lines are reported by validation, like any other bad row
+        yield line_num, data if isinstance(data, dict) else {}
+
+
+def parse_rows(
+    lines: Iterable[str], format: ImportFormat
+) -> Iterator[tuple[int, dict[str, Any]]]:
+    if format == ImportFormat.ndjson:
+        return parse_ndjson(lines)
+    return parse_csv(lines)
+
+
+def build_report(results: list[UserImportResult]) -> UserImportReport:
+    created = sum(result.status == UserImportStatus.created for result in results)
+    return UserImportReport(
+        created=created, failed=len(results) - created, rows=results
+    )
+
+
+async def import_users(
+    file: TextIO, format: ImportFormat, workers: int
+) -> UserImportReport:
+    hasher = PasswordHasher(workers=workers, queue_size=0)
+    try:
+        async with sessionmaker() as session:
+            async with session.begin():
+                results = await AuthService().bulk_create(
+                    session,
+                    parse_rows(file, format),
+                    hasher=hasher,
+                    concurrency=workers,
+                )
+    finally:
+        hasher.shutdown()
+        await async_engine.dispose()
+    return build_report(results)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import users from CSV or NDJSON")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=[f.value for f in ImportFormat])
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="password hashing threads",
+    )
+    args = parser.parse_args()
+
+    format = ImportFormat(args.format or ImportFormat.from_filename(args.path))
+    with open(args.path, encoding="utf-8-sig", newline="") as file:
+        report = asyncio.run(import_users(file, format, args.workers))
+
+    for row in report.rows:
+        if row.status != UserImportStatus.created:
+            print(f"line {row.line}: {row.status.value} {row.email or ''} {row.errors}")
+    print(f"created {report.created}, failed {report.failed}")
+    sys.exit(1 if report.failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,94 @@
+import hashlib
 from typing import Optional
 
-from fastapi import Depends
+from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from reshal_api.config import get_config
 from reshal_api.database import get_db_session
+from reshal_api.ratelimit.service import get_rate_limiter
 
 from .exceptions import UserIsNotSuperuser, UserNotFound, UserRoleNotSufficient
 from .jwt import get_data_from_token
 from .models import User, UserRole
-from .schemas import JWTData
-from .service import AuthService
+from .schemas import AuthRequest, JWTData, Principal
+from .service import AuthService, TokenService
+
+config = get_config()
 
 
 async def get_auth_service() -> AuthService:
     return AuthService()
 
 
-async def get_user(
+async def get_token_service() -> TokenService:
+    return TokenService()
+
+
+async def limit_login_attempts(request: Request, data: AuthRequest) -> None:
+    """
+    Per client IP and per email, runs before any password hashing.
+    Behind a reverse proxy the client IP comes from X-Forwarded-For, which uvicorn
+    only trusts from `UVICORN_FORWARDED_ALLOW_IPS`
+    """
+    rate_limiter = get_rate_limiter()
+    window = config.LOGIN_RATE_LIMIT_WINDOW
+    if request.client is not None:
+        await rate_limiter.hit(
+            "login_ip", request.client.host, config.LOGIN_RATE_LIMIT_PER_IP, window
+        )
+
+    email_digest = hashlib.sha256(data.email.strip().lower().encode()).hexdigest()
+    await rate_limiter.hit(
+        "login_email", email_digest, config.LOGIN_RATE_LIMIT_PER_EMAIL, window
+    )
+
+
+async def get_principal(
     jwt_data: JWTData = Depends(get_data_from_token),
     session: AsyncSession = Depends(get_db_session),
     auth_service: AuthService = Depends(get_auth_service),
+) -> Principal:
+    """
+    Authenticated user without a per-request `User` SELECT.
+
+    Built from the signed claims when `AUTH_TRUST_TOKEN_CLAIMS` is set,
+    otherwise from the short-lived user cache so role changes apply quickly.
+    """
+    if config.AUTH_TRUST_TOKEN_CLAIMS and jwt_data.has_profile:
+        return Principal(
+            id=jwt_data.user_id,
+            role=jwt_data.role,
+            email=jwt_data.email,
+            first_name=jwt_data.first_name,
+            last_name=jwt_data.last_name,
+        )
+
+    user = await auth_service.get_read(session, jwt_data.user_id)
+    if user is None:
+        raise UserNotFound()
+    return Principal(**user.dict())
+
+
+async def get_user(
+    principal: Principal = Depends(get_principal),
+    session: AsyncSession = Depends(get_db_session),
+    auth_service: AuthService = Depends(get_auth_service),
 ) -> Optional[User]:
-    user = await auth_service.get_by_id(session, jwt_data.user_id)
+    """Full `User` row, only for handlers that need it"""
+    user = await auth_service.get_by_id(session, principal.id)
     if user is None:
         raise UserNotFound()
     return user
 
 
-async def get_owner(user: User = Depends(get_user)) -> User:
-    if user.role not in (UserRole.owner, UserRole.admin):
+async def get_owner(principal: Principal = Depends(get_principal)) -> Principal:
+    if principal.role not in (UserRole.owner, UserRole.admin):
         raise UserRoleNotSufficient("Not an owner")
-    return user
+    return principal
 
 
-async def get_admin(user: User = Depends(get_user)) -> User:
-    if user.role != UserRole.admin:
+async def get_admin(principal: Principal = Depends(get_principal)) -> Principal:
+    if principal.role != UserRole.admin:
         raise UserIsNotSuperuser()
-    return user
+    return principal
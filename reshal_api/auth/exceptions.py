@@ -1,4 +1,10 @@
-from reshal_api.exceptions import Conflict, Forbidden, NotAuthenticated, NotFound
+from reshal_api.exceptions import (
+    Conflict,
+    Forbidden,
+    NotAuthenticated,
+    NotFound,
+    TooManyRequests,
+)
 
 
 class InvalidAuthRequest(NotAuthenticated):
@@ -24,3 +30,8 @@ class UserRoleNotSufficient(Forbidden):
 class EmailAlreadyExists(Conflict):
     def __init__(self):
         super().__init__(detail="Email already exists")
+
+
+class PasswordHasherBusy(TooManyRequests):
+    def __init__(self):
+        super().__init__(detail="Server is busy, try again later")
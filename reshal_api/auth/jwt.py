@@ -1,15 +1,26 @@
+import base64
+import calendar
+import hashlib
+import hmac
+import time
+import uuid
 from datetime import datetime, timedelta
-from typing import Annotated, Optional, cast
+from functools import lru_cache
+from typing import Annotated, Any, Optional, Protocol, cast
 
+import orjson
 from fastapi import Depends, Header
 from fastapi.security.utils import get_authorization_scheme_param
 from jose import JWTError, jwt
+from pydantic import ValidationError
 
+from reshal_api.cache.memory import TTLCache
 from reshal_api.config import get_config
 
 from .exceptions import InvalidToken
 from .models import User
-from .schemas import JWTData
+from .revocation import revocation_list
+from .schemas import JWTData, RefreshTokenData
 from .security import OAuth2PasswordBearerCookie
 
 config = get_config()
@@ -17,12 +28,165 @@ config = get_config()
 oauth2_scheme = OAuth2PasswordBearerCookie(token_url="/auth/token", auto_error=False)
 
 
-def create_access_token(user: User) -> str:
+class TokenDecodeError(Exception):
+    """Token is malformed, expired or its signature does not match"""
+
+
+class TokenCodec(Protocol):
+    def encode(self, claims: dict[str, Any]) -> str:
+        ...
+
+    def decode(self, token: str) -> dict[str, Any]:
+        ...
+
+
+class JoseCodec:
+    """Any algorithm supported by python-jose"""
+
+    def __init__(self, key: str, algorithm: str) -> None:
+        self._key = key
+        self._algorithm = algorithm
+
+    def encode(self, claims: dict[str, Any]) -> str:
+        return jwt.encode(claims, key=self._key, algorithm=self._algorithm)
+
+    def decode(self, token: str) -> dict[str, Any]:
+        try:
+            return jwt.decode(token, self._key, algorithms=[self._algorithm])
+        except JWTError as e:
+            raise TokenDecodeError() from e
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+class HS256Codec:
+    """
+    HS256 only, on the standard library.
+
+    Skips jose's generic header and claims handling, validates
+    the signature, `exp` and `nbf`. Tokens are interchangeable with `JoseCodec`.
+    """
+
+    _HEADER = _b64encode(orjson.dumps({"alg": "HS256", "typ": "JWT"}))
+
+    def __init__(self, key: str) -> None:
+        self._key = key.encode()
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        return hmac.new(self._key, signing_input, hashlib.sha256).digest()
+
+    def encode(self, claims: dict[str, Any]) -> str:
+        claims = {
+            name: calendar.timegm(value.utctimetuple())
+            if isinstance(value, datetime)
+            else value
+            for name, value in claims.items()
+        }
+        signing_input = self._HEADER + b"." + _b64encode(orjson.dumps(claims))
+        return (signing_input + b"." + _b64encode(self._sign(signing_input))).decode()
+
+    def decode(self, token: str) -> dict[str, Any]:
+        try:
+            signing_input, _, signature = token.rpartition(".")
+            header, _, payload = signing_input.partition(".")
+            if orjson.loads(_b64decode(header)).get("alg") != "HS256":
+                raise TokenDecodeError()
+
+            expected_signature = self._sign(signing_input.encode())
+            if not hmac.compare_digest(expected_signature, _b64decode(signature)):
+                raise TokenDecodeError()
+
+            claims = orjson.loads(_b64decode(payload))
+        except (ValueError, AttributeError, orjson.JSONDecodeError) as e:
+            raise TokenDecodeError() from e
+
+        if not isinstance(claims, dict):
+            raise TokenDecodeError()
+
+        now = time.time()
+        exp, nbf = claims.get("exp", now + 1), claims.get("nbf", now)
+        if not (isinstance(exp, int | float) and isinstance(nbf, int | float)):
+            raise TokenDecodeError()
+        if exp <= now or nbf > now:
+            raise TokenDecodeError()
+
+        return claims
+
+
+@lru_cache(maxsize=1)
+def get_codec() -> TokenCodec:
+    if config.JWT_CODEC == "hs256":
+        if config.JWT_ALGORITHM != "HS256":
+            raise ValueError("The hs256 codec requires JWT_ALGORITHM=HS256")
+        return HS256Codec(config.SECRET_KEY)
+    return JoseCodec(config.SECRET_KEY, config.JWT_ALGORITHM)
+
+
+# Verified claims by token digest, entries expire together with the token
+verified_tokens: TTLCache[bytes, JWTData] = TTLCache(
+    maxsize=config.JWT_CACHE_MAXSIZE, ttl=0
+)
+
+
+def decode_token(token: str) -> JWTData:
+    digest = hashlib.sha256(token.encode()).digest()
+    data = verified_tokens.get(digest)
+    if data is None:
+        try:
+            payload = get_codec().decode(token)
+            data = JWTData(**payload)
+        except (TokenDecodeError, ValidationError):
+            raise InvalidToken()
+
+        if isinstance(exp := payload.get("exp"), int | float):
+            verified_tokens.set(digest, data, ttl=exp - time.time())
+
+    # Checked on cache hits too, revocation applies to already verified tokens
+    if data.sid in revocation_list:
+        raise InvalidToken()
+    return data
+
+
+def decode_refresh_token(token: str) -> RefreshTokenData:
+    try:
+        return RefreshTokenData(**get_codec().decode(token))
+    except (TokenDecodeError, ValidationError):
+        raise InvalidToken()
+
+
+def create_access_token(user: User, session_id: uuid.UUID | None = None) -> str:
     expire = datetime.utcnow() + timedelta(minutes=config.ACCESS_TOKEN_EXPIRE)
-    return jwt.encode(
-        {"exp": expire, "user_id": str(user.id), "role": user.role},
-        key=config.SECRET_KEY,
-        algorithm=config.JWT_ALGORITHM,
+    return get_codec().encode(
+        {
+            "exp": expire,
+            "jti": str(uuid.uuid4()),
+            "sid": str(session_id or uuid.uuid4()),
+            "user_id": str(user.id),
+            "role": user.role,
+            "email": user.email,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+        }
+    )
+
+
+def create_refresh_token(
+    jti: uuid.UUID, session_id: uuid.UUID, user_id: uuid.UUID, expires_at: datetime
+) -> str:
+    return get_codec().encode(
+        {
+            "exp": expires_at,
+            "jti": str(jti),
+            "sid": str(session_id),
+            "user_id": str(user_id),
+            "typ": "refresh",
+        }
     )
 
 
@@ -38,11 +202,4 @@ def get_data_from_token(
     else:
         token = cookie_token
 
-    try:
-        payload = jwt.decode(
-            cast(str, token), config.SECRET_KEY, algorithms=[config.JWT_ALGORITHM]
-        )
-    except JWTError:
-        raise InvalidToken()
-    else:
-        return JWTData(**payload)
+    return decode_token(cast(str, token))
@@ -1,6 +1,9 @@
 import uuid
+from datetime import datetime
 from enum import Enum
+from typing import Optional
 
+from sqlalchemy import ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from reshal_api.database import Base
@@ -15,6 +18,7 @@ class UserRole(str, Enum):
 
 class User(TimestampMixin, Base):
     __tablename__ = "users"
+    __table_args__ = (Index("users_created_at_id_idx", "created_at", "id"),)
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     email: Mapped[str] = mapped_column(unique=True, index=True)
@@ -25,3 +29,30 @@ class User(TimestampMixin, Base):
 
     async def set_is_owner(self):
         self.is_owner = bool(self.facilities)
+
+
+class RefreshToken(TimestampMixin, Base):
+    """
+    Issued refresh token, `id` is its `jti`.
+
+    Every login starts a session, each refresh marks the token used and issues
+    the next one in the same session. Revoking marks all tokens of the session.
+    """
+
+    __tablename__ = "refresh_token"
+    __table_args__ = (
+        Index(
+            "refresh_token_revoked_at_idx",
+            "revoked_at",
+            postgresql_where=text("revoked_at IS NOT NULL"),
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
+    session_id: Mapped[uuid.UUID] = mapped_column(index=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), index=True
+    )
+    expires_at: Mapped[datetime] = mapped_column()
+    used_at: Mapped[Optional[datetime]] = mapped_column()
+    revoked_at: Mapped[Optional[datetime]] = mapped_column()
@@ -0,0 +1,94 @@
+"""
+Revoked login sessions, kept in memory so token checks never hit the database
+
+Revocations are written to `refresh_token` and added to the local list right away,
+other workers pick them up on their next sync
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from logging import getLogger
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from reshal_api.config import get_config
+from reshal_api.database import sessionmaker
+
+from .models import RefreshToken
+
+logger = getLogger(__name__)
+
+config = get_config()
+
+# Rows committed while the previous sync was running must not be missed
+SYNC_OVERLAP = timedelta(seconds=5)
+
+
+class RevocationList:
+    """
+    Sessions revoked within the access token lifetime.
+
+    Older revocations are left out, their access tokens have expired and
+    refresh tokens are checked against the table when used.
+    """
+
+    def __init__(self, token_lifetime: timedelta) -> None:
+        self.token_lifetime = token_lifetime
+        # Session id -> when its last access token expires
+        self._sessions: dict[uuid.UUID, datetime] = {}
+        self._synced_at: datetime | None = None
+
+    def __contains__(self, session_id: uuid.UUID) -> bool:
+        return session_id in self._sessions
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def add(self, session_id: uuid.UUID, revoked_at: datetime | None = None) -> None:
+        expires_at = (revoked_at or datetime.utcnow()) + self.token_lifetime
+        self._sessions[session_id] = max(
+            expires_at, self._sessions.get(session_id, expires_at)
+        )
+
+    def prune(self) -> None:
+        now = datetime.utcnow()
+        self._sessions = {
+            session_id: expires_at
+            for session_id, expires_at in self._sessions.items()
+            if expires_at > now
+        }
+
+    async def sync(self, session: AsyncSession) -> None:
+        """Load sessions revoked since the previous sync"""
+        started_at = datetime.utcnow()
+        since = self._synced_at or started_at - self.token_lifetime
+        query = (
+            select(RefreshToken.session_id, func.max(RefreshToken.revoked_at))
+            .where(RefreshToken.revoked_at >= since)
+            .group_by(RefreshToken.session_id)
+        )
+        for session_id, revoked_at in await session.execute(query):
+            self.add(session_id, revoked_at)
+
+        self.prune()
+        self._synced_at = started_at - SYNC_OVERLAP
+
+    async def run(self, interval: float) -> None:
+        while True:
+            try:
+                async with sessionmaker() as session:
+                    await self.sync(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Token revocation list sync failed")
+            await asyncio.sleep(interval)
+
+    def clear(self) -> None:
+        self._sessions.clear()
+        self._synced_at = None
+
+
+revocation_list = RevocationList(timedelta(minutes=config.ACCESS_TOKEN_EXPIRE))
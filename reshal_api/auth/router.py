@@ -1,16 +1,39 @@
-from fastapi import APIRouter, Depends, Response, status
+import io
+from functools import partial
+from typing import Any
+
+from fastapi import APIRouter, Cookie, Depends, Response, UploadFile, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from reshal_api import exceptions
+from reshal_api.base import Pagination, get_pagination, set_next_cursor
 from reshal_api.config import get_config
-from reshal_api.database import get_db_session
-
-from .dependencies import get_admin, get_auth_service, get_user
-from .exceptions import EmailAlreadyExists
-from .jwt import create_access_token
+from reshal_api.database import after_commit, get_db_session
+
+from .bulk import ImportFormat, build_report, parse_rows
+from .dependencies import (
+    get_admin,
+    get_auth_service,
+    get_principal,
+    get_token_service,
+    get_user,
+    limit_login_attempts,
+)
+from .exceptions import EmailAlreadyExists, InvalidToken
+from .jwt import get_data_from_token
 from .models import User
-from .schemas import AccessTokenResponse, AuthRequest, UserCreate, UserRead, UserUpdate
-from .service import AuthService
+from .schemas import (
+    AccessTokenResponse,
+    AuthRequest,
+    JWTData,
+    Principal,
+    RefreshRequest,
+    UserCreate,
+    UserImportReport,
+    UserRead,
+    UserUpdate,
+)
+from .service import AuthService, TokenPair, TokenService
 
 config = get_config()
 router = APIRouter(tags=["auth"])
@@ -18,10 +41,13 @@ router = APIRouter(tags=["auth"])
 
 @router.get("", response_model=list[UserRead], dependencies=[Depends(get_admin)])
 async def get_users(
+    response: Response,
+    pagination: Pagination = Depends(get_pagination),
     session: AsyncSession = Depends(get_db_session),
     auth_service: AuthService = Depends(get_auth_service),
 ):
-    users = await auth_service.get_all(session)
+    users, next_cursor = await auth_service.get_page(session, pagination=pagination)
+    set_next_cursor(response, next_cursor)
     return users
 
 
@@ -39,9 +65,30 @@ async def register(
     return user
 
 
+@router.post(
+    "/import", response_model=UserImportReport, dependencies=[Depends(get_admin)]
+)
+async def import_users(
+    file: UploadFile,
+    format: ImportFormat | None = None,
+    session: AsyncSession = Depends(get_db_session),
+    auth_service: AuthService = Depends(get_auth_service),
+):
+    """CSV with a header row or NDJSON, detected from the file name by default"""
+    format = format or ImportFormat.from_filename(file.filename)
+    try:
+        content = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise exceptions.BadRequest("File must be UTF-8 encoded")
+
+    lines = io.StringIO(content, newline="")
+    results = await auth_service.bulk_create(session, parse_rows(lines, format))
+    return build_report(results)
+
+
 @router.get("/me", response_model=UserRead)
-async def get_me(user: User = Depends(get_user)):
-    return user
+async def get_me(principal: Principal = Depends(get_principal)):
+    return principal
 
 
 @router.put("/me", response_model=UserRead)
@@ -60,40 +107,92 @@ async def update_me(
             raise EmailAlreadyExists()
 
     updated_user = await auth_service.update(session, db_obj=user, update_obj=data)
+    after_commit(session, partial(auth_service.invalidate, user.id))
     return updated_user
 
 
-@router.post("/token", response_model=AccessTokenResponse)
-async def auth_user(
-    data: AuthRequest,
-    response: Response,
-    session: AsyncSession = Depends(get_db_session),
-    auth_service: AuthService = Depends(get_auth_service),
-):
-    user = await auth_service.authenticate_user(session, data)
-    access_token = create_access_token(user)
-
+def set_token_cookies(response: Response, tokens: TokenPair) -> None:
     response.set_cookie(
         config.ACCESS_TOKEN_COOKIE_NAME,
-        f"Bearer {access_token}",
+        f"Bearer {tokens.access_token}",
         max_age=config.ACCESS_TOKEN_EXPIRE * 60,
         samesite="none",
         httponly=True,
         secure=config.ENVIRONMENT.is_production,
     )
+    response.set_cookie(
+        config.REFRESH_TOKEN_COOKIE_NAME,
+        tokens.refresh_token,
+        max_age=config.REFRESH_TOKEN_EXPIRE * 60,
+        samesite="none",
+        httponly=True,
+        secure=config.ENVIRONMENT.is_production,
+    )
 
-    return {"access_token": access_token, "token_type": "bearer"}
 
+def token_response(tokens: TokenPair) -> dict[str, Any]:
+    return {
+        "access_token": tokens.access_token,
+        "token_type": "bearer",
+        "expires_in": config.ACCESS_TOKEN_EXPIRE * 60,
+        "refresh_token": tokens.refresh_token,
+    }
 
-@router.get(
-    "/logout", status_code=status.HTTP_204_NO_CONTENT, dependencies=[Depends(get_user)]
+
+@router.post(
+    "/token",
+    response_model=AccessTokenResponse,
+    dependencies=[Depends(limit_login_attempts)],
 )
-async def logout(response: Response):
-    response.delete_cookie(
+async def auth_user(
+    data: AuthRequest,
+    response: Response,
+    session: AsyncSession = Depends(get_db_session),
+    auth_service: AuthService = Depends(get_auth_service),
+    token_service: TokenService = Depends(get_token_service),
+):
+    user = await auth_service.authenticate_user(session, data)
+    tokens = await token_service.login(session, user)
+
+    set_token_cookies(response, tokens)
+    return token_response(tokens)
+
+
+@router.post("/refresh", response_model=AccessTokenResponse)
+async def refresh_token(
+    response: Response,
+    data: RefreshRequest | None = None,
+    cookie_token: str | None = Cookie(None, alias=config.REFRESH_TOKEN_COOKIE_NAME),
+    session: AsyncSession = Depends(get_db_session),
+    token_service: TokenService = Depends(get_token_service),
+):
+    token = (data.refresh_token if data else None) or cookie_token
+    if token is None:
+        raise InvalidToken()
+
+    tokens = await token_service.refresh(session, token)
+
+    set_token_cookies(response, tokens)
+    return token_response(tokens)
+
+
+@router.get("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(
+    response: Response,
+    jwt_data: JWTData = Depends(get_data_from_token),
+    token_service: TokenService = Depends(get_token_service),
+):
+    await token_service.revoke_session(jwt_data.sid)
+
+    for cookie_name in (
         config.ACCESS_TOKEN_COOKIE_NAME,
-        httponly=True,
-        samesite="none",
-        secure=config.ENVIRONMENT.is_production,
-    )
+        config.REFRESH_TOKEN_COOKIE_NAME,
+    ):
+        response.delete_cookie(
+            cookie_name,
+            httponly=True,
+            samesite="none",
+            secure=config.ENVIRONMENT.is_production,
+        )
     response.status_code = status.HTTP_204_NO_CONTENT
     return response
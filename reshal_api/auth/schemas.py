@@ -1,5 +1,6 @@
 import re
 import uuid
+from enum import Enum
 from typing import Literal, Optional
 
 from pydantic import EmailStr, Extra, validator
@@ -63,6 +64,30 @@ class UserCreate(ORJSONBaseModel):
         error_msg_templates = {"value_error.email": "Email address is not valid"}
 
 
+class UserImport(UserCreate):
+    role: UserRole = UserRole.normal
+
+
+class UserImportStatus(str, Enum):
+    created = "created"
+    invalid = "invalid"
+    duplicate = "duplicate"
+
+
+class UserImportResult(ORJSONBaseModel):
+    line: int
+    email: Optional[str]
+    status: UserImportStatus
+    id: Optional[uuid.UUID]
+    errors: list[str] = []
+
+
+class UserImportReport(ORJSONBaseModel):
+    created: int
+    failed: int
+    rows: list[UserImportResult]
+
+
 class UserUpdate(ORJSONBaseModel):
     current_password: str
     new_password: Optional[str]
@@ -95,10 +120,39 @@ class AuthRequest(ORJSONBaseModel):
 
 
 class JWTData(ORJSONBaseModel):
+    jti: uuid.UUID
+    # Login session, shared with the refresh tokens and checked for revocation
+    sid: uuid.UUID
     user_id: uuid.UUID
     role: UserRole
+    # Profile claims, missing from tokens issued before they were added
+    email: Optional[EmailStr]
+    first_name: Optional[str]
+    last_name: Optional[str]
+
+    @property
+    def has_profile(self) -> bool:
+        return None not in (self.email, self.first_name, self.last_name)
+
+
+class Principal(UserRead):
+    """Authenticated user, built without loading the `User` row"""
+
+
+class RefreshTokenData(ORJSONBaseModel):
+    jti: uuid.UUID
+    sid: uuid.UUID
+    user_id: uuid.UUID
+    typ: Literal["refresh"]
+
+
+class RefreshRequest(ORJSONBaseModel):
+    # Falls back to the refresh token cookie
+    refresh_token: Optional[str]
 
 
 class AccessTokenResponse(ORJSONBaseModel):
     access_token: str
     token_type: Literal["bearer"]
+    expires_in: int
+    refresh_token: str
@@ -1,4 +1,8 @@
-from typing import Optional
+import asyncio
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Optional, TypeVar
 
 from fastapi import Request
 from fastapi.openapi.models import OAuthFlowPassword
@@ -8,12 +12,23 @@ from fastapi.security.utils import get_authorization_scheme_param
 from passlib.context import CryptContext
 
 from reshal_api.config import get_config
+from reshal_api.opentelemetry import PASSWORD_HASH_QUEUE_DEPTH, PASSWORD_HASH_REJECTED
 
-from .exceptions import InvalidToken
+from .exceptions import InvalidToken, PasswordHasherBusy
 
 config = get_config()
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+T = TypeVar("T")
+
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=config.PASSWORD_HASH_TIME_COST,
+    argon2__memory_cost=config.PASSWORD_HASH_MEMORY_COST,
+    argon2__parallelism=config.PASSWORD_HASH_PARALLELISM,
+    # Hashes below the configured cost are rehashed on login
+    argon2__min_rounds=config.PASSWORD_HASH_TIME_COST,
+)
 
 
 def is_valid_password(plain_password: str, hashed_password: str) -> bool:
@@ -24,6 +39,77 @@ def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, Optional[str]]:
+    """Verify the password, with a new hash when the stored one is outdated"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """
+    Runs argon2 off the event loop in a bounded thread pool.
+
+    argon2-cffi releases the GIL while hashing, so threads run in parallel.
+    Jobs beyond `workers + queue_size` are rejected with 429 instead of
+    piling up behind each other.
+    """
+
+    def __init__(self, workers: int, queue_size: int) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hasher"
+        )
+        self.workers = workers
+        self._capacity = workers + queue_size
+        self._pending = 0
+        self._dummy_hash: str | None = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        if self._pending >= self._capacity:
+            PASSWORD_HASH_REJECTED.labels(app_name=config.OTLP_APP_NAME).inc()
+            raise PasswordHasherBusy()
+
+        self._pending += 1
+        PASSWORD_HASH_QUEUE_DEPTH.labels(app_name=config.OTLP_APP_NAME).inc()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self._pending -= 1
+            PASSWORD_HASH_QUEUE_DEPTH.labels(app_name=config.OTLP_APP_NAME).dec()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(is_valid_password, plain_password, hashed_password)
+
+    async def verify_and_update(
+        self, plain_password: str, hashed_password: str
+    ) -> tuple[bool, Optional[str]]:
+        return await self._run(
+            verify_and_update_password, plain_password, hashed_password
+        )
+
+    async def verify_dummy(self, plain_password: str) -> None:
+        """Same cost as `verify`, so unknown emails cannot be told apart by timing"""
+        if self._dummy_hash is None:
+            self._dummy_hash = await self.hash(secrets.token_urlsafe(16))
+        await self.verify(plain_password, self._dummy_hash)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+@lru_cache(maxsize=1)
+def get_password_hasher() -> PasswordHasher:
+    return PasswordHasher(config.PASSWORD_HASH_WORKERS, config.PASSWORD_HASH_QUEUE_SIZE)
+
+
 class OAuth2PasswordBearerCookie(OAuth2):
     def __init__(
         self,
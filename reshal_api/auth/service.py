@@ -1,15 +1,38 @@
+import asyncio
 import uuid
-from typing import Any, Optional
+from datetime import datetime, timedelta
+from typing import Any, Iterable, NamedTuple, Optional
 
+from pydantic import ValidationError
+from sqlalchemy import String, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.sql import insert
+from sqlalchemy.sql import insert, update
 
 from reshal_api.base import BaseCRUDService
+from reshal_api.cache.service import get_cache
+from reshal_api.config import get_config
+from reshal_api.database import sessionmaker
 
-from .exceptions import InvalidAuthRequest
-from .models import User, UserRole
-from .schemas import AuthRequest, UserCreate, UserUpdate
-from .security import hash_password, is_valid_password
+from .exceptions import InvalidAuthRequest, InvalidToken
+from .jwt import create_access_token, create_refresh_token, decode_refresh_token
+from .models import RefreshToken, User, UserRole
+from .revocation import revocation_list
+from .schemas import (
+    AuthRequest,
+    UserCreate,
+    UserImport,
+    UserImportResult,
+    UserImportStatus,
+    UserRead,
+    UserUpdate,
+)
+from .security import PasswordHasher, get_password_hasher
+
+config = get_config()
+
+USER_CACHE_NAMESPACE = "user"
 
 
 class AuthService(BaseCRUDService[User, UserCreate, UserUpdate]):
@@ -17,7 +40,7 @@ class AuthService(BaseCRUDService[User, UserCreate, UserUpdate]):
         super().__init__(User)
 
     async def create(self, session: AsyncSession, create_obj: UserCreate) -> User:
-        create_obj.password = hash_password(create_obj.password)
+        create_obj.password = await get_password_hasher().hash(create_obj.password)
         return await super().create(session, create_obj)
 
     async def update(
@@ -26,13 +49,15 @@ class AuthService(BaseCRUDService[User, UserCreate, UserUpdate]):
         *,
         update_obj: UserUpdate | dict[str, Any],
         db_obj: User | None = None,
-        **kwargs
+        **kwargs,
     ) -> User:
         if isinstance(update_obj, UserUpdate):
             update_obj = update_obj.dict(exclude_unset=True)
 
         if update_obj.get("new_password"):
-            update_obj["password"] = hash_password(update_obj["new_password"])
+            update_obj["password"] = await get_password_hasher().hash(
+                update_obj["new_password"]
+            )
 
         return await super().update(
             session, update_obj=update_obj, db_obj=db_obj, **kwargs
@@ -46,20 +71,239 @@ class AuthService(BaseCRUDService[User, UserCreate, UserUpdate]):
         result = await self.get(session, id=id)
         return result
 
+    async def get_read(self, session: AsyncSession, id: uuid.UUID) -> UserRead | None:
+        """Cached `UserRead` of the user, call `invalidate` after writes"""
+
+        async def load() -> dict[str, Any] | None:
+            user = await self.get_by_id(session, id)
+            return UserRead.from_orm(user).dict() if user else None
+
+        data = await get_cache().get_or_set(
+            USER_CACHE_NAMESPACE, str(id), load, ttl=config.USER_CACHE_TTL
+        )
+        return UserRead.parse_obj(data) if data else None
+
+    async def invalidate(self, id: uuid.UUID) -> None:
+        await get_cache().delete(USER_CACHE_NAMESPACE, str(id))
+
     async def is_password_valid(self, user: User, password: str) -> bool:
-        return is_valid_password(password, user.password)
+        return await get_password_hasher().verify(password, user.password)
 
     async def authenticate_user(self, session: AsyncSession, data: AuthRequest) -> User:
         user = await self.get_by_email(session, data.email)
         if user is None:
+            await get_password_hasher().verify_dummy(data.password)
             raise InvalidAuthRequest()
 
-        if not is_valid_password(data.password, user.password):
+        is_valid, new_hash = await get_password_hasher().verify_and_update(
+            data.password, user.password
+        )
+        if not is_valid:
             raise InvalidAuthRequest()
 
+        if new_hash is not None:
+            # Hash parameters changed, upgrade it within the login transaction
+            user.password = new_hash
+            await session.flush()
+
         return user
 
+    @staticmethod
+    def _validate_rows(
+        rows: Iterable[tuple[int, dict[str, Any]]]
+    ) -> tuple[list[UserImportResult], dict[str, tuple[UserImportResult, UserImport]]]:
+        results: list[UserImportResult] = []
+        users: dict[str, tuple[UserImportResult, UserImport]] = {}
+
+        for line, data in rows:
+            try:
+                user = UserImport.parse_obj(data)
+            except ValidationError as e:
+                email = data.get("email")
+                results.append(
+                    UserImportResult(
+                        line=line,
+                        # NDJSON rows may hold any JSON value here
+                        email=email if isinstance(email, str) else None,
+                        status=UserImportStatus.invalid,
+                        errors=[
+                            f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+                            for error in e.errors()
+                        ],
+                    )
+                )
+                continue
+
+            result = UserImportResult(
+                line=line, email=user.email, status=UserImportStatus.created
+            )
+            results.append(result)
+            if user.email in users:
+                result.status = UserImportStatus.duplicate
+                result.errors = ["Email is repeated in the import"]
+            else:
+                users[user.email] = (result, user)
+
+        return results, users
+
+    async def bulk_create(
+        self,
+        session: AsyncSession,
+        rows: Iterable[tuple[int, dict[str, Any]]],
+        hasher: PasswordHasher | None = None,
+        concurrency: int | None = None,
+        batch_size: int = 1000,
+    ) -> list[UserImportResult]:
+        """
+        Validate, hash passwords in parallel and insert in batches.
+
+        `rows` are `(line, data)` pairs, the result has one entry per row.
+        Emails taken before or during the import are reported as duplicates.
+        """
+        hasher = hasher or get_password_hasher()
+        # Parsing and validation are CPU bound, keep them off the event loop
+        results, users = await asyncio.to_thread(self._validate_rows, rows)
+
+        existing_emails = set(
+            (
+                await session.scalars(
+                    select(User.email).where(
+                        User.email
+                        == any_(bindparam("emails", list(users), type_=ARRAY(String)))
+                    )
+                )
+            ).all()
+        )
+        for email in existing_emails:
+            result, _ = users.pop(email)
+            result.status = UserImportStatus.duplicate
+            result.errors = ["Email already exists"]
+
+        # By default leaves a pool thread to logins, and never gets shed by the pool
+        semaphore = asyncio.Semaphore(concurrency or max(hasher.workers - 1, 1))
+
+        async def hash_password(password: str) -> str:
+            async with semaphore:
+                return await hasher.hash(password)
+
+        pending = list(users.values())
+        hashes = await asyncio.gather(
+            *(hash_password(user.password) for _, user in pending)
+        )
+
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start : start + batch_size]
+            now = datetime.utcnow()
+            inserted = await session.execute(
+                pg_insert(User)
+                .values(
+                    [
+                        {
+                            "id": uuid.uuid4(),
+                            "email": user.email,
+                            "password": password,
+                            "first_name": user.first_name,
+                            "last_name": user.last_name,
+                            "role": user.role,
+                            "created_at": now,
+                            "updated_at": now,
+                        }
+                        for (_, user), password in zip(
+                            batch, hashes[start : start + batch_size]
+                        )
+                    ]
+                )
+                .on_conflict_do_nothing(index_elements=[User.email])
+                .returning(User.email, User.id)
+            )
+            inserted_ids = dict(inserted.tuples().all())
+
+            for result, user in batch:
+                result.id = inserted_ids.get(user.email)
+                if result.id is None:
+                    result.status = UserImportStatus.duplicate
+                    result.errors = ["Email already exists"]
+
+        return results
+
     async def create_superuser(self, session: AsyncSession, data: dict[str, Any]):
-        data["password"] = hash_password(data["password"])
+        data["password"] = await get_password_hasher().hash(data["password"])
         await session.execute(insert(User).values(**data, role=UserRole.admin))
         await session.commit()
+
+
+class TokenPair(NamedTuple):
+    access_token: str
+    refresh_token: str
+
+
+class TokenService:
+    """Short-lived access tokens with rotating refresh tokens, per login session"""
+
+    async def _issue(
+        self, session: AsyncSession, user: User, session_id: uuid.UUID
+    ) -> TokenPair:
+        refresh_token = RefreshToken(
+            session_id=session_id,
+            user_id=user.id,
+            expires_at=datetime.utcnow()
+            + timedelta(minutes=config.REFRESH_TOKEN_EXPIRE),
+        )
+        session.add(refresh_token)
+        await session.flush()
+
+        return TokenPair(
+            create_access_token(user, session_id),
+            create_refresh_token(
+                refresh_token.id, session_id, user.id, refresh_token.expires_at
+            ),
+        )
+
+    async def login(self, session: AsyncSession, user: User) -> TokenPair:
+        return await self._issue(session, user, uuid.uuid4())
+
+    async def refresh(self, session: AsyncSession, token: str) -> TokenPair:
+        """Rotate the refresh token, a reused one revokes its whole session"""
+        data = decode_refresh_token(token)
+        if data.sid in revocation_list:
+            raise InvalidToken()
+
+        refresh_token = await session.get(RefreshToken, data.jti, with_for_update=True)
+        if (
+            refresh_token is None
+            or refresh_token.session_id != data.sid
+            or refresh_token.revoked_at is not None
+        ):
+            raise InvalidToken()
+
+        if refresh_token.used_at is not None:
+            # Already rotated, either the client or an attacker holds a stolen copy.
+            # Revoked in this transaction, it holds the lock on the reused token,
+            # and committed right away so it is kept although the request fails
+            revoked_at = await self._revoke(session, refresh_token.session_id)
+            await session.commit()
+            revocation_list.add(refresh_token.session_id, revoked_at)
+            raise InvalidToken()
+
+        user = await session.get(User, refresh_token.user_id)
+        if user is None:
+            raise InvalidToken()
+
+        refresh_token.used_at = datetime.utcnow()
+        return await self._issue(session, user, refresh_token.session_id)
+
+    async def _revoke(self, session: AsyncSession, session_id: uuid.UUID) -> datetime:
+        revoked_at = datetime.utcnow()
+        await session.execute(
+            update(RefreshToken)
+            .where(RefreshToken.session_id == session_id)
+            .where(RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=revoked_at)
+        )
+        return revoked_at
+
+    async def revoke_session(self, session_id: uuid.UUID) -> None:
+        """In its own transaction, so it is kept when the request fails"""
+        async with sessionmaker() as session, session.begin():
+            revoked_at = await self._revoke(session, session_id)
+        revocation_list.add(session_id, revoked_at)
@@ -2,17 +2,31 @@
 Contains base classes for models, services, services, and dependencies
 """
 
+import base64
+import uuid
 from datetime import datetime
-from typing import Any, Generic, Optional, Sequence, TypeVar
+from enum import Enum
+from typing import (
+    Any,
+    AsyncIterator,
+    Generic,
+    NamedTuple,
+    Optional,
+    Sequence,
+    TypeVar,
+)
 
 import humps
 import orjson
-from fastapi import Query
+from fastapi import Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import select
+from sqlalchemy import select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql.base import ExecutableOption
 
+from reshal_api.exceptions import BadRequest
+
 
 def DatetimeQuery(description: str = "Datetime in `ISO 8601` format"):
     return Query(description=description)
@@ -46,6 +60,122 @@ class TimestampSchema(BaseModel):
     updated_at: datetime
 
 
+# Keyset pagination
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class Cursor(NamedTuple):
+    """Position in a listing ordered by `(created_at, id)`, opaque to clients"""
+
+    created_at: datetime
+    id: uuid.UUID
+
+    def encode(self) -> str:
+        return base64.urlsafe_b64encode(
+            orjson.dumps([self.created_at.isoformat(), str(self.id)])
+        ).decode()
+
+    @classmethod
+    def decode(cls, value: str) -> "Cursor":
+        created_at, id = orjson.loads(base64.urlsafe_b64decode(value))
+        return cls(datetime.fromisoformat(created_at), uuid.UUID(id))
+
+
+# Page size when only a cursor is given
+DEFAULT_PAGE_SIZE = 100
+
+
+class Pagination(NamedTuple):
+    cursor: Optional[Cursor]
+    # None returns every row, listings stay unpaged unless a page is asked for
+    limit: Optional[int]
+
+
+def get_pagination(
+    cursor: Optional[str] = Query(
+        None,
+        description=f"Value of the `{NEXT_CURSOR_HEADER}` header of the previous page",
+    ),
+    limit: Optional[int] = Query(
+        None,
+        ge=1,
+        le=1000,
+        description=f"Page size, every row is returned when neither `limit` "
+        f"nor `cursor` is given, {DEFAULT_PAGE_SIZE} when only `cursor` is",
+    ),
+) -> Pagination:
+    if cursor is None:
+        return Pagination(cursor=None, limit=limit)
+
+    try:
+        decoded = Cursor.decode(cursor)
+    except (ValueError, TypeError):
+        raise BadRequest("Invalid cursor")
+    return Pagination(cursor=decoded, limit=limit or DEFAULT_PAGE_SIZE)
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[Cursor]) -> None:
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor.encode()
+
+
+# Streaming export
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    json = "json"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.json: "application/json",
+}
+
+
+async def encode_export(
+    rows: AsyncIterator[Any],
+    schema: type[BaseModel],
+    export_format: ExportFormat,
+    chunk_size: int = 500,
+) -> AsyncIterator[bytes]:
+    """
+    Encode rows one by one with `orjson`, yielding `chunk_size` rows at a time,
+    either as newline delimited JSON or as an incrementally written JSON array
+    """
+    is_array = export_format == ExportFormat.json
+    chunk: list[bytes] = [b"["] if is_array else []
+    is_first = True
+
+    async for row in rows:
+        data = orjson.dumps(schema.from_orm(row).dict(by_alias=True), default=str)
+        if is_array:
+            chunk.append(data if is_first else b"," + data)
+        else:
+            chunk.append(data + b"\n")
+        is_first = False
+
+        if len(chunk) >= chunk_size:
+            yield b"".join(chunk)
+            chunk = []
+
+    if is_array:
+        chunk.append(b"]")
+
+    if chunk:
+        yield b"".join(chunk)
+
+
+def export_response(
+    rows: AsyncIterator[Any], schema: type[BaseModel], export_format: ExportFormat
+) -> StreamingResponse:
+    return StreamingResponse(
+        encode_export(rows, schema, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+    )
+
+
 # Generic CRUD Service
 
 
@@ -85,7 +215,7 @@ class BaseCRUDService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         session: AsyncSession,
         *args,
         options: Optional[list[ExecutableOption]] = None,
-        **kwargs
+        **kwargs,
     ) -> Optional[ModelType]:
         """Return first result that matches the given filters"""
         q = self._create_query(options)
@@ -101,9 +231,12 @@ class BaseCRUDService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         offset: int = 0,
         limit: int = 100,
         options: Optional[list[ExecutableOption]] = None,
-        **kwargs
+        **kwargs,
     ) -> Sequence[ModelType]:
-        """Return a list of results that match the given filters"""
+        """
+        Return a list of results that match the given filters using offset paging,
+        prefer `get_page` for listings, deep offsets scan every skipped row
+        """
         q = self._create_query(options)
         result = await session.execute(
             q.filter(*args).filter_by(**kwargs).offset(offset).limit(limit)
@@ -111,12 +244,46 @@ class BaseCRUDService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
         return result.scalars().all()
 
+    async def get_page(
+        self,
+        session: AsyncSession,
+        *args,
+        pagination: Pagination,
+        options: Optional[list[ExecutableOption]] = None,
+        **kwargs,
+    ) -> tuple[Sequence[ModelType], Optional[Cursor]]:
+        """
+        Return a page of results that match the given filters, newest first,
+        and the cursor of the next page if there is one.
+        Every result is returned when the pagination has no limit
+        """
+        created_at = self._model.created_at  # type: ignore
+        id = self._model.id  # type: ignore
+
+        q = self._create_query(options).filter(*args).filter_by(**kwargs)
+        if pagination.cursor is not None:
+            q = q.filter(tuple_(created_at, id) < tuple_(*pagination.cursor))
+
+        q = q.order_by(created_at.desc(), id.desc())
+        if pagination.limit is None:
+            return (await session.scalars(q)).all(), None
+
+        # Fetch one extra row to know if there is a next page
+        items = (await session.scalars(q.limit(pagination.limit + 1))).all()
+
+        if len(items) <= pagination.limit:
+            return items, None
+
+        items = items[: pagination.limit]
+        last = items[-1]
+        return items, Cursor(last.created_at, last.id)  # type: ignore
+
     async def get_all(
         self,
         session: AsyncSession,
         *args,
         options: Optional[list[ExecutableOption]] = None,
-        **kwargs
+        **kwargs,
     ) -> Sequence[ModelType]:
         """Return a list of all results that match the given filters"""
         q = self._create_query(options)
@@ -124,13 +291,36 @@ class BaseCRUDService(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
         return result.scalars().all()
 
+    async def stream(
+        self,
+        session: AsyncSession,
+        *args,
+        options: Optional[list[ExecutableOption]] = None,
+        batch_size: int = 1000,
+        **kwargs,
+    ) -> AsyncIterator[ModelType]:
+        """
+        Iterate over all results that match the given filters,
+        fetching `batch_size` rows at a time through a server side cursor
+        """
+        q = (
+            self._create_query(options)
+            .filter(*args)
+            .filter_by(**kwargs)
+            .execution_options(yield_per=batch_size)
+        )
+        result = await session.stream_scalars(q)
+
+        async for obj in result:
+            yield obj
+
     async def update(
         self,
         session: AsyncSession,
         *,
         update_obj: UpdateSchemaType | dict[str, Any],
         db_obj: Optional[ModelType] = None,
-        **kwargs
+        **kwargs,
     ) -> Optional[ModelType]:
         db_obj = db_obj or await self.get(session, **kwargs)
         if db_obj:
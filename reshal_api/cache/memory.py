@@ -0,0 +1,97 @@
+"""
+In-process cache storage, entries are per worker
+so values may be stale for up to `ttl` seconds in other workers
+"""
+
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+
+KeyType = TypeVar("KeyType", bound=Hashable)
+ValueType = TypeVar("ValueType")
+
+
+class TTLCache(Generic[KeyType, ValueType]):
+    """Bounded LRU cache whose entries expire `ttl` seconds after being set"""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[KeyType, tuple[float, ValueType]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: KeyType) -> bool:
+        return self.get(key) is not None
+
+    def get(self, key: KeyType) -> Optional[ValueType]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: KeyType, value: ValueType, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: KeyType) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class MemoryBackend:
+    """`CacheBackend` for a single worker, or for tests"""
+
+    def __init__(self, maxsize: int) -> None:
+        self._data: TTLCache[str, bytes] = TTLCache(maxsize=maxsize, ttl=0)
+        # Generations and locks must not be evicted or expire with the data
+        self._counters: dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._data.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._data.set(key, value, ttl)
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        if key in self._data:
+            return False
+        self._data.set(key, value, ttl)
+        return True
+
+    async def delete(self, key: str) -> None:
+        self._data.delete(key)
+
+    async def delete_if_equal(self, key: str, value: bytes) -> None:
+        if self._data.get(key) == value:
+            self._data.delete(key)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    async def get_counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    async def close(self) -> None:
+        ...
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._counters.clear()
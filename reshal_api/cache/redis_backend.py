@@ -0,0 +1,50 @@
+from typing import Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import WatchError
+
+
+class RedisBackend:
+    """`CacheBackend` shared by all workers, works with any Redis protocol server"""
+
+    def __init__(self, client: Redis) -> None:
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        return cls(Redis.from_url(url))
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(key, value, px=int(ttl * 1000))
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        return bool(await self.client.set(key, value, px=int(ttl * 1000), nx=True))
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(key)
+
+    async def delete_if_equal(self, key: str, value: bytes) -> None:
+        # A WATCH transaction rather than a Lua script, not every server runs scripts
+        async with self.client.pipeline() as pipe:
+            try:
+                await pipe.watch(key)
+                if await pipe.get(key) != value:
+                    return
+                pipe.multi()
+                pipe.delete(key)
+                await pipe.execute()
+            except WatchError:
+                # The key changed meanwhile, so it no longer holds `value`
+                pass
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+    async def get_counter(self, key: str) -> int:
+        return int(await self.client.get(key) or 0)
+
+    async def close(self) -> None:
+        await self.client.aclose()
@@ -0,0 +1,168 @@
+import asyncio
+import time
+import uuid
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Optional, Protocol
+
+import orjson
+
+from reshal_api.config import CacheSettings, get_config
+from reshal_api.opentelemetry import CACHE_HITS, CACHE_MISSES
+
+from .memory import MemoryBackend
+
+config = get_config()
+
+# Result of an in-flight load whose task was cancelled, waiters load the value again
+_LOAD_ABORTED = object()
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        ...
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        """Set the key only if it does not exist, return whether it was set"""
+        ...
+
+    async def delete(self, key: str) -> None:
+        ...
+
+    async def delete_if_equal(self, key: str, value: bytes) -> None:
+        """Delete the key only if it still holds `value`"""
+        ...
+
+    async def incr(self, key: str) -> int:
+        ...
+
+    async def get_counter(self, key: str) -> int:
+        ...
+
+    async def close(self) -> None:
+        ...
+
+
+class Cache:
+    """
+    Namespaced cache of `orjson` serializable values.
+
+    Keys embed the namespace generation, bumping it with `invalidate_namespace`
+    invalidates every key of the namespace at once.
+    Misses are loaded once per key: concurrent misses in a worker share one
+    load and other workers wait for the lock holder to fill the cache
+    """
+
+    LOCK_POLL_INTERVAL = 0.05
+
+    def __init__(self, backend: CacheBackend, prefix: str, lock_timeout: float) -> None:
+        self.backend = backend
+        self.prefix = prefix
+        self.lock_timeout = lock_timeout
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def _generation_key(self, namespace: str) -> str:
+        return f"{self.prefix}:{namespace}:generation"
+
+    async def _key(self, namespace: str, key: str) -> str:
+        generation = await self.backend.get_counter(self._generation_key(namespace))
+        return f"{self.prefix}:{namespace}:{generation}:{key}"
+
+    async def get_or_set(
+        self,
+        namespace: str,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: float,
+    ) -> Any:
+        """
+        Return the cached value or the result of `loader`, caching it for `ttl` seconds.
+        `None` results are cached too
+        """
+        if ttl <= 0:
+            return await loader()
+
+        full_key = await self._key(namespace, key)
+        if (cached := await self.backend.get(full_key)) is not None:
+            CACHE_HITS.labels(cache=namespace, app_name=config.OTLP_APP_NAME).inc()
+            return orjson.loads(cached)
+
+        CACHE_MISSES.labels(cache=namespace, app_name=config.OTLP_APP_NAME).inc()
+
+        while (future := self._inflight.get(full_key)) is not None:
+            value = await asyncio.shield(future)
+            if value is not _LOAD_ABORTED:
+                return value
+
+        future = asyncio.get_running_loop().create_future()
+        # Don't warn about an exception nobody waited for
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[full_key] = future
+        try:
+            value = await self._load(full_key, loader, ttl)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        except BaseException:
+            # Only this task is cancelled, one of the waiters takes over the load
+            future.set_result(_LOAD_ABORTED)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            del self._inflight[full_key]
+
+    async def _load(
+        self, full_key: str, loader: Callable[[], Awaitable[Any]], ttl: float
+    ) -> Any:
+        lock_key = f"{full_key}:lock"
+        # Once `lock_timeout` expires another worker may hold the lock, keep it
+        token = uuid.uuid4().bytes
+        if await self.backend.add(lock_key, token, self.lock_timeout):
+            try:
+                value = await loader()
+                await self.backend.set(full_key, orjson.dumps(value, default=str), ttl)
+                return value
+            finally:
+                await self.backend.delete_if_equal(lock_key, token)
+
+        deadline = time.monotonic() + self.lock_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.LOCK_POLL_INTERVAL)
+            if (cached := await self.backend.get(full_key)) is not None:
+                return orjson.loads(cached)
+
+        # The lock holder is too slow or gone
+        return await loader()
+
+    async def delete(self, namespace: str, key: str) -> None:
+        await self.backend.delete(await self._key(namespace, key))
+
+    async def invalidate_namespace(self, namespace: str) -> None:
+        await self.backend.incr(self._generation_key(namespace))
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+def create_backend(settings: CacheSettings) -> CacheBackend:
+    if settings.BACKEND == "redis":
+        # Optional dependency, only needed with the redis backend
+        from .redis_backend import RedisBackend
+
+        return RedisBackend.from_url(settings.REDIS_URL)
+
+    return MemoryBackend(maxsize=settings.MEMORY_MAXSIZE)
+
+
+@lru_cache(maxsize=1)
+def get_cache() -> Cache:
+    settings = CacheSettings()
+    return Cache(
+        create_backend(settings),
+        prefix=settings.PREFIX,
+        lock_timeout=settings.LOCK_TIMEOUT,
+    )
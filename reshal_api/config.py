@@ -1,5 +1,6 @@
 from enum import Enum
 from functools import lru_cache
+from typing import Any, Literal
 
 from pydantic import BaseSettings
 
@@ -32,6 +33,7 @@ class CORSSettings(BaseSettings):
     allow_origins: list[str] = ["*"]
     allow_methods: list[str] = ["*"]
     allow_headers: list[str] = ["*"]
+    expose_headers: list[str] = ["X-Next-Cursor"]
     allow_credentials: bool = True
 
     class Config:
@@ -44,12 +46,39 @@ class UvicornSettings(BaseSettings):
     port: int = 8080
     workers: int = 1
     reload: bool = True
+    # Behind a reverse proxy, set to the proxy's address (or "*" when only the proxy
+    # can reach the app) so the client IP is taken from X-Forwarded-For, per-IP
+    # rate limits would otherwise share one bucket for every client
+    proxy_headers: bool = True
+    forwarded_allow_ips: str | None = None  # None keeps uvicorn's 127.0.0.1
 
     class Config:
         env_prefix = "UVICORN_"
         case_sensitive = False
 
 
+class CacheSettings(BaseSettings):
+    BACKEND: Literal["memory", "redis"] = "memory"
+    REDIS_URL: str = "redis://127.0.0.1:6379/0"
+    PREFIX: str = "reshal"
+    LOCK_TIMEOUT: float = 5.0  # seconds other workers wait for a value being loaded
+    MEMORY_MAXSIZE: int = 10_000
+
+    class Config:
+        env_prefix = "CACHE_"
+
+
+class RateLimitSettings(BaseSettings):
+    # "redis" shares the limits between workers, "memory" limits each worker
+    BACKEND: Literal["memory", "redis"] = "memory"
+    REDIS_URL: str = "redis://127.0.0.1:6379/0"
+    PREFIX: str = "reshal:ratelimit"
+    MEMORY_MAXSIZE: int = 100_000
+
+    class Config:
+        env_prefix = "RATE_LIMIT_"
+
+
 class DatabaseSettings(BaseSettings):
     USER: str = "reshal"
     PASSWORD: str = "reshal123"
@@ -57,6 +86,13 @@ class DatabaseSettings(BaseSettings):
     PORT: int = 5432
     NAME: str = "reshaldb"
     DRIVER: str = "asyncpg"
+    POOL_SIZE: int = 5
+    MAX_OVERFLOW: int = 10
+    POOL_PRE_PING: bool = False
+    POOL_RECYCLE: int = -1  # seconds, -1 disables recycling
+    POOL_TIMEOUT: float = 30.0  # seconds to wait for a connection from the pool
+    STATEMENT_TIMEOUT: int = 0  # milliseconds, 0 disables the timeout
+    STATEMENT_CACHE_SIZE: int = 100  # asyncpg prepared statements per connection
 
     class Config:
         env_prefix = "DB_"
@@ -65,6 +101,55 @@ class DatabaseSettings(BaseSettings):
     def url(self) -> str:
         return f"postgresql+{self.DRIVER}://{self.USER}:{self.PASSWORD}@{self.HOST}:{self.PORT}/{self.NAME}"
 
+    @property
+    def connect_args(self) -> dict[str, Any]:
+        if self.DRIVER != "asyncpg":
+            return {}
+
+        connect_args: dict[str, Any] = {
+            "prepared_statement_cache_size": self.STATEMENT_CACHE_SIZE,
+        }
+        if self.STATEMENT_TIMEOUT:
+            connect_args["server_settings"] = {
+                "statement_timeout": str(self.STATEMENT_TIMEOUT)
+            }
+        return connect_args
+
+    @property
+    def engine_options(self) -> dict[str, Any]:
+        """Keyword arguments for `create_async_engine`"""
+        return {
+            "pool_size": self.POOL_SIZE,
+            "max_overflow": self.MAX_OVERFLOW,
+            "pool_pre_ping": self.POOL_PRE_PING,
+            "pool_recycle": self.POOL_RECYCLE,
+            "pool_timeout": self.POOL_TIMEOUT,
+            "connect_args": self.connect_args,
+        }
+
+
+class ReplicaDatabaseSettings(DatabaseSettings):
+    """
+    Read replicas, `HOSTS` entries are `host` or `host:port`.
+    Reads go to the primary if no replicas are configured
+    """
+
+    HOSTS: list[str] = []
+    MAX_LAG: float = 5.0  # seconds of replication lag before a replica is skipped
+    HEALTH_CHECK_INTERVAL: float = 10.0  # seconds
+    HEALTH_CHECK_TIMEOUT: float = 1.0  # seconds, slower replicas count as unreachable
+
+    class Config:
+        env_prefix = "DB_REPLICA_"
+
+    def url_for(self, host: str) -> str:
+        host, _, port = host.partition(":")
+        return f"postgresql+{self.DRIVER}://{self.USER}:{self.PASSWORD}@{host}:{port or self.PORT}/{self.NAME}"
+
+    @property
+    def urls(self) -> list[str]:
+        return [self.url_for(host) for host in self.HOSTS]
+
 
 class Config(BaseSettings):
     TITLE: str = "Reshal API"
@@ -74,14 +159,66 @@ class Config(BaseSettings):
     ENVIRONMENT: Environment = Environment.LOCAL
     SECRET_KEY: str = "secret"
     JWT_ALGORITHM: str = "HS256"
+    # "hs256" is a faster HS256-only codec, tokens are compatible with "jose"
+    JWT_CODEC: Literal["jose", "hs256"] = "jose"
+    JWT_CACHE_MAXSIZE: int = 10000  # verified tokens per worker, 0 disables
     ACCESS_TOKEN_COOKIE_NAME: str = "reshal_access_token"
-    ACCESS_TOKEN_EXPIRE: int = 43800  # 30 days
+    ACCESS_TOKEN_EXPIRE: int = 15  # minutes
+    REFRESH_TOKEN_COOKIE_NAME: str = "reshal_refresh_token"
+    REFRESH_TOKEN_EXPIRE: int = 43800  # 30 days
+    TOKEN_REVOCATION_SYNC_INTERVAL: int = 10  # seconds
+    # Authorize from the token claims alone, role changes apply on the next refresh
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
+    # Login attempts per window, checked before any password hashing
+    LOGIN_RATE_LIMIT_PER_IP: int = 20
+    LOGIN_RATE_LIMIT_PER_EMAIL: int = 5
+    LOGIN_RATE_LIMIT_WINDOW: int = 60  # seconds
+    # Argon2 cost, existing hashes keep the parameters they were created with
+    PASSWORD_HASH_TIME_COST: int = 2
+    PASSWORD_HASH_MEMORY_COST: int = 102400  # KiB
+    PASSWORD_HASH_PARALLELISM: int = 8
+    # Concurrent argon2 jobs per worker and how many may wait before shedding load
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
     STATIC_DIR: str = "static"
+    # SQL statements per request, exceeding it logs a warning outside production
+    QUERY_BUDGET: int = 20
+    # Sampled request profiles, admins can also ask for one with `X-Profile`
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_EVERY: int = 0  # profile 1 in N requests, 0 disables sampling
+    PROFILING_INTERVAL: float = 0.001  # seconds between stack samples
+    PROFILING_MAX_PROFILES: int = 50  # per worker, the oldest are dropped
+    # Event loop lag sampling, stalls over the threshold are logged with their stack
+    LOOP_LAG_ENABLED: bool = True
+    LOOP_LAG_INTERVAL: float = 0.1  # seconds
+    LOOP_LAG_THRESHOLD: float = 0.1  # seconds
     OTLP_GRPC_ENDPOINT: str = "http://tempo:4317"
     AWS_ACCESS_KEY: str
     AWS_SECRET_KEY: str
     AWS_REGION: str = "eu-north-1"
     EMAIL_WHITELIST: list[str] = ["admin@bartoszmagiera.dev"]
+    # "fake" keeps emails in memory, for local development
+    EMAIL_TRANSPORT: Literal["ses", "fake"] = "ses"
+    EMAIL_SENDER_WORKERS: int = 4
+    EMAIL_BATCH_SIZE: int = 50  # outbox rows claimed per query
+    EMAIL_MAX_ATTEMPTS: int = 8
+    EMAIL_POLL_INTERVAL: float = 5.0  # seconds, commits wake the dispatcher earlier
+    EMAIL_RETRY_BACKOFF: float = 30.0  # seconds, doubled on every failed attempt
+    # Jinja bytecode cache, the system temp dir when unset
+    EMAIL_TEMPLATES_CACHE_DIR: str | None = None
+    # Output of `reshal-compile-templates`, sources are used when unset
+    EMAIL_TEMPLATES_COMPILED_DIR: str | None = None
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_LOCK_ID: int = 7305112210  # Postgres advisory lock key
+    SCHEDULER_LEADER_RETRY: float = 30.0  # seconds
+    RESERVATION_REMINDER_SCHEDULE: str = "*/10 * * * *"  # cron, UTC
+    RESERVATION_REMINDER_AHEAD: int = 24  # hours
+    RESERVATION_REMINDER_BATCH_SIZE: int = 500
+    AVAILABILITY_MAX_DAYS: int = 31
+    FACILITY_CACHE_TTL: int = 60  # seconds, 0 disables the cache
+    FACILITY_TYPES_CACHE_TTL: int = 3600  # seconds, 0 disables the cache
+    USER_CACHE_TTL: int = 60  # seconds, 0 disables the cache
+    AVAILABILITY_CACHE_TTL: int = 30  # seconds, per worker, 0 disables the cache
 
     class Config:
         env_prefix = "APP_"
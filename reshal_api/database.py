@@ -1,10 +1,24 @@
-from typing import AsyncGenerator
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass
+from logging import getLogger
+from typing import AsyncGenerator, Awaitable, Callable, Optional, Sequence
 
-from sqlalchemy import MetaData
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import MetaData, event, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
 
-from reshal_api.config import DatabaseSettings
+from reshal_api.config import DatabaseSettings, ReplicaDatabaseSettings, get_config
+from reshal_api.opentelemetry import DB_POOL_WAIT_TIME
 
 DB_NAMING_CONVENTION = {
     "ix": "%(column_0_label)s_idx",
@@ -15,19 +29,217 @@ DB_NAMING_CONVENTION = {
 }
 
 
+logger = getLogger(__name__)
+
+config = get_config()
 db_config = DatabaseSettings()
+replica_db_config = ReplicaDatabaseSettings()
 metadata = MetaData(naming_convention=DB_NAMING_CONVENTION)
 Base = declarative_base(metadata=metadata)
 
-async_engine = create_async_engine(db_config.url)
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Records how long checkouts wait for a connection.
+    Sessions check out lazily, so only the ones that run SQL are measured
+    """
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start_time = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_WAIT_TIME.labels(app_name=config.OTLP_APP_NAME).observe(
+                time.perf_counter() - start_time
+            )
+
+
+def create_engine_from_settings(settings: DatabaseSettings) -> AsyncEngine:
+    return create_async_engine(
+        settings.url, poolclass=TimedQueuePool, **settings.engine_options
+    )
+
+
+async_engine = create_engine_from_settings(db_config)
 
 
 sessionmaker = async_sessionmaker(
     bind=async_engine, class_=AsyncSession, expire_on_commit=False
 )
 
+# Replication lag in seconds, 0 when connected to a primary
+REPLICATION_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_is_in_recovery() "
+    "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+    "ELSE 0 END"
+)
+
+
+@dataclass
+class Replica:
+    engine: AsyncEngine
+    sessionmaker: async_sessionmaker[AsyncSession]
+    # Replicas are not used until their first health check passes
+    healthy: bool = False
+
+
+class ReplicaRouter:
+    """
+    Round-robins read sessions across replica engines.
+    Replicas that are unreachable or lag behind more than `max_lag` seconds are skipped
+    until the next health check, when no replica is healthy the primary is used.
+
+    Health is refreshed in the background by `run`, requests never wait on a probe
+    """
+
+    def __init__(
+        self,
+        engines: Sequence[AsyncEngine],
+        primary: async_sessionmaker[AsyncSession],
+        *,
+        max_lag: float,
+        health_check_interval: float,
+        health_check_timeout: float,
+    ) -> None:
+        self.replicas = [
+            Replica(
+                engine,
+                async_sessionmaker(
+                    bind=engine, class_=AsyncSession, expire_on_commit=False
+                ),
+            )
+            for engine in engines
+        ]
+        self.primary = primary
+        self.max_lag = max_lag
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self._next = 0
+
+    async def _replication_lag(self, replica: Replica) -> float:
+        async with replica.engine.connect() as conn:
+            return float(await conn.scalar(REPLICATION_LAG_QUERY) or 0)
+
+    async def check(self, replica: Replica) -> bool:
+        try:
+            lag = await asyncio.wait_for(
+                self._replication_lag(replica), self.health_check_timeout
+            )
+        except (SQLAlchemyError, OSError, asyncio.TimeoutError):
+            logger.warning(f"Replica {replica.engine.url!r} is unreachable")
+            replica.healthy = False
+        else:
+            replica.healthy = lag <= self.max_lag
+            if not replica.healthy:
+                logger.warning(f"Replica {replica.engine.url!r} lags behind {lag}s")
+
+        return replica.healthy
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.check_all()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Replica health check failed")
+            await asyncio.sleep(self.health_check_interval)
+
+    def get_sessionmaker(self) -> async_sessionmaker[AsyncSession]:
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self._next % len(self.replicas)]
+            self._next += 1
+            if replica.healthy:
+                return replica.sessionmaker
+
+        return self.primary
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+replica_router = ReplicaRouter(
+    [
+        create_async_engine(url, **replica_db_config.engine_options)
+        for url in replica_db_config.urls
+    ],
+    sessionmaker,
+    max_lag=replica_db_config.MAX_LAG,
+    health_check_interval=replica_db_config.HEALTH_CHECK_INTERVAL,
+    health_check_timeout=replica_db_config.HEALTH_CHECK_TIMEOUT,
+)
+
+
+# Session.info keys of callbacks waiting for the transaction and of committed ones
+AFTER_COMMIT_PENDING = "after_commit_pending"
+AFTER_COMMIT_READY = "after_commit_ready"
+
+AfterCommitCallback = Callable[[], Optional[Awaitable[None]]]
+
+# Delayed callbacks, referenced until they are done
+_delayed_callbacks: set[asyncio.Task] = set()
+
+
+def after_commit(session: AsyncSession, callback: AfterCommitCallback) -> None:
+    """
+    Run `callback` once the request transaction commits, it is dropped on rollback.
+    Cache invalidation goes through this, invalidating before the commit lets
+    concurrent reads cache the rows the transaction is about to change
+    """
+    session.info.setdefault(AFTER_COMMIT_PENDING, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    if callbacks := session.info.pop(AFTER_COMMIT_PENDING, None):
+        session.info.setdefault(AFTER_COMMIT_READY, []).extend(callbacks)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(AFTER_COMMIT_PENDING, None)
+
+
+async def _run_callbacks(callbacks: list[AfterCommitCallback], delay: float) -> None:
+    if delay > 0:
+        await asyncio.sleep(delay)
+    for callback in callbacks:
+        try:
+            result = callback()
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            logger.exception("After commit callback failed")
+
+
+async def run_after_commit(session: AsyncSession) -> None:
+    callbacks = session.info.pop(AFTER_COMMIT_READY, None)
+    if not callbacks:
+        return
+
+    await _run_callbacks(callbacks, delay=0)
+    if replica_router.replicas:
+        # Replicas within `max_lag` may still serve the old rows and refill caches
+        task = asyncio.create_task(_run_callbacks(callbacks, replica_router.max_lag))
+        _delayed_callbacks.add(task)
+        task.add_done_callback(_delayed_callbacks.discard)
+
 
 async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     async with sessionmaker() as session:
         async with session.begin():
             yield session
+
+        await run_after_commit(session)
+
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only endpoints, served by a replica when one is available"""
+    read_sessionmaker = replica_router.get_sessionmaker()
+    async with read_sessionmaker() as session:
+        async with session.begin():
+            yield session
@@ -0,0 +1,33 @@
+"""
+Precompile email templates to Python modules
+
+    reshal-compile-templates [target]
+
+Point `APP_EMAIL_TEMPLATES_COMPILED_DIR` at the target, templates are then
+imported instead of parsed when the app starts.
+"""
+
+import argparse
+
+from reshal_api.config import get_config
+
+from .service import TemplatesService
+
+config = get_config()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Precompile email templates")
+    parser.add_argument(
+        "target",
+        nargs="?",
+        default=config.EMAIL_TEMPLATES_COMPILED_DIR or "compiled_templates",
+    )
+    args = parser.parse_args()
+
+    TemplatesService().compile(args.target)
+    print(f"compiled templates to {args.target}")
+
+
+if __name__ == "__main__":
+    main()
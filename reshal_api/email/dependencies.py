@@ -2,22 +2,14 @@ from typing import Annotated
 
 from fastapi import Depends
 
-from reshal_api.config import get_config
-
-from .service import EmailService as EmailService_
-from .service import SESEmailService
+from .service import EmailOutboxService as EmailOutboxService_
 from .service import TemplatesService as TemplatesService_
-
-config = get_config()
-
-
-def get_email_service() -> EmailService_:
-    return SESEmailService(config.AWS_ACCESS_KEY, config.AWS_SECRET_KEY)
+from .service import get_templates_service
 
 
-def get_templates_service() -> TemplatesService_:
-    return TemplatesService_()
+def get_email_outbox_service() -> EmailOutboxService_:
+    return EmailOutboxService_()
 
 
-EmailService = Annotated[EmailService_, Depends(get_email_service)]
+EmailOutboxService = Annotated[EmailOutboxService_, Depends(get_email_outbox_service)]
 TemplatesService = Annotated[TemplatesService_, Depends(get_templates_service)]
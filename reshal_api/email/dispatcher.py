@@ -0,0 +1,221 @@
+"""
+Delivers emails from the outbox
+
+A poller claims due rows in batches and feeds an asyncio queue drained by
+sender workers. Results are written back in one transaction per batch,
+failed messages are retried with exponential backoff.
+"""
+
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from reshal_api.config import get_config
+from reshal_api.database import sessionmaker
+from reshal_api.opentelemetry import EMAILS_SENT
+
+from .models import EmailOutbox, EmailStatus
+from .service import OUTBOX_PENDING
+from .transport import (
+    EmailError,
+    EmailMessage,
+    EmailTransport,
+    FakeTransport,
+    SESTransport,
+)
+
+logger = logging.getLogger(__name__)
+
+config = get_config()
+
+
+def retry_delay(attempts: int, base: float, cap: float = 3600) -> float:
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(cap, base * 2 ** (attempts - 1)))
+
+
+class EmailDispatcher:
+    def __init__(
+        self,
+        transport: EmailTransport,
+        session_factory: async_sessionmaker[AsyncSession],
+        workers: int,
+        batch_size: int,
+        max_attempts: int,
+        poll_interval: float,
+        retry_backoff: float,
+        lease: float = 300,
+    ) -> None:
+        self.transport = transport
+        self.session_factory = session_factory
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.poll_interval = poll_interval
+        self.retry_backoff = retry_backoff
+        # Claimed rows become due again after this, if the worker died meanwhile
+        self.lease = lease
+
+        self._queue: asyncio.Queue[EmailMessage] = asyncio.Queue()
+        self._results: list[tuple[EmailMessage, Exception | None]] = []
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    def _after_commit(self, session: Session) -> None:
+        if session.info.pop(OUTBOX_PENDING, False):
+            self.notify()
+
+    async def start(self) -> None:
+        event.listen(Session, "after_commit", self._after_commit)
+        self._tasks = [asyncio.create_task(self._poll())] + [
+            asyncio.create_task(self._send_worker()) for _ in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        if event.contains(Session, "after_commit", self._after_commit):
+            event.remove(Session, "after_commit", self._after_commit)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Claimed but unsent messages are picked up again once their lease expires
+        await self.flush_results()
+        await self.transport.close()
+
+    async def claim(self) -> int:
+        """Queue a batch of due messages, return how many were claimed"""
+        now = datetime.utcnow()
+        due = (
+            select(EmailOutbox.id)
+            .where(EmailOutbox.status == EmailStatus.pending)
+            .where(EmailOutbox.next_attempt_at <= now)
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        async with self.session_factory() as session, session.begin():
+            rows = await session.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_(due.scalar_subquery()))
+                .values(next_attempt_at=now + timedelta(seconds=self.lease))
+                .execution_options(synchronize_session=False)
+                .returning(
+                    EmailOutbox.id,
+                    EmailOutbox.recipient,
+                    EmailOutbox.subject,
+                    EmailOutbox.content,
+                    EmailOutbox.attempts,
+                )
+            )
+            messages = [EmailMessage(*row) for row in rows]
+
+        for message in messages:
+            self._queue.put_nowait(message)
+        return len(messages)
+
+    async def flush_results(self) -> None:
+        """Write back the outcome of finished sends in one transaction"""
+        if not self._results:
+            return
+        results, self._results = self._results, []
+
+        now = datetime.utcnow()
+        sent_ids = [message.id for message, error in results if error is None]
+        async with self.session_factory() as session, session.begin():
+            if sent_ids:
+                await session.execute(
+                    update(EmailOutbox)
+                    .where(EmailOutbox.id.in_(sent_ids))
+                    .values(status=EmailStatus.sent, sent_at=now, last_error=None)
+                    .execution_options(synchronize_session=False)
+                )
+
+            for message, error in results:
+                if error is None:
+                    continue
+                attempts = message.attempts + 1
+                values = {"attempts": attempts, "last_error": str(error)}
+                if attempts >= self.max_attempts:
+                    values["status"] = EmailStatus.failed
+                else:
+                    delay = retry_delay(attempts, self.retry_backoff)
+                    values["next_attempt_at"] = now + timedelta(seconds=delay)
+                await session.execute(
+                    update(EmailOutbox)
+                    .where(EmailOutbox.id == message.id)
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+
+        for message, error in results:
+            status = "sent" if error is None else "error"
+            EMAILS_SENT.labels(status=status, app_name=config.OTLP_APP_NAME).inc()
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                await self.flush_results()
+                claimed = 0
+                # Only claim what the senders can start on soon, leases keep ticking
+                if self._queue.qsize() < self.batch_size:
+                    claimed = await self.claim()
+                if claimed == self.batch_size:
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Email outbox poll failed")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _send_worker(self) -> None:
+        while True:
+            message = await self._queue.get()
+            error: Exception | None = None
+            try:
+                await self.transport.send(message)
+            except EmailError as e:
+                error = e
+            except Exception as e:
+                logger.exception(f"Unexpected error while sending email {message.id}")
+                error = e
+            finally:
+                self._queue.task_done()
+
+            self._results.append((message, error))
+            self.notify()
+
+
+def create_transport() -> EmailTransport:
+    if config.EMAIL_TRANSPORT == "fake":
+        return FakeTransport()
+
+    return SESTransport(
+        config.AWS_ACCESS_KEY, config.AWS_SECRET_KEY, config.EMAIL_SENDER_WORKERS
+    )
+
+
+@lru_cache(maxsize=1)
+def get_email_dispatcher() -> EmailDispatcher:
+    return EmailDispatcher(
+        create_transport(),
+        sessionmaker,
+        workers=config.EMAIL_SENDER_WORKERS,
+        batch_size=config.EMAIL_BATCH_SIZE,
+        max_attempts=config.EMAIL_MAX_ATTEMPTS,
+        poll_interval=config.EMAIL_POLL_INTERVAL,
+        retry_backoff=config.EMAIL_RETRY_BACKOFF,
+    )
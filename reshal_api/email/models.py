@@ -0,0 +1,43 @@
+import uuid
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from sqlalchemy import Index, Text, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from reshal_api.database import Base
+from reshal_api.mixins import TimestampMixin
+
+
+class EmailStatus(Enum):
+    pending = "pending"
+    sent = "sent"
+    failed = "failed"
+
+
+class EmailOutbox(Base, TimestampMixin):
+    """
+    Emails waiting for delivery, written in the same transaction as the change
+    that triggers them. Claimed rows get `next_attempt_at` pushed forward
+    as a lease, so a crashed sender only delays them.
+    """
+
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index(
+            "email_outbox_due_idx",
+            "next_attempt_at",
+            postgresql_where=text("status = 'pending'"),
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
+    recipient: Mapped[str] = mapped_column()
+    subject: Mapped[str] = mapped_column()
+    content: Mapped[str] = mapped_column(Text)
+    status: Mapped[EmailStatus] = mapped_column(default=EmailStatus.pending)
+    attempts: Mapped[int] = mapped_column(default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    sent_at: Mapped[Optional[datetime]] = mapped_column()
+    last_error: Mapped[Optional[str]] = mapped_column(Text)
@@ -1,33 +1,94 @@
+import asyncio
 import logging
 import os
-from typing import Protocol
-
-import boto3
-from botocore import exceptions as botocore_exceptions
-from jinja2 import Environment, FileSystemLoader
+from functools import lru_cache
+from typing import Any, Iterable
+
+from jinja2 import (
+    BaseLoader,
+    ChoiceLoader,
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    ModuleLoader,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from reshal_api.config import get_config
 
+from .models import EmailOutbox
+
 logger = logging.getLogger(__name__)
 
 config = get_config()
 
-
-class EmailError(Exception):
-    ...
+OUTBOX_PENDING = "email_outbox_pending"
 
 
 class TemplatesService:
+    """
+    Templates are compiled once and kept for the life of the process.
+
+    The bytecode cache skips compilation on restarts, `precompiled_dir` holds
+    modules from `reshal-compile-templates` and skips parsing altogether.
+    """
+
     TEMPLATES_DIR = os.path.join(os.path.dirname(__file__), "templates")
+    RESERVATION_CREATED = "reservation_created.html"
+    RESERVATION_REMINDER = "reservation_reminder.html"
 
-    def __init__(self, templates_dir: str | None = None) -> None:
+    def __init__(
+        self,
+        templates_dir: str | None = None,
+        bytecode_cache_dir: str | None = None,
+        precompiled_dir: str | None = None,
+    ) -> None:
         if templates_dir is None:
             templates_dir = TemplatesService.TEMPLATES_DIR
 
         self.templates_path = templates_dir
-        self.environment = Environment(loader=FileSystemLoader(self.templates_path))
+        self.source_loader = FileSystemLoader(self.templates_path)
+        loader: BaseLoader = self.source_loader
+        if precompiled_dir is not None:
+            # Sources are the fallback for templates added after compiling
+            loader = ChoiceLoader([ModuleLoader(precompiled_dir), self.source_loader])
+
+        self.environment = Environment(
+            loader=loader,
+            bytecode_cache=FileSystemBytecodeCache(bytecode_cache_dir),
+            enable_async=True,
+            auto_reload=False,
+            cache_size=-1,
+        )
 
-    def create_reservation_successfull_content(
+    def preload(self) -> None:
+        for name in self.source_loader.list_templates():
+            self.environment.get_template(name)
+
+    def compile(self, target: str) -> None:
+        """Write templates as Python modules for `precompiled_dir`"""
+        # Same options as the rendering environment, compiled code depends on them
+        environment = self.environment.overlay(
+            loader=self.source_loader, enable_async=self.environment.is_async
+        )
+        environment.compile_templates(target, zip=None, ignore_errors=False)
+
+    async def render(self, name: str, context: dict[str, Any]) -> str:
+        template = self.environment.get_template(name)
+        return await template.render_async(context)
+
+    async def render_many(
+        self, name: str, contexts: Iterable[dict[str, Any]]
+    ) -> list[str]:
+        template = self.environment.get_template(name)
+        rendered = []
+        for context in contexts:
+            rendered.append(await template.render_async(context))
+            # Rendering never awaits anything, let other tasks run between emails
+            await asyncio.sleep(0)
+        return rendered
+
+    async def create_reservation_successfull_content(
         self,
         first_name: str,
         facility_name: str,
@@ -35,52 +96,46 @@ class TemplatesService:
         end_time: str,
         price: str,
     ) -> str:
-        template = self.environment.get_template("reservation_created.html")
-        rendered_string = template.render(
+        return await self.render(
+            self.RESERVATION_CREATED,
             {
                 "first_name": first_name,
                 "facility_name": facility_name,
                 "start_time": start_time,
                 "end_time": end_time,
                 "price": price,
-            }
+            },
         )
 
-        return rendered_string
-
-
-class EmailService(Protocol):
-    def send_email(self, to: str, subject: str, content: str) -> None:
-        ...
-
 
-class SESEmailService:
-    sender: str = "admin@bartoszmagiera.dev"
-
-    def __init__(self, access_key: str, secret_key: str) -> None:
-        self.client = boto3.client(
-            "ses",
-            region_name=config.AWS_REGION,
-            aws_access_key_id=access_key,
-            aws_secret_access_key=secret_key,
-        )
-
-    def send_email(self, to: str, subject: str, content: str) -> None:
-        send_kwargs = {
-            "Source": self.sender,
-            "Destination": {"ToAddresses": [to]},
-            "Message": {
-                "Subject": {"Data": subject},
-                "Body": {"Html": {"Charset": "UTF-8", "Data": content}},
-            },
-        }
-        if not config.ENVIRONMENT.is_production or to not in config.EMAIL_WHITELIST:
-            logger.info(f"Would sent an email {send_kwargs=}")
-            return None
-
-        try:
-            response = self.client.send_email(**send_kwargs)
-            logger.info(f"Sent email {response['MessageId']}")
-        except botocore_exceptions.ClientError as e:
-            logger.error(f"Error while sending an email {send_kwargs=}")
-            raise EmailError() from e
+class EmailOutboxService:
+    """Adds emails to the outbox, `EmailDispatcher` delivers them once committed"""
+
+    async def enqueue(
+        self, session: AsyncSession, to: str, subject: str, content: str
+    ) -> EmailOutbox:
+        email = EmailOutbox(recipient=to, subject=subject, content=content)
+        session.add(email)
+        # Wakes the dispatcher after commit instead of waiting for its next poll
+        session.info[OUTBOX_PENDING] = True
+        return email
+
+    async def enqueue_many(
+        self, session: AsyncSession, messages: Iterable[tuple[str, str, str]]
+    ) -> list[EmailOutbox]:
+        """`(to, subject, content)` tuples"""
+        emails = [
+            EmailOutbox(recipient=to, subject=subject, content=content)
+            for to, subject, content in messages
+        ]
+        session.add_all(emails)
+        session.info[OUTBOX_PENDING] = True
+        return emails
+
+
+@lru_cache(maxsize=1)
+def get_templates_service() -> TemplatesService:
+    return TemplatesService(
+        bytecode_cache_dir=config.EMAIL_TEMPLATES_CACHE_DIR,
+        precompiled_dir=config.EMAIL_TEMPLATES_COMPILED_DIR,
+    )
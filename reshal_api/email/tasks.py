@@ -1,11 +1,15 @@
 from datetime import datetime
 from decimal import Decimal
 
-from .service import EmailService, TemplatesService
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from .models import EmailOutbox
+from .service import EmailOutboxService, TemplatesService
 
-def send_reservation_confirmation(
-    email_service: EmailService,
+
+async def queue_reservation_confirmation(
+    session: AsyncSession,
+    outbox_service: EmailOutboxService,
     templates_service: TemplatesService,
     to: str,
     first_name: str,
@@ -13,8 +17,8 @@ def send_reservation_confirmation(
     start_time: datetime,
     end_time: datetime,
     price: Decimal,
-) -> None:
-    content = templates_service.create_reservation_successfull_content(
+) -> EmailOutbox:
+    content = await templates_service.create_reservation_successfull_content(
         first_name=first_name,
         facility_name=facility_name,
         start_time=start_time.strftime("%Y-%m-%d %H:%M"),
@@ -22,4 +26,6 @@ def send_reservation_confirmation(
         price="${:,.2f}".format(price),
     )
     subject = "Reshal: Reservation created"
-    email_service.send_email(to=to, subject=subject, content=content)
+    return await outbox_service.enqueue(
+        session, to=to, subject=subject, content=content
+    )
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Protocol
+
+import boto3
+from botocore import exceptions as botocore_exceptions
+
+from reshal_api.config import get_config
+
+logger = logging.getLogger(__name__)
+
+config = get_config()
+
+
+class EmailError(Exception):
+    ...
+
+
+class EmailMessage(NamedTuple):
+    id: uuid.UUID
+    to: str
+    subject: str
+    content: str
+    attempts: int = 0
+
+
+class EmailTransport(Protocol):
+    async def send(self, message: EmailMessage) -> None:
+        """Raise `EmailError` when the message was not accepted"""
+        ...
+
+    async def close(self) -> None:
+        ...
+
+
+class SESTransport:
+    """
+    One boto3 client for the whole worker, boto3 clients are thread-safe.
+
+    boto3 is blocking, calls run in a dedicated pool sized for the sender workers
+    so they never compete with the default executor.
+    """
+
+    sender: str = "admin@bartoszmagiera.dev"
+
+    def __init__(self, access_key: str, secret_key: str, max_workers: int) -> None:
+        self.client = boto3.client(
+            "ses",
+            region_name=config.AWS_REGION,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="ses"
+        )
+
+    def _send(self, message: EmailMessage) -> None:
+        send_kwargs = {
+            "Source": self.sender,
+            "Destination": {"ToAddresses": [message.to]},
+            "Message": {
+                "Subject": {"Data": message.subject},
+                "Body": {"Html": {"Charset": "UTF-8", "Data": message.content}},
+            },
+        }
+        if (
+            not config.ENVIRONMENT.is_production
+            or message.to not in config.EMAIL_WHITELIST
+        ):
+            logger.info(f"Would sent an email {send_kwargs=}")
+            return None
+
+        try:
+            response = self.client.send_email(**send_kwargs)
+            logger.info(f"Sent email {response['MessageId']}")
+        except botocore_exceptions.ClientError as e:
+            logger.error(f"Error while sending an email {send_kwargs=}")
+            raise EmailError(str(e)) from e
+
+    async def send(self, message: EmailMessage) -> None:
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._send, message)
+
+    async def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class FakeTransport:
+    """Keeps messages in memory, for tests and local development"""
+
+    def __init__(self, fail_first: int = 0) -> None:
+        self.sent: list[EmailMessage] = []
+        # Sends to reject before accepting any, to exercise retries
+        self.fail_first = fail_first
+
+    async def send(self, message: EmailMessage) -> None:
+        if self.fail_first > 0:
+            self.fail_first -= 1
+            raise EmailError("Fake transport failure")
+        self.sent.append(message)
+
+    async def close(self) -> None:
+        ...
@@ -43,3 +43,14 @@ class Conflict(BaseHttpException):
 
     def __init__(self, detail: str = "Conflict"):
         super().__init__(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+
+class TooManyRequests(BaseHttpException):
+    """HTTP_429_TOO_MANY_REQUESTS"""
+
+    def __init__(self, detail: str = "Too many requests", retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
@@ -2,6 +2,7 @@ import os
 from abc import ABC, abstractmethod
 
 import aiofiles
+import aiofiles.os
 from fastapi import UploadFile
 
 from reshal_api.config import get_config
@@ -29,11 +30,11 @@ class LocalFileManager(BaseFileManager):
 
     async def save(self, file: UploadFile, name: str, *, directory_name: str) -> str:
         dir_path = os.path.join(config.STATIC_DIR, directory_name)
-        os.makedirs(dir_path, exist_ok=True)
+        await aiofiles.os.makedirs(dir_path, exist_ok=True)
         filename = f"{os.path.join(dir_path, name)}.jpg"
         async with aiofiles.open(filename, mode="wb") as f:
             await f.write((await file.read()))
         return filename
 
     async def delete(self, path: str) -> None:
-        os.remove(path)
+        await aiofiles.os.remove(path)
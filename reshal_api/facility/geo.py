@@ -0,0 +1,163 @@
+"""
+Pure Python geospatial helpers, the reference for the `earthdistance`
+based search in `FacilityService.search_nearby` and an in-memory geohash index
+for when the database extensions are not available
+"""
+
+import math
+from collections import defaultdict
+from typing import Generic, Hashable, Iterable, TypeVar
+
+EARTH_RADIUS = 6_378_168.0  # meters, same as `earth()` in `earthdistance`
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+KeyType = TypeVar("KeyType", bound=Hashable)
+
+
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in meters"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * math.asin(min(1.0, math.sqrt(a)))
+
+
+def geohash_encode(lat: float, lon: float, precision: int) -> str:
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    geohash = []
+    bits, bit_count, is_lon = 0, 0, True
+
+    while len(geohash) < precision:
+        value_range, value = (lon_range, lon) if is_lon else (lat_range, lat)
+        mid = (value_range[0] + value_range[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            value_range[0] = mid
+        else:
+            value_range[1] = mid
+        is_lon = not is_lon
+
+        bit_count += 1
+        if bit_count == 5:
+            geohash.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+
+    return "".join(geohash)
+
+
+def geohash_cell_size(precision: int) -> tuple[float, float]:
+    """`(lat, lon)` size of a geohash cell in degrees"""
+    lon_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / 2**lat_bits, 360.0 / 2**lon_bits
+
+
+def bounding_box(
+    lat: float, lon: float, radius: float
+) -> list[tuple[float, float, float, float]]:
+    """
+    `(min_lat, min_lon, max_lat, max_lon)` boxes covering the circle,
+    split in two when the circle crosses the antimeridian
+    """
+    d_lat = math.degrees(radius / EARTH_RADIUS)
+    min_lat, max_lat = max(lat - d_lat, -90.0), min(lat + d_lat, 90.0)
+
+    cos_lat = math.cos(math.radians(lat))
+    if min_lat == -90.0 or max_lat == 90.0 or cos_lat <= 1e-12:
+        return [(min_lat, -180.0, max_lat, 180.0)]
+
+    d_lon = math.degrees(radius / (EARTH_RADIUS * cos_lat))
+    if d_lon >= 180.0:
+        return [(min_lat, -180.0, max_lat, 180.0)]
+
+    min_lon, max_lon = lon - d_lon, lon + d_lon
+    if min_lon < -180.0:
+        return [
+            (min_lat, min_lon + 360.0, max_lat, 180.0),
+            (min_lat, -180.0, max_lat, max_lon),
+        ]
+    if max_lon > 180.0:
+        return [
+            (min_lat, min_lon, max_lat, 180.0),
+            (min_lat, -180.0, max_lat, max_lon - 360.0),
+        ]
+    return [(min_lat, min_lon, max_lat, max_lon)]
+
+
+def covering_geohashes(
+    min_lat: float, min_lon: float, max_lat: float, max_lon: float, precision: int
+) -> set[str]:
+    cell_lat, cell_lon = geohash_cell_size(precision)
+    # Step slightly less than a cell so no cell between the edges is skipped
+    step_lat, step_lon = cell_lat * 0.99, cell_lon * 0.99
+    geohashes = set()
+
+    lat = min_lat
+    while True:
+        lon = min_lon
+        while True:
+            geohashes.add(geohash_encode(lat, lon, precision))
+            if lon >= max_lon:
+                break
+            lon = min(lon + step_lon, max_lon)
+        if lat >= max_lat:
+            break
+        lat = min(lat + step_lat, max_lat)
+
+    return geohashes
+
+
+class GeohashIndex(Generic[KeyType]):
+    """Points bucketed by geohash, nearby lookups only scan the cells covering the circle"""
+
+    def __init__(self, precision: int = 5) -> None:
+        self.precision = precision
+        # Geohash cell -> (key, lat, lon) of the points inside it
+        self._cells: dict[str, list[tuple[KeyType, float, float]]] = defaultdict(list)
+
+    def add(self, key: KeyType, lat: float, lon: float) -> None:
+        self._cells[geohash_encode(lat, lon, self.precision)].append((key, lat, lon))
+
+    def add_many(self, points: Iterable[tuple[KeyType, float, float]]) -> None:
+        for key, lat, lon in points:
+            self.add(key, lat, lon)
+
+    def nearby(
+        self, lat: float, lon: float, radius: float, limit: int
+    ) -> list[tuple[KeyType, float]]:
+        """`(key, distance)` of points within `radius` meters, nearest first"""
+        geohashes = set()
+        for box in bounding_box(lat, lon, radius):
+            geohashes |= covering_geohashes(*box, precision=self.precision)
+
+        found = []
+        for geohash in geohashes:
+            for key, point_lat, point_lon in self._cells.get(geohash, ()):
+                distance = haversine(lat, lon, point_lat, point_lon)
+                if distance <= radius:
+                    found.append((key, distance))
+
+        found.sort(key=lambda item: item[1])
+        return found[:limit]
+
+
+def nearby_full_scan(
+    points: Iterable[tuple[KeyType, float, float]],
+    lat: float,
+    lon: float,
+    radius: float,
+    limit: int,
+) -> list[tuple[KeyType, float]]:
+    found = []
+    for key, point_lat, point_lon in points:
+        distance = haversine(lat, lon, point_lat, point_lon)
+        if distance <= radius:
+            found.append((key, distance))
+
+    found.sort(key=lambda item: item[1])
+    return found[:limit]
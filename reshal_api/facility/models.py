@@ -2,7 +2,19 @@ import uuid
 from decimal import Decimal
 from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import Column, ForeignKey, Numeric, String, Table
+from sqlalchemy import (
+    DDL,
+    Column,
+    Float,
+    ForeignKey,
+    Index,
+    Numeric,
+    String,
+    Table,
+    cast,
+    event,
+    func,
+)
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from reshal_api.database import Base
@@ -41,11 +53,14 @@ class FacilityType(Base, TimestampMixin):
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     name: Mapped[str] = mapped_column(String(length=80))
 
-    facilities: Mapped["Facility"] = relationship(back_populates="type", lazy="raise")
+    facilities: Mapped[list["Facility"]] = relationship(
+        back_populates="type", lazy="raise"
+    )
 
 
 class Facility(TimestampMixin, Base):
     __tablename__ = "facility"
+    __table_args__ = (Index("facility_created_at_id_idx", "created_at", "id"),)
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     name: Mapped[str] = mapped_column()
@@ -75,3 +90,23 @@ class Facility(TimestampMixin, Base):
 
     def is_owner(self, user_id: uuid.UUID) -> bool:
         return any(user_id == owner.id for owner in self.owners)
+
+
+def earth_location(lat, lon):
+    """Point on the earth surface as an `earthdistance` cube"""
+    return func.ll_to_earth(cast(lat, Float), cast(lon, Float))
+
+
+# GiST index for radius (`earth_box @>`) and nearest (`<->`) searches
+Index(
+    "facility_location_idx",
+    earth_location(Facility.__table__.c.lat, Facility.__table__.c.lon),
+    postgresql_using="gist",
+)
+
+for extension in ("cube", "earthdistance"):
+    event.listen(
+        Facility.__table__,
+        "before_create",
+        DDL(f"CREATE EXTENSION IF NOT EXISTS {extension}"),
+    )
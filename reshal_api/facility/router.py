@@ -1,23 +1,41 @@
 import uuid
-
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Response, status
+from datetime import datetime, timedelta, timezone
+from typing import Annotated, Optional
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    status,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from reshal_api.auth.dependencies import (
     get_admin,
     get_auth_service,
     get_owner,
-    get_user,
+    get_principal,
 )
-from reshal_api.auth.models import User, UserRole
+from reshal_api.auth.models import UserRole
+from reshal_api.auth.schemas import Principal
 from reshal_api.auth.service import AuthService
-from reshal_api.database import get_db_session
+from reshal_api.base import Pagination, get_pagination, set_next_cursor
+from reshal_api.config import get_config
+from reshal_api.database import after_commit, get_db_session, get_read_session
 from reshal_api.exceptions import BadRequest, Conflict, Forbidden, NotFound
+from reshal_api.reservation.availability import AvailabilityService
 from reshal_api.reservation.dependencies import (
     ReservationService,
+    get_availability_service,
     get_reservation_service,
 )
-from reshal_api.reservation.schemas import ReservationReadBase  # noqa: F401
+from reshal_api.reservation.schemas import (  # noqa: F401
+    ReservationReadBase,
+    TimeSlotRead,
+)
 
 from .dependencies import (
     facility_exists,
@@ -27,6 +45,8 @@ from .dependencies import (
 )
 from .models import Facility, FacilityImage  # noqa: F401
 from .schemas import (
+    AvailableFacilityRead,
+    FacilityAvailabilitySearch,
     FacilityCreate,
     FacilityOwnership,
     FacilityRead,
@@ -34,27 +54,80 @@ from .schemas import (
     FacilityTypeCreate,
     FacilityTypeRead,
     FacilityUpdate,
+    NearbyFacilityRead,
 )
 from .service import FacilityImageService, FacilityService, FacilityTypeService
 
+config = get_config()
 router = APIRouter(tags=["facility"])
 
 
 @router.get("", response_model=list[FacilityRead])
 async def get_facilities(
-    session: AsyncSession = Depends(get_db_session),
+    response: Response,
+    pagination: Pagination = Depends(get_pagination),
+    session: AsyncSession = Depends(get_read_session),
     facility_service: FacilityService = Depends(get_facility_service),
 ):
-    facilities = await facility_service.get_all(session)
+    facilities, next_cursor = await facility_service.get_page(
+        session, pagination=pagination
+    )
+    set_next_cursor(response, next_cursor)
     return facilities
 
 
+@router.post("/search/available", response_model=list[AvailableFacilityRead])
+async def search_available_facilities(
+    data: FacilityAvailabilitySearch,
+    session: AsyncSession = Depends(get_read_session),
+    facility_service: FacilityService = Depends(get_facility_service),
+    reservation_service: ReservationService = Depends(get_reservation_service),
+):
+    facilities = await facility_service.get_available(
+        session,
+        data.start_time,
+        data.end_time,
+        type_id=data.type_id,
+        bounding_box=data.bounding_box,
+        limit=data.limit,
+    )
+    return [
+        {
+            "facility": facility,
+            "price": reservation_service.calcualte_price(
+                facility.price, data.start_time, data.end_time
+            ),
+        }
+        for facility in facilities
+    ]
+
+
+@router.get("/nearby", response_model=list[NearbyFacilityRead])
+async def get_facilities_nearby(
+    lat: Annotated[float, Query(ge=-90, le=90)],
+    lon: Annotated[float, Query(ge=-180, le=180)],
+    radius: Annotated[
+        float, Query(gt=0, le=200_000, description="Radius in meters")
+    ] = 5000,
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    session: AsyncSession = Depends(get_read_session),
+    facility_service: FacilityService = Depends(get_facility_service),
+):
+    facilities = await facility_service.search_nearby(
+        session, lat, lon, radius, limit=limit
+    )
+    return [
+        {"facility": facility, "distance": distance}
+        for facility, distance in facilities
+    ]
+
+
 @router.get("/types", response_model=list[FacilityTypeRead], tags=["facility-type"])
 async def get_facility_types(
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_read_session),
     types_service: FacilityTypeService = Depends(get_facility_type_service),
 ):
-    types = await types_service.get_all(session)
+    types = await types_service.get_all_read(session)
     return types
 
 
@@ -74,6 +147,7 @@ async def create_facility_type(
         raise Conflict(detail=f"Facility type {data.name!r} already exists")
 
     facility_type = await types_service.create(session, data)
+    after_commit(session, types_service.invalidate)
     return facility_type
 
 
@@ -86,6 +160,7 @@ async def delete_facility_type(
     types_service: FacilityTypeService = Depends(get_facility_type_service),
 ):
     await types_service.delete(session, id=type_id)
+    after_commit(session, types_service.invalidate)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
@@ -94,10 +169,15 @@ async def delete_facility_type(
     "/admin", response_model=list[FacilityReadAdmin], dependencies=[Depends(get_admin)]
 )
 async def get_facilities_admin(
+    response: Response,
+    pagination: Pagination = Depends(get_pagination),
     session: AsyncSession = Depends(get_db_session),
     facility_service: FacilityService = Depends(get_facility_service),
 ):
-    facilities = await facility_service.get_all(session)
+    facilities, next_cursor = await facility_service.get_page(
+        session, pagination=pagination
+    )
+    set_next_cursor(response, next_cursor)
     return facilities
 
 
@@ -105,7 +185,7 @@ async def get_facilities_admin(
 async def get_facilities_me(
     session: AsyncSession = Depends(get_db_session),
     facility_service: FacilityService = Depends(get_facility_service),
-    user: User = Depends(get_owner),
+    user: Principal = Depends(get_owner),
 ):
     facilities = await facility_service.get_facilities_by_owner_id(session, user.id)
     return facilities
@@ -180,6 +260,44 @@ async def get_reservations_for_facility(
     return facility.reservations
 
 
+@router.get("/{facility_id}/availability", response_model=list[TimeSlotRead])
+async def get_facility_availability(
+    facility_id: str,
+    start_time: Annotated[
+        datetime, Query(alias="from", description="Datetime in `ISO 8601` format")
+    ],
+    end_time: Annotated[
+        datetime, Query(alias="to", description="Datetime in `ISO 8601` format")
+    ],
+    slot: Annotated[
+        Optional[int], Query(ge=30, le=1440, description="Slot length in minutes")
+    ] = None,
+    session: AsyncSession = Depends(get_db_session),
+    facility: Facility = Depends(facility_exists),
+    availability_service: AvailabilityService = Depends(get_availability_service),
+):
+    """Free time slots of the facility between `from` and `to`"""
+    if start_time.tzinfo is None:
+        start_time = start_time.replace(tzinfo=timezone.utc)
+    if end_time.tzinfo is None:
+        end_time = end_time.replace(tzinfo=timezone.utc)
+
+    if start_time >= end_time:
+        raise BadRequest(detail="`to` must be after `from`")
+    if end_time - start_time > timedelta(days=config.AVAILABILITY_MAX_DAYS):
+        raise BadRequest(
+            detail=f"Window must not be longer than {config.AVAILABILITY_MAX_DAYS} days"
+        )
+
+    return await availability_service.get_free_slots(
+        session,
+        facility.id,
+        start_time,
+        end_time,
+        slot=timedelta(minutes=slot) if slot else None,
+    )
+
+
 # @router.post(
 #     "/{facility_id}/images",
 #     status_code=status.HTTP_201_CREATED,
@@ -224,8 +342,18 @@ async def get_reservations_for_facility(
 @router.get("/{facility_id}", response_model=FacilityRead)
 async def get_facility_by_id(
     facility_id: str,
-    facility: Facility = Depends(facility_exists),
+    session: AsyncSession = Depends(get_read_session),
+    facility_service: FacilityService = Depends(get_facility_service),
 ):
+    try:
+        id = uuid.UUID(facility_id)
+    except ValueError:
+        # Malformed ids are unknown facilities, not validation errors
+        raise NotFound("Facility not found")
+
+    facility = await facility_service.get_read(session, id)
+    if facility is None:
+        raise NotFound("Facility not found")
     return facility
 
 
@@ -241,7 +369,7 @@ async def create_facility(
     facility_service: FacilityService = Depends(get_facility_service),
     types_service: FacilityTypeService = Depends(get_facility_type_service),
 ):
-    if not bool(await types_service.get(session, id=data.type_id)):
+    if not bool(await types_service.get_read(session, data.type_id)):
         raise BadRequest(detail="Facility type not found")
 
     facility = await facility_service.create(session, data)
@@ -256,9 +384,9 @@ async def update_facility(
     facility_service: FacilityService = Depends(get_facility_service),
     facility: Facility = Depends(facility_exists),
     types_service: FacilityTypeService = Depends(get_facility_type_service),
-    user: User = Depends(get_user),
+    user: Principal = Depends(get_principal),
 ):
-    if data.type_id and not bool(await types_service.get(session, id=data.type_id)):
+    if data.type_id and not bool(await types_service.get_read(session, data.type_id)):
         raise BadRequest(detail="Facility type not found")
 
     if user.role != UserRole.admin and not facility.is_owner(user.id):
@@ -275,6 +403,7 @@ async def update_facility(
     updated_facility = await facility_service.update(
         session, db_obj=facility, update_obj=data_dict
     )
+    after_commit(session, facility_service.invalidate)
 
     return updated_facility
 
@@ -297,6 +426,7 @@ async def delete_facility(
             session, facility_id
         ):
             await facility_service.delete(session, db_obj=facility)
+            after_commit(session, facility_service.invalidate)
         else:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
@@ -1,8 +1,9 @@
 import uuid
+from datetime import datetime, timezone
 from decimal import Decimal, InvalidOperation
 from typing import Optional
 
-from pydantic import AnyHttpUrl, Field, validator
+from pydantic import AnyHttpUrl, Field, root_validator, validator
 
 from reshal_api.auth.schemas import UserRead
 from reshal_api.base import ORJSONBaseModel
@@ -151,3 +152,54 @@ class FacilityUpdate(FacilityBase):
 class FacilityOwnership(ORJSONBaseModel):
     user_id: uuid.UUID
     facility_id: uuid.UUID
+
+
+# Availability search
+
+
+class BoundingBox(ORJSONBaseModel):
+    """`min_lon` greater than `max_lon` means the box crosses the antimeridian"""
+
+    min_lat: float
+    min_lon: float
+    max_lat: float
+    max_lon: float
+
+    _validate_lat = validator("min_lat", "max_lat", allow_reuse=True)(validate_lat)
+    _validate_lon = validator("min_lon", "max_lon", allow_reuse=True)(validate_lon)
+
+    @root_validator(skip_on_failure=True)
+    def check_lat_order(cls, values: dict) -> dict:
+        if values["min_lat"] > values["max_lat"]:
+            raise ValueError("min_lat must not be greater than max_lat")
+        return values
+
+
+class FacilityAvailabilitySearch(ORJSONBaseModel):
+    start_time: datetime
+    end_time: datetime
+    type_id: Optional[uuid.UUID]
+    bounding_box: Optional[BoundingBox]
+    limit: int = Field(100, ge=1, le=1000)
+
+    @validator("start_time", "end_time")
+    def time_to_utc(cls, v: datetime) -> datetime:
+        if v.tzinfo is None:
+            return v.replace(tzinfo=timezone.utc)
+        return v
+
+    @root_validator(skip_on_failure=True)
+    def check_end_time(cls, values: dict) -> dict:
+        if values["start_time"] >= values["end_time"]:
+            raise ValueError("End time must be after start time.")
+        return values
+
+
+class NearbyFacilityRead(ORJSONBaseModel):
+    facility: FacilityRead
+    distance: float = Field(..., description="Distance in meters")
+
+
+class AvailableFacilityRead(ORJSONBaseModel):
+    facility: FacilityRead
+    price: str = Field(..., description="Price of the facility for the whole window")
@@ -2,30 +2,51 @@ import math
 import uuid
 from datetime import datetime
 from decimal import Decimal
+from functools import partial
 from logging import getLogger
 from typing import Any, Sequence
 
 from fastapi import UploadFile
-from sqlalchemy import delete, exists, insert, select, update
+from sqlalchemy import delete, exists, insert, or_, select, update
 from sqlalchemy import func as sqla_func
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, raiseload
 
 from reshal_api.auth.models import User, UserRole
+from reshal_api.auth.service import USER_CACHE_NAMESPACE
 from reshal_api.base import BaseCRUDService
+from reshal_api.cache.service import get_cache
+from reshal_api.config import get_config
+from reshal_api.database import after_commit
+from reshal_api.reservation.models import Reservation, reservation_period
 
 from .file_manager import LocalFileManager
-from .models import Facility, FacilityImage, FacilityType, assoc_facility_owners
+from .models import (
+    Facility,
+    FacilityImage,
+    FacilityType,
+    assoc_facility_owners,
+    earth_location,
+)
 from .schemas import (
+    BoundingBox,
     FacilityCreate,
     FacilityImageCreate,
     FacilityImageUpdate,
+    FacilityRead,
     FacilityTypeCreate,
+    FacilityTypeRead,
     FacilityTypeUpdate,
     FacilityUpdate,
 )
 
 logger = getLogger(__name__)
 
+config = get_config()
+
+FACILITY_CACHE_NAMESPACE = "facility"
+FACILITY_TYPES_CACHE_NAMESPACE = "facility_types"
+
 
 class FacilityService(BaseCRUDService[Facility, FacilityCreate, FacilityUpdate]):
     def __init__(self) -> None:
@@ -48,6 +69,28 @@ class FacilityService(BaseCRUDService[Facility, FacilityCreate, FacilityUpdate])
 
         return facility
 
+    async def get_read(
+        self, session: AsyncSession, id: uuid.UUID
+    ) -> FacilityRead | None:
+        """Cached `FacilityRead` of the facility, call `invalidate` after writes"""
+
+        async def load() -> dict[str, Any] | None:
+            facility = await self.get(
+                session,
+                id=id,
+                # `owners` are not part of `FacilityRead`
+                options=[joinedload(Facility.type), raiseload(Facility.owners)],
+            )
+            return FacilityRead.from_orm(facility).dict() if facility else None
+
+        data = await get_cache().get_or_set(
+            FACILITY_CACHE_NAMESPACE, str(id), load, ttl=config.FACILITY_CACHE_TTL
+        )
+        return FacilityRead.parse_obj(data) if data else None
+
+    async def invalidate(self) -> None:
+        await get_cache().invalidate_namespace(FACILITY_CACHE_NAMESPACE)
+
     async def get_facilities_by_owner_id(
         self, session: AsyncSession, owner_id: uuid.UUID
     ) -> Sequence[Facility]:
@@ -63,6 +106,82 @@ class FacilityService(BaseCRUDService[Facility, FacilityCreate, FacilityUpdate])
         ).all()
         return facilities
 
+    async def get_available(
+        self,
+        session: AsyncSession,
+        start_time: datetime,
+        end_time: datetime,
+        *,
+        type_id: uuid.UUID | None = None,
+        bounding_box: BoundingBox | None = None,
+        limit: int = 100,
+    ) -> Sequence[Facility]:
+        """
+        Facilities without reservations overlapping `[start_time, end_time)`,
+        a single anti-join served by the reservation exclusion index
+        """
+        is_reserved = (
+            exists()
+            .where(Reservation.facility_id == Facility.id)
+            .where(
+                reservation_period(Reservation.start_time, Reservation.end_time).op(
+                    "&&"
+                )(reservation_period(start_time, end_time))
+            )
+        )
+        q = select(Facility).where(~is_reserved)
+
+        if type_id is not None:
+            q = q.where(Facility.type_id == type_id)
+
+        if bounding_box is not None:
+            q = q.where(
+                Facility.lat.between(bounding_box.min_lat, bounding_box.max_lat)
+            )
+            if bounding_box.min_lon <= bounding_box.max_lon:
+                q = q.where(
+                    Facility.lon.between(bounding_box.min_lon, bounding_box.max_lon)
+                )
+            else:
+                q = q.where(
+                    or_(
+                        Facility.lon >= bounding_box.min_lon,
+                        Facility.lon <= bounding_box.max_lon,
+                    )
+                )
+
+        facilities = (
+            await session.scalars(q.order_by(Facility.name, Facility.id).limit(limit))
+        ).all()
+        return facilities
+
+    async def search_nearby(
+        self,
+        session: AsyncSession,
+        lat: float,
+        lon: float,
+        radius: float,
+        limit: int = 20,
+    ) -> Sequence[tuple[Facility, float]]:
+        """
+        Facilities within `radius` meters with their distance, nearest first,
+        served by the `facility_location_idx` GiST index
+        """
+        origin = sqla_func.ll_to_earth(lat, lon)
+        location = earth_location(Facility.lat, Facility.lon)
+        distance = sqla_func.earth_distance(origin, location)
+
+        q = (
+            select(Facility, distance)
+            # `earth_box` is a cube slightly larger than the circle, so filter again
+            .where(sqla_func.earth_box(origin, radius).op("@>")(location))
+            .where(distance <= radius)
+            .order_by(location.op("<->")(origin))
+            .limit(limit)
+        )
+        result = await session.execute(q)
+        return result.tuples().all()
+
     async def add_owner(
         self, session: AsyncSession, facility: Facility, user: User
     ) -> None:
@@ -75,6 +194,10 @@ class FacilityService(BaseCRUDService[Facility, FacilityCreate, FacilityUpdate])
         await session.execute(
             update(User).where(User.id == user.id).values(role="owner")
         )
+        # Principals are built from the cached user, drop it so the role applies
+        after_commit(
+            session, partial(get_cache().delete, USER_CACHE_NAMESPACE, str(user.id))
+        )
 
     async def remove_owner(
         self, session: AsyncSession, facility: Facility, user: User
@@ -107,6 +230,9 @@ class FacilityService(BaseCRUDService[Facility, FacilityCreate, FacilityUpdate])
             await session.execute(
                 update(User).where(User.id == user.id).values(role=UserRole.normal)
             )
+            after_commit(
+                session, partial(get_cache().delete, USER_CACHE_NAMESPACE, str(user.id))
+            )
 
 
 class FacilityImageService(
@@ -174,6 +300,35 @@ class FacilityTypeService(
     def __init__(self) -> None:
         super().__init__(FacilityType)
 
+    async def get_all_read(self, session: AsyncSession) -> list[FacilityTypeRead]:
+        """Cached list of all facility types, call `invalidate` after writes"""
+
+        async def load() -> list[dict[str, Any]]:
+            types = await self.get_all(session)
+            return [FacilityTypeRead.from_orm(t).dict() for t in types]
+
+        data = await get_cache().get_or_set(
+            FACILITY_TYPES_CACHE_NAMESPACE,
+            "all",
+            load,
+            ttl=config.FACILITY_TYPES_CACHE_TTL,
+        )
+        return [FacilityTypeRead.parse_obj(t) for t in data]
+
+    async def get_read(
+        self, session: AsyncSession, id: uuid.UUID
+    ) -> FacilityTypeRead | None:
+        types = await self.get_all_read(session)
+        if facility_type := next((t for t in types if t.id == id), None):
+            return facility_type
+
+        # The cached list may predate a type created by another worker
+        facility_type = await self.get(session, id=id)
+        return FacilityTypeRead.from_orm(facility_type) if facility_type else None
+
+    async def invalidate(self) -> None:
+        await get_cache().invalidate_namespace(FACILITY_TYPES_CACHE_NAMESPACE)
+
     async def type_name_exists(self, session: AsyncSession, name: str) -> bool:
         # FIXME: why this is "bool | None"
         type_exists = (
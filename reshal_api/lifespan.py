@@ -1,10 +1,23 @@
+import asyncio
 import logging
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 from logging import LogRecord
 
 from fastapi import FastAPI
 
-from .database import async_engine
+from .auth.revocation import revocation_list
+from .auth.security import get_password_hasher
+from .cache.service import get_cache
+from .config import get_config
+from .database import async_engine, replica_router
+from .email.dispatcher import get_email_dispatcher
+from .email.service import get_templates_service
+from .opentelemetry import cleanup_multiprocess_metrics, setup_multiprocess_metrics
+from .ratelimit.service import get_rate_limiter
+from .scheduler.service import get_scheduler
+from .watchdog import get_loop_lag_monitor
+
+config = get_config()
 
 
 class EndpointFilter(logging.Filter):
@@ -19,5 +32,28 @@ class EndpointFilter(logging.Filter):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logging.getLogger("uvicorn.access").addFilter(EndpointFilter(path="/metrics"))
+    setup_multiprocess_metrics()
+    if config.LOOP_LAG_ENABLED:
+        get_loop_lag_monitor().start()
+    revocation_sync = asyncio.create_task(
+        revocation_list.run(config.TOKEN_REVOCATION_SYNC_INTERVAL)
+    )
+    replica_health = asyncio.create_task(replica_router.run())
+    get_templates_service().preload()
+    await get_email_dispatcher().start()
+    if config.SCHEDULER_ENABLED:
+        await get_scheduler().start()
     yield
+    await get_loop_lag_monitor().stop()
+    await get_scheduler().stop()
+    await get_email_dispatcher().stop()
+    for task in (revocation_sync, replica_health):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    get_password_hasher().shutdown()
+    await get_cache().close()
+    await get_rate_limiter().close()
+    await replica_router.dispose()
     await async_engine.dispose()
+    cleanup_multiprocess_metrics()
@@ -1,4 +1,6 @@
 # import logging
+import os
+import tempfile
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -7,10 +9,21 @@ from fastapi.staticfiles import StaticFiles
 
 from reshal_api.auth.router import router as auth_router
 from reshal_api.config import CORSSettings, UvicornSettings, get_config
+from reshal_api.database import async_engine, replica_router
 from reshal_api.facility.router import router as facility_router
 from reshal_api.lifespan import lifespan
-from reshal_api.opentelemetry import PrometheusMiddleware, metrics, setup_otlp
+from reshal_api.opentelemetry import (
+    MULTIPROC_DIR_ENV,
+    PrometheusMiddleware,
+    metrics,
+    prepare_multiprocess_dir,
+    setup_db_pool_metrics,
+    setup_otlp,
+    setup_query_metrics,
+)
 from reshal_api.payment.router import router as payment_router
+from reshal_api.profiling.middleware import ProfilingMiddleware
+from reshal_api.profiling.router import router as profiling_router
 from reshal_api.reservation.router import router as reservation_router
 
 # from reshal_api.timeframe.router import router as timeframe_router
@@ -31,8 +44,24 @@ app = FastAPI(
 
 
 if not config.ENVIRONMENT.is_testing:
-    app.add_middleware(PrometheusMiddleware, app_name=config.OTLP_APP_NAME)
+    app.add_middleware(
+        PrometheusMiddleware,
+        app_name=config.OTLP_APP_NAME,
+        query_budget=None if config.ENVIRONMENT.is_production else config.QUERY_BUDGET,
+    )
     setup_otlp(app, config.OTLP_APP_NAME, config.OTLP_GRPC_ENDPOINT)
+    setup_db_pool_metrics(async_engine, config.OTLP_APP_NAME)
+    setup_query_metrics(
+        [async_engine, *(replica.engine for replica in replica_router.replicas)],
+        config.OTLP_APP_NAME,
+    )
+
+if config.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        sample_every=config.PROFILING_SAMPLE_EVERY,
+        interval=config.PROFILING_INTERVAL,
+    )
 
 app.add_middleware(CORSMiddleware, **CORSSettings().dict())
 app.mount("/static", StaticFiles(directory=config.STATIC_DIR), name="static")
@@ -41,6 +70,7 @@ app.include_router(facility_router, prefix="/facilities")
 app.include_router(reservation_router, prefix="/reservations")
 # app.include_router(timeframe_router, prefix="/timeframes")
 app.include_router(payment_router, prefix="/payments")
+app.include_router(profiling_router, prefix="/profiles")
 
 
 app.add_route("/metrics", metrics)
@@ -55,14 +85,19 @@ def run():
     import uvicorn
     from uvicorn import config as uvicorn_config
 
+    uvicorn_settings = UvicornSettings()
+    # Workers are spawned with this environment and share their metrics through it
+    if uvicorn_settings.workers > 1 and not os.environ.get(MULTIPROC_DIR_ENV):
+        os.environ[MULTIPROC_DIR_ENV] = tempfile.mkdtemp(prefix="reshal_metrics_")
+    if os.environ.get(MULTIPROC_DIR_ENV):
+        prepare_multiprocess_dir(os.environ[MULTIPROC_DIR_ENV])
+
     log_config = uvicorn_config.LOGGING_CONFIG
     log_config["formatters"]["access"][
         "fmt"
     ] = "%(asctime)s %(levelname)s [%(name)s] [%(filename)s:%(lineno)d] [trace_id=%(otelTraceID)s span_id=%(otelSpanID)s resource.service.name=%(otelServiceName)s] - %(message)s"
 
-    uvicorn.run(
-        "reshal_api.main:app", **UvicornSettings().dict(), log_config=log_config
-    )
+    uvicorn.run("reshal_api.main:app", **uvicorn_settings.dict(), log_config=log_config)
 
 
 if __name__ == "__main__":
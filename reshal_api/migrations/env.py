@@ -10,6 +10,7 @@ from sqlalchemy.ext.asyncio import async_engine_from_config
 from reshal_api.auth.models import User  # noqa: F401
 from reshal_api.config import DatabaseSettings
 from reshal_api.database import Base
+from reshal_api.email.models import EmailOutbox  # noqa: F401
 from reshal_api.facility.models import Facility, FacilityImage  # noqa: F401
 from reshal_api.payment.models import Payment  # noqa: F401
 from reshal_api.reservation.models import Reservation  # noqa: F401
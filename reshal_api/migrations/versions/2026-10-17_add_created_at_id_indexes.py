@@ -0,0 +1,28 @@
+"""Add created_at id indexes
+
+Revision ID: 3b9c1e7d4a52
+Revises: f559f0116b31
+Create Date: 2026-10-17 10:12:31.418263
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3b9c1e7d4a52"
+down_revision = "f559f0116b31"
+branch_labels = None
+depends_on = None
+
+TABLES = ("users", "facility", "reservation", "payment")
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.create_index(
+            f"{table}_created_at_id_idx", table, ["created_at", "id"], unique=False
+        )
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.drop_index(f"{table}_created_at_id_idx", table_name=table)
@@ -0,0 +1,53 @@
+"""Add email outbox
+
+Revision ID: 5e8a1f3c7b26
+Revises: 9d4b7c2e1f30
+Create Date: 2026-10-17 20:41:09.287341
+
+"""
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "5e8a1f3c7b26"
+down_revision = "9d4b7c2e1f30"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    email_status = postgresql.ENUM("pending", "sent", "failed", name="emailstatus")
+    email_status.create(op.get_bind())
+    op.create_table(
+        "email_outbox",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("recipient", sa.String(), nullable=False),
+        sa.Column("subject", sa.String(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column(
+            "status",
+            postgresql.ENUM(name="emailstatus", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("email_outbox_pkey")),
+    )
+    op.create_index(
+        "email_outbox_due_idx",
+        "email_outbox",
+        ["next_attempt_at"],
+        unique=False,
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("email_outbox_due_idx", table_name="email_outbox")
+    op.drop_table("email_outbox")
+    postgresql.ENUM(name="emailstatus").drop(op.get_bind())
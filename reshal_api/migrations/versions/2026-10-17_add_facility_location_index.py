@@ -0,0 +1,27 @@
+"""Add facility location index
+
+Revision ID: c2a8d5f1e649
+Revises: 7e4f2a9c8d13
+Create Date: 2026-10-17 16:05:48.903117
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c2a8d5f1e649"
+down_revision = "7e4f2a9c8d13"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS cube")
+    op.execute("CREATE EXTENSION IF NOT EXISTS earthdistance")
+    op.execute(
+        "CREATE INDEX facility_location_idx ON facility "
+        "USING gist (ll_to_earth(CAST(lat AS FLOAT), CAST(lon AS FLOAT)))"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("facility_location_idx", table_name="facility")
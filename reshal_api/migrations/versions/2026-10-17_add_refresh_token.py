@@ -0,0 +1,59 @@
+"""Add refresh token
+
+Revision ID: 9d4b7c2e1f30
+Revises: c2a8d5f1e649
+Create Date: 2026-10-17 18:12:37.514290
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9d4b7c2e1f30"
+down_revision = "c2a8d5f1e649"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "refresh_token",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("session_id", sa.Uuid(), nullable=False),
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("used_at", sa.DateTime(), nullable=True),
+        sa.Column("revoked_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name=op.f("refresh_token_user_id_fkey"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("refresh_token_pkey")),
+    )
+    op.create_index(
+        op.f("refresh_token_session_id_idx"),
+        "refresh_token",
+        ["session_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("refresh_token_user_id_idx"), "refresh_token", ["user_id"], unique=False
+    )
+    op.create_index(
+        "refresh_token_revoked_at_idx",
+        "refresh_token",
+        ["revoked_at"],
+        unique=False,
+        postgresql_where=sa.text("revoked_at IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("refresh_token_revoked_at_idx", table_name="refresh_token")
+    op.drop_index(op.f("refresh_token_user_id_idx"), table_name="refresh_token")
+    op.drop_index(op.f("refresh_token_session_id_idx"), table_name="refresh_token")
+    op.drop_table("refresh_token")
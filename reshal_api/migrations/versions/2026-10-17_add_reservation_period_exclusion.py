@@ -0,0 +1,27 @@
+"""Add reservation period exclusion
+
+Revision ID: 7e4f2a9c8d13
+Revises: 3b9c1e7d4a52
+Create Date: 2026-10-17 13:40:05.227914
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "7e4f2a9c8d13"
+down_revision = "3b9c1e7d4a52"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Fails if the table already contains overlapping reservations
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute(
+        "ALTER TABLE reservation ADD CONSTRAINT reservation_period_excl "
+        "EXCLUDE USING gist (facility_id WITH =, tstzrange(start_time, end_time, '[)') WITH &&)"
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("reservation_period_excl", "reservation", type_="exclude")
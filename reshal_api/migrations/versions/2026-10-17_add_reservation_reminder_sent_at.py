@@ -0,0 +1,38 @@
+"""Add reservation reminder_sent_at
+
+Revision ID: b71c3e9a4d58
+Revises: 5e8a1f3c7b26
+Create Date: 2026-10-17 21:12:47.530218
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b71c3e9a4d58"
+down_revision = "5e8a1f3c7b26"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "reservation",
+        sa.Column("reminder_sent_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    # Reservations that already started never get a reminder
+    op.execute(
+        "UPDATE reservation SET reminder_sent_at = now() WHERE start_time <= now()"
+    )
+    op.create_index(
+        "reservation_reminder_due_idx",
+        "reservation",
+        ["start_time"],
+        unique=False,
+        postgresql_where=sa.text("reminder_sent_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("reservation_reminder_due_idx", table_name="reservation")
+    op.drop_column("reservation", "reminder_sent_at")
@@ -1,4 +1,17 @@
+import asyncio
+import glob
+import hashlib
+import logging
+import os
+import re
 import time
+from collections import Counter as CounterDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from re import Pattern
+from typing import Iterator, Sequence
 
 from fastapi import FastAPI, status
 from opentelemetry import trace
@@ -8,25 +21,91 @@ from opentelemetry.instrumentation.logging import LoggingInstrumentor
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
 from prometheus_client.openmetrics.exposition import (
     CONTENT_TYPE_LATEST,
     generate_latest,
 )
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
+from prometheus_client.registry import Collector
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import QueuePool
 from starlette.requests import Request
 from starlette.responses import Response
-from starlette.routing import Match
-from starlette.types import ASGIApp
+from starlette.routing import BaseRoute, Mount, WebSocketRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from .config import get_config
 
+logger = logging.getLogger(__name__)
+
 config = get_config()
 
+# Path regex, template and allowed methods, `None` for any
+RouteEntry = tuple[Pattern[str], str, set[str] | None]
+
+
+# Set before `prometheus_client` is imported, workers then write metrics to
+# mmap files in this directory and every scrape aggregates all of them
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+
+def multiprocess_dir() -> str | None:
+    return os.environ.get(MULTIPROC_DIR_ENV) or None
+
+
+def prepare_multiprocess_dir(path: str) -> None:
+    """Start from an empty directory, files of a previous run would be counted"""
+    os.makedirs(path, exist_ok=True)
+    for file in glob.glob(os.path.join(path, "*.db")):
+        os.remove(file)
+
+
+def pid_exists(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def cleanup_dead_workers(path: str) -> None:
+    """Drop live gauges of workers that exited without running their shutdown"""
+    for file in glob.glob(os.path.join(path, "gauge_live*_*.db")):
+        pid = int(os.path.basename(file).rsplit("_", 1)[1].removesuffix(".db"))
+        if not pid_exists(pid):
+            multiprocess.mark_process_dead(pid, path)
+
+
+def setup_multiprocess_metrics() -> None:
+    path = multiprocess_dir()
+    if path is not None:
+        cleanup_dead_workers(path)
+
+
+def cleanup_multiprocess_metrics() -> None:
+    path = multiprocess_dir()
+    if path is not None:
+        multiprocess.mark_process_dead(os.getpid(), path)
+
 
 def metrics(request: Request) -> Response:
+    registry = REGISTRY
+    if multiprocess_dir() is not None:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
     return Response(
-        generate_latest(REGISTRY), headers={"Content-Type": CONTENT_TYPE_LATEST}
+        generate_latest(registry), headers={"Content-Type": CONTENT_TYPE_LATEST}
     )
 
 
@@ -46,7 +125,9 @@ def setup_otlp(
     FastAPIInstrumentor.instrument_app(app, tracer_provider=tracer)
 
 
-INFO = Gauge("app", "App information", ["app_name"])
+# Gauge modes only apply in multiprocess mode, "live" ones drop exited workers
+
+INFO = Gauge("app", "App information", ["app_name"], multiprocess_mode="livemax")
 
 REQUESTS = Counter(
     "fastapi_requests_total",
@@ -76,71 +157,458 @@ REQUESTS_IN_PROGRESS = Gauge(
     "fastapi_requests_in_progress",
     "Gauge of requests by method and path currently being processed",
     ["method", "path", "app_name"],
+    multiprocess_mode="livesum",
+)
+
+CACHE_HITS = Counter(
+    "cache_hits_total",
+    "Total count of cache hits by cache name",
+    ["cache", "app_name"],
+)
+
+CACHE_MISSES = Counter(
+    "cache_misses_total",
+    "Total count of cache misses by cache name",
+    ["cache", "app_name"],
+)
+
+DB_POOL_WAIT_TIME = Histogram(
+    "db_pool_wait_duration_seconds",
+    "Histogram of time spent waiting for a database connection from the pool (in seconds)",
+    ["app_name"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth",
+    "Gauge of password hash jobs running or waiting for a worker",
+    ["app_name"],
+    multiprocess_mode="livesum",
+)
+
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "Total count of password hash jobs rejected because the queue was full",
+    ["app_name"],
+)
+
+RATE_LIMITED = Counter(
+    "rate_limited_total",
+    "Total count of requests rejected by a rate limit by scope",
+    ["scope", "app_name"],
+)
+
+EMAILS_SENT = Counter(
+    "emails_sent_total",
+    "Total count of email delivery attempts by status",
+    ["status", "app_name"],
+)
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Histogram of event loop scheduling delay (in seconds)",
+    ["app_name"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+DB_STATEMENT_DURATION = Histogram(
+    "db_statement_duration_seconds",
+    "Histogram of SQL statement execution time by normalized statement (in seconds)",
+    ["statement", "app_name"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+
+DB_REQUEST_STATEMENTS = Histogram(
+    "db_request_statements",
+    "Histogram of SQL statements executed per request by method and path",
+    ["method", "path", "app_name"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
 )
 
+DB_REQUEST_DURATION = Histogram(
+    "db_request_duration_seconds",
+    "Histogram of time spent in SQL statements per request by path (in seconds)",
+    ["method", "path", "app_name"],
+)
 
-class PrometheusMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app: ASGIApp, app_name: str) -> None:
-        super().__init__(app)
+
+class DatabasePoolCollector(Collector):
+    """Exports the state of the engine connection pool at scrape time"""
+
+    def __init__(self, engine: AsyncEngine, app_name: str) -> None:
+        self.engine = engine
         self.app_name = app_name
 
-    @staticmethod
-    def get_path(request: Request) -> tuple[str, bool]:
-        for route in request.app.routes:
-            match, child_scope = route.matches(request.scope)
-            if match == Match.FULL:
-                return route.path, True
-        return request.url.path, False
+    def samples(self) -> list[tuple[str, str, int]]:
+        pool = self.engine.pool
+        if not isinstance(pool, QueuePool):
+            return []
 
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
-        method = request.method
-        path, is_handled_path = self.get_path(request)
+        return [
+            ("db_pool_size", "Configured size of the connection pool", pool.size()),
+            (
+                "db_pool_checked_out_connections",
+                "Connections currently checked out from the pool",
+                pool.checkedout(),
+            ),
+            (
+                "db_pool_idle_connections",
+                "Connections currently idle in the pool",
+                pool.checkedin(),
+            ),
+            (
+                "db_pool_overflow_connections",
+                "Connections currently open beyond the pool size",
+                # `overflow()` starts at `-pool_size` until the pool is filled
+                max(pool.overflow(), 0),
+            ),
+        ]
 
-        if not is_handled_path:
-            return await call_next(request)
+    def collect(self):
+        for name, documentation, value in self.samples():
+            gauge = GaugeMetricFamily(name, documentation, labels=["app_name"])
+            gauge.add_metric([self.app_name], value)
+            yield gauge
 
-        REQUESTS_IN_PROGRESS.labels(
-            method=method, path=path, app_name=self.app_name
-        ).inc()
-        REQUESTS.labels(method=method, path=path, app_name=self.app_name).inc()
 
-        start_time = time.perf_counter()
+def setup_db_pool_metrics(engine: AsyncEngine, app_name: str) -> None:
+    collector = DatabasePoolCollector(engine, app_name)
+    if multiprocess_dir() is None:
+        REGISTRY.register(collector)
+        return
 
-        # Default status code
-        # It is possible that in finally block `status_code` could be unbound
-        status_code = status.HTTP_418_IM_A_TEAPOT
+    # Collectors only see the worker that was scraped, publish summed live gauges
+    # updated on every checkout and checkin instead
+    gauges = {
+        name: Gauge(
+            name,
+            documentation,
+            ["app_name"],
+            multiprocess_mode="livesum",
+            registry=None,
+        ).labels(app_name=app_name)
+        for name, documentation, _ in collector.samples()
+    }
 
-        try:
-            response = await call_next(request)
-        except BaseException as e:
-            status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
-            EXCEPTIONS.labels(
-                method=method,
-                path=path,
-                exception_type=type(e).__name__,
-                app_name=self.app_name,
-            ).inc()
-            raise e from None
-        else:
-            status_code = response.status_code
-            end_time = time.perf_counter()
-            span = trace.get_current_span()
-            trace_id = trace.format_trace_id(span.get_span_context().trace_id)
-
-            REQUESTS_PROCESSING_TIME.labels(
-                method=method, path=path, app_name=self.app_name
-            ).observe(end_time - start_time, exemplar={"TraceID": trace_id})
-        finally:
-            RESPONSES.labels(
-                method=method,
-                path=path,
+    def update_gauges(*args) -> None:
+        for name, _, value in collector.samples():
+            gauges[name].set(value)
+
+    event.listen(engine.sync_engine.pool, "checkout", update_gauges)
+    event.listen(engine.sync_engine.pool, "checkin", update_gauges)
+    update_gauges()
+
+
+# Bind parameters of asyncpg and psycopg2, expanded IN lists and multi-row VALUES
+PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s")
+PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+VALUES_LIST = re.compile(r"(\(\?\))(?:\s*,\s*\(\?\))+")
+STATEMENT_TABLE = re.compile(r"\b(?:FROM|INTO|UPDATE)\s+([\w.\"]+)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=2048)
+def normalize_statement(statement: str) -> str:
+    statement = PLACEHOLDER.sub("?", statement)
+    statement = PLACEHOLDER_LIST.sub("(?)", statement)
+    statement = VALUES_LIST.sub(r"\1", statement)
+    return " ".join(statement.split())
+
+
+@lru_cache(maxsize=2048)
+def statement_label(statement: str) -> str:
+    """`SELECT facility 1a2b3c4d`, readable and with a bounded number of values"""
+    normalized = normalize_statement(statement)
+    operation = normalized.split(" ", 1)[0].upper()
+    match = STATEMENT_TABLE.search(normalized)
+    table = match.group(1).replace('"', "") if match else "-"
+    digest = hashlib.sha1(normalized.encode()).hexdigest()[:8]
+    label = f"{operation} {table} {digest}"
+    logger.debug(f"SQL statement {label}: {normalized}")
+    return label
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0
+    statements: CounterDict[str] = field(default_factory=CounterDict)
+
+    def record(self, label: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.statements[label] += 1
+
+
+# Trace id of the request each task is serving, read by the loop lag watchdog thread
+REQUEST_TRACE_IDS: dict[asyncio.Task, str] = {}
+
+QUERY_STATS: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Statements executed inside the block, tasks started in it included"""
+    stats = QueryStats()
+    token = QUERY_STATS.set(stats)
+    try:
+        yield stats
+    finally:
+        QUERY_STATS.reset(token)
+
+
+class QueryMetrics:
+    """Times every statement of an engine by normalized statement and per request"""
+
+    START_TIMES = "query_start_times"
+
+    def __init__(self, app_name: str) -> None:
+        self.app_name = app_name
+        self._durations: dict[str, Histogram] = {}
+
+    def install(self, engine: AsyncEngine) -> None:
+        event.listen(
+            engine.sync_engine, "before_cursor_execute", self.before_cursor_execute
+        )
+        event.listen(
+            engine.sync_engine, "after_cursor_execute", self.after_cursor_execute
+        )
+        event.listen(engine.sync_engine, "handle_error", self.handle_error)
+
+    def remove(self, engine: AsyncEngine) -> None:
+        event.remove(
+            engine.sync_engine, "before_cursor_execute", self.before_cursor_execute
+        )
+        event.remove(
+            engine.sync_engine, "after_cursor_execute", self.after_cursor_execute
+        )
+        event.remove(engine.sync_engine, "handle_error", self.handle_error)
+
+    def before_cursor_execute(self, conn, cursor, statement, *args) -> None:
+        conn.info.setdefault(self.START_TIMES, []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, *args) -> None:
+        duration = time.perf_counter() - conn.info[self.START_TIMES].pop()
+        label = statement_label(statement)
+
+        child = self._durations.get(label)
+        if child is None:
+            child = self._durations[label] = DB_STATEMENT_DURATION.labels(
+                statement=label, app_name=self.app_name
+            )
+        child.observe(duration)
+
+        stats = QUERY_STATS.get()
+        if stats is not None:
+            stats.record(label, duration)
+
+    def handle_error(self, context) -> None:
+        # `after_cursor_execute` is skipped for failed statements
+        if context.connection is not None and context.cursor is not None:
+            start_times = context.connection.info.get(self.START_TIMES)
+            if start_times:
+                start_times.pop()
+
+
+def setup_query_metrics(engines: Sequence[AsyncEngine], app_name: str) -> None:
+    query_metrics = QueryMetrics(app_name)
+    for engine in engines:
+        query_metrics.install(engine)
+
+
+def first_segment(path: str) -> str:
+    return path.lstrip("/").split("/", 1)[0]
+
+
+class RouteTemplates:
+    """
+    Route template for a request path, matched the way the router does.
+
+    Routes are grouped by their first path segment so a request is only
+    matched against routes that could take it, in router order. Routes without
+    path parameters are remembered per method and path.
+    """
+
+    def __init__(self, routes: Sequence[BaseRoute]) -> None:
+        entries: list[tuple[str | None, RouteEntry]] = []
+        for route in routes:
+            if isinstance(route, WebSocketRoute) or not hasattr(route, "path_regex"):
+                continue
+            path: str = getattr(route, "path")
+            segment: str | None = first_segment(path)
+            # Parametrized first segments and root mounts can match any path
+            if "{" in segment or (isinstance(route, Mount) and not segment):
+                segment = None
+            entries.append(
+                (segment, (route.path_regex, path, getattr(route, "methods", None)))
+            )
+
+        self._wildcard = [entry for segment, entry in entries if segment is None]
+        self._buckets = {
+            segment: [entry for other, entry in entries if other in (segment, None)]
+            for segment, _ in entries
+            if segment is not None
+        }
+        self._static: dict[tuple[str, str], str] = {}
+
+    def lookup(self, method: str, path: str) -> str | None:
+        template = self._static.get((method, path))
+        if template is not None:
+            return template
+
+        for regex, template, methods in self._buckets.get(
+            first_segment(path), self._wildcard
+        ):
+            if regex.match(path) is None:
+                continue
+            if methods is not None and method not in methods:
+                continue
+            if regex.groups == 0:
+                self._static[(method, path)] = template
+            return template
+        return None
+
+
+class RouteMetrics:
+    """Label children of one method and route, resolved once instead of per request"""
+
+    __slots__ = (
+        "method",
+        "path",
+        "app_name",
+        "requests",
+        "in_progress",
+        "duration",
+        "db_statements",
+        "db_duration",
+        "_responses",
+    )
+
+    def __init__(self, method: str, path: str, app_name: str) -> None:
+        self.method = method
+        self.path = path
+        self.app_name = app_name
+        self.requests = REQUESTS.labels(method=method, path=path, app_name=app_name)
+        self.in_progress = REQUESTS_IN_PROGRESS.labels(
+            method=method, path=path, app_name=app_name
+        )
+        self.duration = REQUESTS_PROCESSING_TIME.labels(
+            method=method, path=path, app_name=app_name
+        )
+        self.db_statements = DB_REQUEST_STATEMENTS.labels(
+            method=method, path=path, app_name=app_name
+        )
+        self.db_duration = DB_REQUEST_DURATION.labels(
+            method=method, path=path, app_name=app_name
+        )
+        self._responses: dict[int, Counter] = {}
+
+    def responses(self, status_code: int) -> Counter:
+        child = self._responses.get(status_code)
+        if child is None:
+            child = self._responses[status_code] = RESPONSES.labels(
+                method=self.method,
+                path=self.path,
                 status_code=status_code,
                 app_name=self.app_name,
-            ).inc()
-            REQUESTS_IN_PROGRESS.labels(
-                method=method, path=path, app_name=self.app_name
-            ).dec()
+            )
+        return child
+
+
+class PrometheusMiddleware:
+    """
+    Raw ASGI middleware, responses stream straight through without the extra
+    task and memory stream of `BaseHTTPMiddleware`.
+    """
+
+    def __init__(
+        self, app: ASGIApp, app_name: str, query_budget: int | None = None
+    ) -> None:
+        self.app = app
+        self.app_name = app_name
+        # SQL statements per request before a warning is logged, `None` disables it
+        self.query_budget = query_budget
+        # Built on the first request, routes are added after the middleware
+        self.routes: RouteTemplates | None = None
+        self._metrics: dict[tuple[str, str], RouteMetrics] = {}
+
+    def get_metrics(self, method: str, path: str) -> RouteMetrics:
+        route_metrics = self._metrics.get((method, path))
+        if route_metrics is None:
+            route_metrics = self._metrics[(method, path)] = RouteMetrics(
+                method, path, self.app_name
+            )
+        return route_metrics
+
+    def record_queries(self, route_metrics: RouteMetrics, stats: QueryStats) -> None:
+        route_metrics.db_statements.observe(stats.count)
+        route_metrics.db_duration.observe(stats.duration)
+
+        span = trace.get_current_span()
+        span.set_attribute("db.statement_count", stats.count)
+        span.set_attribute("db.duration_ms", stats.duration * 1000)
+
+        if self.query_budget is not None and stats.count > self.query_budget:
+            span.set_attribute("db.query_budget_exceeded", True)
+            # Repeated statements usually mean a relationship loaded per row
+            logger.warning(
+                f"{route_metrics.method} {route_metrics.path} ran {stats.count} "
+                f"SQL statements, over the budget of {self.query_budget}, "
+                f"most repeated: {stats.statements.most_common(3)}"
+            )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if self.routes is None:
+            self.routes = RouteTemplates(scope["app"].routes)
+        method = scope["method"]
+        path = self.routes.lookup(method, scope["path"])
+        if path is None:
+            await self.app(scope, receive, send)
+            return
 
-        return response
+        route_metrics = self.get_metrics(method, path)
+        route_metrics.in_progress.inc()
+        route_metrics.requests.inc()
+
+        # Default status code, the app may fail before starting a response
+        status_code = status.HTTP_418_IM_A_TEAPOT
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        span = trace.get_current_span()
+        trace_id = trace.format_trace_id(span.get_span_context().trace_id)
+        task = asyncio.current_task()
+        if task is not None:
+            REQUEST_TRACE_IDS[task] = trace_id
+
+        start_time = time.perf_counter()
+        with track_queries() as query_stats:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            except BaseException as e:
+                status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+                EXCEPTIONS.labels(
+                    method=method,
+                    path=path,
+                    exception_type=type(e).__name__,
+                    app_name=self.app_name,
+                ).inc()
+                raise e from None
+            else:
+                end_time = time.perf_counter()
+                route_metrics.duration.observe(
+                    end_time - start_time, exemplar={"TraceID": trace_id}
+                )
+            finally:
+                if task is not None:
+                    REQUEST_TRACE_IDS.pop(task, None)
+                self.record_queries(route_metrics, query_stats)
+                route_metrics.responses(status_code).inc()
+                route_metrics.in_progress.dec()
@@ -3,7 +3,7 @@ from decimal import Decimal
 from enum import Enum
 from typing import Optional
 
-from sqlalchemy import ForeignKey, Numeric
+from sqlalchemy import ForeignKey, Index, Numeric
 from sqlalchemy.orm import Mapped, mapped_column
 
 from reshal_api.database import Base
@@ -19,6 +19,7 @@ class PaymentStatus(Enum):
 
 class Payment(Base, TimestampMixin):
     __tablename__ = "payment"
+    __table_args__ = (Index("payment_created_at_id_idx", "created_at", "id"),)
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     reservation_id: Mapped[Optional[uuid.UUID]] = mapped_column(
@@ -1,8 +1,16 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from reshal_api.auth.dependencies import get_admin, get_db_session, get_user
-from reshal_api.auth.models import User, UserRole
+from reshal_api.auth.dependencies import get_admin, get_db_session, get_principal
+from reshal_api.auth.models import UserRole
+from reshal_api.auth.schemas import Principal
+from reshal_api.base import (
+    ExportFormat,
+    Pagination,
+    export_response,
+    get_pagination,
+    set_next_cursor,
+)
 from reshal_api.exceptions import Forbidden, NotFound
 from reshal_api.reservation.dependencies import get_reservation_service
 from reshal_api.reservation.service import ReservationService
@@ -17,19 +25,34 @@ router = APIRouter(tags=["payment"])
 
 @router.get("", response_model=list[PaymentRead], dependencies=[Depends(get_admin)])
 async def get_payments(
+    response: Response,
+    pagination: Pagination = Depends(get_pagination),
     session: AsyncSession = Depends(get_db_session),
     payment_service: PaymentService = Depends(get_payment_service),
 ):
-    payments = await payment_service.get_all(session)
+    payments, next_cursor = await payment_service.get_page(
+        session, pagination=pagination
+    )
+    set_next_cursor(response, next_cursor)
     return payments
 
 
+@router.get("/export", dependencies=[Depends(get_admin)])
+async def export_payments(
+    format: ExportFormat = ExportFormat.ndjson,
+    session: AsyncSession = Depends(get_db_session),
+    payment_service: PaymentService = Depends(get_payment_service),
+):
+    payments = payment_service.stream(session)
+    return export_response(payments, PaymentRead, format)
+
+
 @router.get("/{payment_id}", response_model=PaymentRead)
 async def get_payment_by_id(
     payment_id: str,
     session: AsyncSession = Depends(get_db_session),
     payment: Payment = Depends(valid_payment),
-    user: User = Depends(get_user),
+    user: Principal = Depends(get_principal),
     reservation_service: ReservationService = Depends(get_reservation_service),
 ):
     reservation = await reservation_service.get(session, id=payment.reservation_id)
@@ -0,0 +1,94 @@
+import itertools
+import sys
+import time
+from functools import lru_cache
+
+from fastapi.security.utils import get_authorization_scheme_param
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from reshal_api.auth.exceptions import InvalidToken
+from reshal_api.auth.jwt import decode_token
+from reshal_api.auth.models import UserRole
+from reshal_api.config import get_config
+
+from .sampler import Profile, ProfileStore, StackSampler
+
+config = get_config()
+
+PROFILE_HEADER = "x-profile"
+
+
+@lru_cache(maxsize=1)
+def get_profile_store() -> ProfileStore:
+    return ProfileStore(config.PROFILING_MAX_PROFILES)
+
+
+def is_admin_request(scope: Scope) -> bool:
+    connection = HTTPConnection(scope)
+    authorization = connection.headers.get("authorization") or connection.cookies.get(
+        config.ACCESS_TOKEN_COOKIE_NAME
+    )
+    _, token = get_authorization_scheme_param(authorization)
+    if not token:
+        return False
+    try:
+        return decode_token(token).role == UserRole.admin
+    except InvalidToken:
+        return False
+
+
+class ProfilingMiddleware:
+    """
+    Profiles 1 in `sample_every` requests, and requests sent by an admin with
+    an `X-Profile` header. Covers dependencies, the handler and serialization.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_every: int,
+        interval: float,
+        store: ProfileStore | None = None,
+    ) -> None:
+        self.app = app
+        self.sample_every = sample_every
+        self.sampler = StackSampler(interval)
+        self.store = store if store is not None else get_profile_store()
+        self._requests = itertools.count(1)
+
+    def should_profile(self, scope: Scope) -> bool:
+        if self.sample_every and next(self._requests) % self.sample_every == 0:
+            return True
+        headers = dict(scope["headers"])
+        return PROFILE_HEADER.encode() in headers and is_admin_request(scope)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(
+            scope["method"],
+            scope["path"],
+            self.sampler.interval,
+            root=sys._getframe(),
+        )
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-profile-id", profile.id.encode()),
+                ]
+            await send(message)
+
+        start_time = time.perf_counter()
+        self.sampler.start(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.sampler.stop(profile)
+            profile.duration = time.perf_counter() - start_time
+            self.store.add(profile)
@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import ORJSONResponse, PlainTextResponse, Response
+
+from reshal_api.auth.dependencies import get_admin
+from reshal_api.exceptions import NotFound
+
+from .middleware import get_profile_store
+from .schemas import ProfileFormat, ProfileRead
+
+router = APIRouter(tags=["profiling"], dependencies=[Depends(get_admin)])
+
+
+@router.get("", response_model=list[ProfileRead])
+async def get_profiles():
+    """Profiles kept by the worker that serves the request, newest first"""
+    # FastAPI would serialize the dataclasses with `asdict`, skipping `samples`
+    return [ProfileRead.from_orm(profile) for profile in get_profile_store().list()]
+
+
+@router.get("/{profile_id}")
+async def get_profile(
+    profile_id: str, format: ProfileFormat = ProfileFormat.speedscope
+) -> Response:
+    profile = get_profile_store().get(profile_id)
+    if profile is None:
+        raise NotFound("Profile not found")
+
+    if format == ProfileFormat.collapsed:
+        return PlainTextResponse(profile.collapsed())
+    return ORJSONResponse(
+        profile.speedscope(),
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="{profile.id}.speedscope.json"'
+            )
+        },
+    )
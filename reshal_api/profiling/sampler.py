@@ -0,0 +1,173 @@
+"""
+Statistical profiler for single requests
+
+A background thread samples the event loop thread's stack. Requests share the
+loop, so a sample only counts for a profile when the stack runs through that
+request's middleware frame, other tasks running meanwhile are left out.
+Code offloaded to worker threads is not sampled.
+"""
+
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import FrameType
+from typing import Any
+
+# Function, file and first line of a code object
+FrameKey = tuple[str, str, int]
+Stack = tuple[FrameKey, ...]
+
+
+@dataclass(eq=False)
+class Profile:
+    method: str
+    path: str
+    interval: float
+    # Frame of the request in the middleware, samples are taken above it
+    root: FrameType | None = field(default=None, repr=False)
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    started_at: datetime = field(default_factory=datetime.utcnow)
+    duration: float = 0
+    status_code: int | None = None
+    stacks: Counter[Stack] = field(default_factory=Counter)
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed stacks, one `frame;frame;frame count` per line"""
+        return "\n".join(
+            ";".join(f"{name} ({file}:{line})" for name, file, line in stack)
+            + f" {count}"
+            for stack, count in self.stacks.most_common()
+        )
+
+    def speedscope(self) -> dict[str, Any]:
+        """Sampled profile in the speedscope file format, weights in seconds"""
+        frames: dict[FrameKey, int] = {}
+        samples = []
+        weights = []
+        for stack, count in self.stacks.items():
+            samples.append([frames.setdefault(key, len(frames)) for key in stack])
+            weights.append(count * self.interval)
+
+        name = f"{self.method} {self.path}"
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "reshal-api",
+            "activeProfileIndex": 0,
+            "shared": {
+                "frames": [
+                    {"name": function, "file": file, "line": line}
+                    for function, file, line in frames
+                ]
+            },
+            "profiles": [
+                {
+                    "type": "sampled",
+                    "name": name,
+                    "unit": "seconds",
+                    "startValue": 0,
+                    "endValue": sum(weights),
+                    "samples": samples,
+                    "weights": weights,
+                }
+            ],
+        }
+
+
+def frame_key(frame: FrameType) -> FrameKey:
+    code = frame.f_code
+    return code.co_name, code.co_filename, code.co_firstlineno
+
+
+class StackSampler:
+    """One sampling thread per process, running while any profile is active"""
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._active: set[Profile] = set()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._target_thread_id: int | None = None
+
+    def start(self, profile: Profile) -> None:
+        with self._lock:
+            self._active.add(profile)
+            self._target_thread_id = threading.get_ident()
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="profiler", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self, profile: Profile) -> None:
+        """No sample is added to the profile once this returns"""
+        with self._lock:
+            self._active.discard(profile)
+        profile.root = None
+
+    def sample(self, frame: FrameType, profiles: list[Profile]) -> None:
+        stack: list[FrameType] = []
+        current: FrameType | None = frame
+        while current is not None:
+            stack.append(current)
+            current = current.f_back
+
+        matches: list[tuple[Profile, Stack]] = []
+        for profile in profiles:
+            for depth, stack_frame in enumerate(stack):
+                if stack_frame is profile.root:
+                    # Root first, frames below the middleware are the event loop
+                    keys = tuple(frame_key(f) for f in reversed(stack[: depth + 1]))
+                    matches.append((profile, keys))
+                    break
+
+        # Stopped profiles are being read by the profiles endpoint
+        with self._lock:
+            for profile, keys in matches:
+                if profile in self._active:
+                    profile.stacks[keys] += 1
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._thread = None
+                    return
+                profiles = list(self._active)
+                thread_id = self._target_thread_id
+
+            frame = sys._current_frames().get(thread_id)  # type: ignore[arg-type]
+            if frame is not None:
+                self.sample(frame, profiles)
+            del frame
+            time.sleep(self.interval)
+
+
+class ProfileStore:
+    """Last `maxlen` profiles of this worker, oldest dropped first"""
+
+    def __init__(self, maxlen: int) -> None:
+        self._profiles: deque[Profile] = deque(maxlen=maxlen)
+
+    def add(self, profile: Profile) -> None:
+        self._profiles.append(profile)
+
+    def get(self, profile_id: str) -> Profile | None:
+        for profile in self._profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def list(self) -> list[Profile]:
+        return list(reversed(self._profiles))
+
+    def clear(self) -> None:
+        self._profiles.clear()
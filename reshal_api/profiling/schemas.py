@@ -0,0 +1,23 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+
+from reshal_api.base import ORJSONBaseModel
+
+
+class ProfileFormat(str, Enum):
+    speedscope = "speedscope"
+    collapsed = "collapsed"
+
+
+class ProfileRead(ORJSONBaseModel):
+    id: str
+    method: str
+    path: str
+    started_at: datetime
+    duration: float
+    status_code: Optional[int]
+    samples: int
+
+    class Config:
+        orm_mode = True
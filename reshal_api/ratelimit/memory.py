@@ -0,0 +1,36 @@
+"""
+In-process rate limit storage, limits apply per worker
+"""
+
+import time
+
+from reshal_api.cache.memory import TTLCache
+
+
+class MemoryBackend:
+    """Token bucket per key, `limit` tokens refilled evenly over `window` seconds"""
+
+    def __init__(self, maxsize: int) -> None:
+        # Key -> (tokens left, last update), a bucket untouched for `window` is full
+        self._buckets: TTLCache[str, tuple[float, float]] = TTLCache(
+            maxsize=maxsize, ttl=0
+        )
+
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        now = time.monotonic()
+        rate = limit / window
+        tokens, updated_at = self._buckets.get(key) or (float(limit), now)
+        tokens = min(float(limit), tokens + (now - updated_at) * rate)
+
+        if tokens < 1:
+            self._buckets.set(key, (tokens, now), ttl=window)
+            return (1 - tokens) / rate
+
+        self._buckets.set(key, (tokens - 1, now), ttl=window)
+        return 0.0
+
+    async def close(self) -> None:
+        ...
+
+    def clear(self) -> None:
+        self._buckets.clear()
@@ -0,0 +1,38 @@
+import time
+
+from redis.asyncio import Redis
+
+
+class RedisBackend:
+    """
+    Sliding window counter shared by all workers.
+
+    Approximates the window from the current and previous fixed window counts,
+    two keys per client instead of a log of every request.
+    """
+
+    def __init__(self, client: Redis) -> None:
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisBackend":
+        return cls(Redis.from_url(url))
+
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        now = time.time()
+        current_window = int(now // window)
+        elapsed = (now % window) / window
+        current_key = f"{key}:{current_window}"
+
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.incr(current_key)
+            pipe.pexpire(current_key, int(window * 2000))
+            pipe.get(f"{key}:{current_window - 1}")
+            count, _, previous_count = await pipe.execute()
+
+        if int(previous_count or 0) * (1 - elapsed) + count > limit:
+            return window * (1 - elapsed)
+        return 0.0
+
+    async def close(self) -> None:
+        await self.client.aclose()
@@ -0,0 +1,54 @@
+import math
+from functools import lru_cache
+from typing import Protocol
+
+from reshal_api.config import RateLimitSettings, get_config
+from reshal_api.exceptions import TooManyRequests
+from reshal_api.opentelemetry import RATE_LIMITED
+
+from .memory import MemoryBackend
+
+config = get_config()
+
+
+class RateLimitBackend(Protocol):
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        """Count a request, return seconds until the next one is allowed or 0"""
+        ...
+
+    async def close(self) -> None:
+        ...
+
+
+class RateLimiter:
+    def __init__(self, backend: RateLimitBackend, prefix: str) -> None:
+        self.backend = backend
+        self.prefix = prefix
+
+    async def hit(self, scope: str, key: str, limit: int, window: float) -> None:
+        """Raise `TooManyRequests` once `key` exceeds `limit` requests per `window`"""
+        retry_after = await self.backend.hit(
+            f"{self.prefix}:{scope}:{key}", limit, window
+        )
+        if retry_after > 0:
+            RATE_LIMITED.labels(scope=scope, app_name=config.OTLP_APP_NAME).inc()
+            raise TooManyRequests(retry_after=math.ceil(retry_after))
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+
+def create_backend(settings: RateLimitSettings) -> RateLimitBackend:
+    if settings.BACKEND == "redis":
+        # Optional dependency, only needed with the redis backend
+        from .redis_backend import RedisBackend
+
+        return RedisBackend.from_url(settings.REDIS_URL)
+
+    return MemoryBackend(maxsize=settings.MEMORY_MAXSIZE)
+
+
+@lru_cache(maxsize=1)
+def get_rate_limiter() -> RateLimiter:
+    settings = RateLimitSettings()
+    return RateLimiter(create_backend(settings), prefix=settings.PREFIX)
@@ -0,0 +1,192 @@
+"""
+Free slot computation for a facility,
+busy periods come from a single range query and are merged in memory
+"""
+
+import time
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from itertools import chain
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from reshal_api.config import get_config
+
+from .service import ReservationService
+
+config = get_config()
+
+
+class TimeSlot(NamedTuple):
+    start_time: datetime
+    end_time: datetime
+
+
+def merge_intervals(intervals: Iterable[TimeSlot]) -> list[TimeSlot]:
+    """Merge overlapping and touching intervals"""
+    merged: list[TimeSlot] = []
+    for interval in sorted(intervals):
+        if merged and interval.start_time <= merged[-1].end_time:
+            if interval.end_time > merged[-1].end_time:
+                merged[-1] = TimeSlot(merged[-1].start_time, interval.end_time)
+        else:
+            merged.append(interval)
+    return merged
+
+
+def free_intervals(
+    busy: Iterable[TimeSlot], start_time: datetime, end_time: datetime
+) -> list[TimeSlot]:
+    """Gaps between busy intervals within `[start_time, end_time)`"""
+    free: list[TimeSlot] = []
+    cursor = start_time
+    for interval in merge_intervals(busy):
+        if interval.end_time <= cursor:
+            continue
+        if interval.start_time >= end_time:
+            break
+        if interval.start_time > cursor:
+            free.append(TimeSlot(cursor, interval.start_time))
+        cursor = interval.end_time
+
+    if cursor < end_time:
+        free.append(TimeSlot(cursor, end_time))
+    return free
+
+
+def split_into_slots(free: Iterable[TimeSlot], slot: timedelta) -> list[TimeSlot]:
+    """Cut free intervals into `slot` long slots, leftovers shorter than `slot` are dropped"""
+    slots: list[TimeSlot] = []
+    for interval in free:
+        slot_start = interval.start_time
+        while slot_start + slot <= interval.end_time:
+            slots.append(TimeSlot(slot_start, slot_start + slot))
+            slot_start += slot
+    return slots
+
+
+def iter_days(start_time: datetime, end_time: datetime) -> Iterator[date]:
+    """UTC days touched by `[start_time, end_time)`"""
+    day = start_time.astimezone(timezone.utc).date()
+    last_day = (end_time.astimezone(timezone.utc) - timedelta(microseconds=1)).date()
+    while day <= last_day:
+        yield day
+        day += timedelta(days=1)
+
+
+def day_start(day: date) -> datetime:
+    return datetime.combine(day, dt_time.min, tzinfo=timezone.utc)
+
+
+class AvailabilityCache:
+    """Bounded cache of busy periods per facility and UTC day"""
+
+    def __init__(self, ttl: float, maxsize: int = 10_000) -> None:
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: OrderedDict[
+            tuple[uuid.UUID, date], tuple[float, list[TimeSlot]]
+        ] = OrderedDict()
+
+    def get(self, facility_id: uuid.UUID, day: date) -> Optional[list[TimeSlot]]:
+        entry = self._data.get((facility_id, day))
+        if entry is None:
+            return None
+
+        expires_at, periods = entry
+        if expires_at < time.monotonic():
+            del self._data[(facility_id, day)]
+            return None
+        return periods
+
+    def set(self, facility_id: uuid.UUID, day: date, periods: list[TimeSlot]) -> None:
+        self._data[(facility_id, day)] = (time.monotonic() + self.ttl, periods)
+        self._data.move_to_end((facility_id, day))
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(
+        self, facility_id: uuid.UUID, start_time: datetime, end_time: datetime
+    ) -> None:
+        for day in iter_days(start_time, end_time):
+            self._data.pop((facility_id, day), None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+availability_cache = AvailabilityCache(ttl=config.AVAILABILITY_CACHE_TTL)
+
+
+class AvailabilityService:
+    def __init__(
+        self,
+        reservation_service: ReservationService,
+        cache: Optional[AvailabilityCache] = None,
+    ) -> None:
+        self.reservation_service = reservation_service
+        self.cache = cache
+
+    async def get_busy_periods(
+        self,
+        session: AsyncSession,
+        facility_id: uuid.UUID,
+        start_time: datetime,
+        end_time: datetime,
+    ) -> list[TimeSlot]:
+        if self.cache is None or self.cache.ttl <= 0:
+            periods = await self.reservation_service.get_busy_periods(
+                session, facility_id, start_time, end_time
+            )
+            return merge_intervals(TimeSlot(*period) for period in periods)
+
+        by_day = {
+            day: self.cache.get(facility_id, day)
+            for day in iter_days(start_time, end_time)
+        }
+        missing = [day for day, periods in by_day.items() if periods is None]
+
+        if missing:
+            # One query covering every missing day, bucketed per day afterwards
+            periods = [
+                TimeSlot(*period)
+                for period in await self.reservation_service.get_busy_periods(
+                    session,
+                    facility_id,
+                    day_start(missing[0]),
+                    day_start(missing[-1] + timedelta(days=1)),
+                )
+            ]
+            for day in missing:
+                start, end = day_start(day), day_start(day + timedelta(days=1))
+                day_periods = [
+                    period
+                    for period in periods
+                    if period.start_time < end and period.end_time > start
+                ]
+                self.cache.set(facility_id, day, day_periods)
+                by_day[day] = day_periods
+
+        return merge_intervals(chain.from_iterable(by_day.values()))  # type: ignore
+
+    def invalidate(
+        self, facility_id: uuid.UUID, start_time: datetime, end_time: datetime
+    ) -> None:
+        if self.cache is not None:
+            self.cache.invalidate(facility_id, start_time, end_time)
+
+    async def get_free_slots(
+        self,
+        session: AsyncSession,
+        facility_id: uuid.UUID,
+        start_time: datetime,
+        end_time: datetime,
+        slot: Optional[timedelta] = None,
+    ) -> list[TimeSlot]:
+        busy = await self.get_busy_periods(session, facility_id, start_time, end_time)
+        free = free_intervals(busy, start_time, end_time)
+        if slot is None:
+            return free
+        return split_into_slots(free, slot)
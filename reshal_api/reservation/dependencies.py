@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from reshal_api.auth.dependencies import get_db_session
 from reshal_api.exceptions import NotFound
 
+from .availability import AvailabilityService, availability_cache
 from .service import ReservationService
 
 
@@ -11,6 +12,12 @@ async def get_reservation_service() -> ReservationService:
     return ReservationService()
 
 
+async def get_availability_service(
+    reservation_service: ReservationService = Depends(get_reservation_service),
+) -> AvailabilityService:
+    return AvailabilityService(reservation_service, availability_cache)
+
+
 async def valid_reservation(
     reservation_id: str,
     session: AsyncSession = Depends(get_db_session),
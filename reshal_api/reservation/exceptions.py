@@ -0,0 +1,6 @@
+from reshal_api.exceptions import Conflict
+
+
+class ReservationOverlaps(Conflict):
+    def __init__(self):
+        super().__init__(detail="Reservation overlaps with another reservation")
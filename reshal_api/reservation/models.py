@@ -1,9 +1,10 @@
 import uuid
 from datetime import datetime
 from decimal import Decimal
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
-from sqlalchemy import DateTime, ForeignKey, Numeric
+from sqlalchemy import DDL, DateTime, ForeignKey, Index, Numeric, event, func, text
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from reshal_api.database import Base
@@ -16,6 +17,15 @@ if TYPE_CHECKING:
 
 class Reservation(Base, TimestampMixin):
     __tablename__ = "reservation"
+    __table_args__ = (
+        Index("reservation_created_at_id_idx", "created_at", "id"),
+        # Upcoming reservations still waiting for their reminder
+        Index(
+            "reservation_reminder_due_idx",
+            "start_time",
+            postgresql_where=text("reminder_sent_at IS NULL"),
+        ),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     start_time: Mapped[datetime] = mapped_column(DateTime(timezone=True))
@@ -33,8 +43,43 @@ class Reservation(Base, TimestampMixin):
     payment_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("payment.id", ondelete="SET NULL")
     )
+    reminder_sent_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True)
+    )
 
     facility: Mapped["Facility"] = relationship(
         back_populates="reservations", lazy="selectin"
     )
     payment: Mapped[Payment] = relationship(foreign_keys=[payment_id], lazy="selectin")
+
+
+RESERVATION_PERIOD_EXCLUSION = "reservation_period_excl"
+
+
+def reservation_period(start_time, end_time):
+    """Half-open `[start_time, end_time)` range, back to back reservations don't overlap"""
+    return func.tstzrange(start_time, end_time, "[)")
+
+
+# Rejects overlapping reservations for the same facility,
+# the GiST index backing it also serves overlap lookups
+Reservation.__table__.append_constraint(
+    ExcludeConstraint(
+        (Reservation.__table__.c.facility_id, "="),
+        (
+            reservation_period(
+                Reservation.__table__.c.start_time, Reservation.__table__.c.end_time
+            ),
+            "&&",
+        ),
+        name=RESERVATION_PERIOD_EXCLUSION,
+        using="gist",
+    )
+)
+
+# `btree_gist` provides the `=` operator for uuid in GiST indexes
+event.listen(
+    Reservation.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist"),
+)
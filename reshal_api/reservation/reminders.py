@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Row, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from reshal_api.auth.models import User
+from reshal_api.email.service import EmailOutboxService, TemplatesService
+from reshal_api.facility.models import Facility
+
+from .models import Reservation
+
+REMINDER_SUBJECT = "Reshal: Upcoming reservation"
+
+
+def reminder_context(row: Row) -> dict[str, str]:
+    return {
+        "first_name": row.first_name,
+        "facility_name": row.facility_name,
+        "start_time": row.start_time.strftime("%Y-%m-%d %H:%M"),
+        "end_time": row.end_time.strftime("%Y-%m-%d %H:%M"),
+    }
+
+
+async def send_reservation_reminders(
+    session_factory: async_sessionmaker[AsyncSession],
+    templates_service: TemplatesService,
+    outbox_service: EmailOutboxService,
+    ahead: timedelta,
+    batch_size: int,
+) -> int:
+    """
+    Queue reminders for reservations starting within `ahead`, return how many.
+
+    Due rows are streamed from a server side cursor `batch_size` at a time, each
+    batch is rendered, added to the outbox and marked as reminded.
+    """
+    now = datetime.now(tz=timezone.utc)
+    query = (
+        select(
+            Reservation.id,
+            Reservation.start_time,
+            Reservation.end_time,
+            User.email,
+            User.first_name,
+            Facility.name.label("facility_name"),
+        )
+        .join(User, User.id == Reservation.user_id)
+        .join(Facility, Facility.id == Reservation.facility_id)
+        .where(Reservation.reminder_sent_at.is_(None))
+        .where(Reservation.start_time > now)
+        .where(Reservation.start_time <= now + ahead)
+        .execution_options(yield_per=batch_size)
+    )
+
+    queued = 0
+    async with session_factory() as session, session.begin():
+        result = await session.stream(query)
+        async for rows in result.partitions():
+            contents = await templates_service.render_many(
+                templates_service.RESERVATION_REMINDER,
+                (reminder_context(row) for row in rows),
+            )
+            await outbox_service.enqueue_many(
+                session,
+                (
+                    (row.email, REMINDER_SUBJECT, content)
+                    for row, content in zip(rows, contents)
+                ),
+            )
+            await session.execute(
+                update(Reservation)
+                .where(Reservation.id.in_([row.id for row in rows]))
+                .values(reminder_sent_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            queued += len(rows)
+    return queued
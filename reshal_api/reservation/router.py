@@ -1,16 +1,26 @@
 from datetime import datetime, timedelta
+from functools import partial
 from typing import Annotated
 
-from fastapi import APIRouter, BackgroundTasks, Depends, Response, status
+from fastapi import APIRouter, Depends, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-
-from reshal_api.auth.dependencies import get_admin, get_user
-from reshal_api.auth.models import User, UserRole
-from reshal_api.base import DatetimeQuery
-from reshal_api.database import get_db_session
+from sqlalchemy.orm import raiseload
+
+from reshal_api.auth.dependencies import get_admin, get_principal
+from reshal_api.auth.models import UserRole
+from reshal_api.auth.schemas import Principal
+from reshal_api.base import (
+    DatetimeQuery,
+    ExportFormat,
+    Pagination,
+    export_response,
+    get_pagination,
+    set_next_cursor,
+)
+from reshal_api.database import after_commit, get_db_session
 from reshal_api.email import tasks as email_tasks
-from reshal_api.email.dependencies import EmailService, TemplatesService
-from reshal_api.exceptions import Conflict, Forbidden, NotFound
+from reshal_api.email.dependencies import EmailOutboxService, TemplatesService
+from reshal_api.exceptions import Forbidden, NotFound
 from reshal_api.facility.dependencies import get_facility_service
 from reshal_api.facility.service import FacilityService
 from reshal_api.payment.dependencies import get_payment_service
@@ -19,7 +29,12 @@ from reshal_api.payment.service import PaymentService
 
 # from reshal_api.timeframe.dependencies import get_timeframe_service
 # from reshal_api.timeframe.service import TimeFrameService
-from .dependencies import get_reservation_service, valid_reservation
+from .availability import AvailabilityService
+from .dependencies import (
+    get_availability_service,
+    get_reservation_service,
+    valid_reservation,
+)
 from .models import Reservation
 from .schemas import (
     ReservationCreate,
@@ -38,24 +53,43 @@ router = APIRouter(tags=["reservation"])
 async def get_all_reservations(
     # startTime: Annotated[datetime, DatetimeQuery()] = datetime.now(),
     # endTime: Annotated[datetime, DatetimeQuery()] = datetime.now() + timedelta(weeks=4),
+    response: Response,
+    pagination: Pagination = Depends(get_pagination),
     session: AsyncSession = Depends(get_db_session),
     reservation_service: ReservationService = Depends(get_reservation_service),
 ):
     # reservations = await reservation_service.get_all_in_timeframe(
     #     session, startTime, endTime
     # )
-    reservations = await reservation_service.get_all(
-        session, Reservation.facility_id != None  # noqa: E711
+    reservations, next_cursor = await reservation_service.get_page(
+        session,
+        Reservation.facility_id != None,  # noqa: E711
+        pagination=pagination,
     )
+    set_next_cursor(response, next_cursor)
     return reservations
 
 
+@router.get("/export", dependencies=[Depends(get_admin)])
+async def export_reservations(
+    format: ExportFormat = ExportFormat.ndjson,
+    session: AsyncSession = Depends(get_db_session),
+    reservation_service: ReservationService = Depends(get_reservation_service),
+):
+    reservations = reservation_service.stream(
+        session,
+        Reservation.facility_id != None,  # noqa: E711
+        options=[raiseload("*")],
+    )
+    return export_response(reservations, ReservationReadBase, format)
+
+
 @router.get("/me", response_model=list[ReservationReadBase])
 async def get_reservations_me(
     startTime: Annotated[datetime, DatetimeQuery()] = datetime.now(),
     endTime: Annotated[datetime, DatetimeQuery()] = datetime.now() + timedelta(weeks=4),
     session: AsyncSession = Depends(get_db_session),
-    user: User = Depends(get_user),
+    user: Principal = Depends(get_principal),
     reservation_service: ReservationService = Depends(get_reservation_service),
 ):
     user_reservations = await reservation_service.get_all_in_timeframe(
@@ -71,15 +105,15 @@ async def get_reservations_me(
 )
 async def create_reservation(
     data: ReservationCreateBase,
-    email_service: EmailService,
+    outbox_service: EmailOutboxService,
     templates_service: TemplatesService,
-    background_tasks: BackgroundTasks,
     session: AsyncSession = Depends(get_db_session),
     reservation_service: ReservationService = Depends(get_reservation_service),
     facility_service: FacilityService = Depends(get_facility_service),
     # timeframe_service: TimeFrameService = Depends(get_timeframe_service),
     payment_service: PaymentService = Depends(get_payment_service),
-    user: User = Depends(get_user),
+    availability_service: AvailabilityService = Depends(get_availability_service),
+    user: Principal = Depends(get_principal),
 ):
     # timeframe = await timeframe_service.get(
     #     session, id=data.timeframe_id, facility_id=data.facility_id
@@ -93,14 +127,6 @@ async def create_reservation(
     if facility is None:
         raise NotFound()
 
-    if await reservation_service.is_overlapping(
-        session,
-        data.facility_id,
-        data.start_time,
-        data.end_time,
-    ):
-        raise Conflict("Reservation overlaps with another reservation")
-
     reservation_price = reservation_service.calcualte_price(
         facility.price, data.start_time, data.end_time
     )
@@ -118,10 +144,20 @@ async def create_reservation(
     )
     reservation = await reservation_service.create(session, create_obj)
     payment.reservation_id = reservation.id
+    after_commit(
+        session,
+        partial(
+            availability_service.invalidate,
+            facility.id,
+            reservation.start_time,
+            reservation.end_time,
+        ),
+    )
 
-    background_tasks.add_task(
-        email_tasks.send_reservation_confirmation,
-        email_service,
+    # Committed together with the reservation, delivered by the email dispatcher
+    await email_tasks.queue_reservation_confirmation(
+        session,
+        outbox_service,
         templates_service,
         user.email,
         user.first_name,
@@ -140,7 +176,7 @@ async def get_reservation_by_id(
     session: AsyncSession = Depends(get_db_session),
     reservation_service: ReservationService = Depends(get_reservation_service),
     reservation: Reservation = Depends(valid_reservation),
-    user: User = Depends(get_user),
+    user: Principal = Depends(get_principal),
 ):
     if not (
         reservation.user_id == user.id
@@ -155,11 +191,22 @@ async def get_reservation_by_id(
 @router.delete("/{reservation_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_reservation(
     reservation_id: str,
-    user: User = Depends(get_user),
+    user: Principal = Depends(get_principal),
     session: AsyncSession = Depends(get_db_session),
     reservation_service: ReservationService = Depends(get_reservation_service),
+    availability_service: AvailabilityService = Depends(get_availability_service),
 ):
     reservation = await reservation_service.get(session, id=reservation_id)
     if reservation and (user.role == UserRole.admin or reservation.user_id == user.id):
         await reservation_service.delete(session, db_obj=reservation)
+        if reservation.facility_id is not None:
+            after_commit(
+                session,
+                partial(
+                    availability_service.invalidate,
+                    reservation.facility_id,
+                    reservation.start_time,
+                    reservation.end_time,
+                ),
+            )
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -100,3 +100,14 @@ class ReservationRead(ReservationReadBase):
 
 class ReservationUpdate(ORJSONBaseModel):
     ...
+
+
+# Availability
+
+
+class TimeSlotRead(ORJSONBaseModel):
+    start_time: datetime
+    end_time: datetime
+
+    class Config:
+        orm_mode = True
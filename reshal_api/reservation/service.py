@@ -4,12 +4,14 @@ from datetime import datetime, timezone
 from decimal import Decimal
 from typing import Sequence
 
-from sqlalchemy import select
+from sqlalchemy import exists, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from reshal_api.base import BaseCRUDService
 
-from .models import Reservation
+from .exceptions import ReservationOverlaps
+from .models import RESERVATION_PERIOD_EXCLUSION, Reservation, reservation_period
 from .schemas import ReservationCreate, ReservationUpdate
 
 
@@ -19,6 +21,20 @@ class ReservationService(
     def __init__(self) -> None:
         super().__init__(Reservation)
 
+    async def create(
+        self, session: AsyncSession, create_obj: ReservationCreate
+    ) -> Reservation:
+        """
+        Insert the reservation, overlaps are rejected by the
+        `RESERVATION_PERIOD_EXCLUSION` constraint so no check is needed beforehand
+        """
+        try:
+            return await super().create(session, create_obj)
+        except IntegrityError as e:
+            if RESERVATION_PERIOD_EXCLUSION in str(e.orig):
+                raise ReservationOverlaps() from e
+            raise
+
     async def is_overlapping(
         self,
         session: AsyncSession,
@@ -26,15 +42,39 @@ class ReservationService(
         start_time: datetime,
         end_time: datetime,
     ) -> bool:
-        q = (
-            select(Reservation)
-            .filter(Reservation.facility_id == facility_id)
-            .filter(Reservation.start_time < end_time)
-            .filter(Reservation.end_time > start_time)
+        q = select(
+            exists()
+            .where(Reservation.facility_id == facility_id)
+            .where(
+                reservation_period(Reservation.start_time, Reservation.end_time).op(
+                    "&&"
+                )(reservation_period(start_time, end_time))
+            )
         )
-        result = (await session.execute(q)).scalar_one_or_none()
+        result = (await session.execute(q)).scalar()
         return bool(result)
 
+    async def get_busy_periods(
+        self,
+        session: AsyncSession,
+        facility_id: uuid.UUID,
+        start_time: datetime,
+        end_time: datetime,
+    ) -> Sequence[tuple[datetime, datetime]]:
+        """`(start_time, end_time)` of reservations overlapping the window, sorted by start"""
+        q = (
+            select(Reservation.start_time, Reservation.end_time)
+            .where(Reservation.facility_id == facility_id)
+            .where(
+                reservation_period(Reservation.start_time, Reservation.end_time).op(
+                    "&&"
+                )(reservation_period(start_time, end_time))
+            )
+            .order_by(Reservation.start_time)
+        )
+        result = await session.execute(q)
+        return result.tuples().all()
+
     async def get_all_in_timeframe(
         self,
         session: AsyncSession,
@@ -0,0 +1,36 @@
+from datetime import timedelta
+from logging import getLogger
+from typing import TYPE_CHECKING
+
+from reshal_api.config import get_config
+from reshal_api.database import sessionmaker
+from reshal_api.email.service import EmailOutboxService, get_templates_service
+from reshal_api.reservation.reminders import send_reservation_reminders
+
+from .schedules import Cron
+
+if TYPE_CHECKING:
+    from .service import Scheduler
+
+logger = getLogger(__name__)
+
+config = get_config()
+
+
+async def reservation_reminders() -> None:
+    queued = await send_reservation_reminders(
+        sessionmaker,
+        get_templates_service(),
+        EmailOutboxService(),
+        ahead=timedelta(hours=config.RESERVATION_REMINDER_AHEAD),
+        batch_size=config.RESERVATION_REMINDER_BATCH_SIZE,
+    )
+    logger.info(f"Queued {queued} reservation reminders")
+
+
+def register_jobs(scheduler: "Scheduler") -> None:
+    scheduler.add_job(
+        "reservation_reminders",
+        reservation_reminders,
+        Cron(config.RESERVATION_REMINDER_SCHEDULE),
+    )
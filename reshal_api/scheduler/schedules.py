@@ -0,0 +1,99 @@
+from datetime import datetime, timedelta
+from typing import Protocol
+
+# Upper bound for the next run lookup, covers "29 Feb" style expressions
+CRON_LOOKAHEAD = timedelta(days=366 * 5)
+
+
+class Schedule(Protocol):
+    def next_run(self, after: datetime) -> datetime:
+        """First run strictly later than `after`, naive UTC"""
+        ...
+
+
+class Interval:
+    def __init__(self, seconds: float) -> None:
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.interval = timedelta(seconds=seconds)
+
+    def next_run(self, after: datetime) -> datetime:
+        return after + self.interval
+
+    def __repr__(self) -> str:
+        return f"Interval({self.interval.total_seconds()})"
+
+
+def parse_cron_field(field: str, low: int, high: int) -> frozenset[int]:
+    """`*`, `5`, `1-5`, `*/15`, `10-50/10` and comma separated lists of those"""
+    values: set[int] = set()
+    for part in field.split(","):
+        bounds, _, step = part.partition("/")
+        try:
+            if bounds == "*":
+                start, end = low, high
+            elif "-" in bounds:
+                start, end = map(int, bounds.split("-", 1))
+            else:
+                start = int(bounds)
+                end = high if step else start
+            step_size = int(step) if step else 1
+        except ValueError:
+            raise ValueError(f"Invalid cron field {field!r}") from None
+
+        if not low <= start <= end <= high or step_size < 1:
+            raise ValueError(f"Invalid cron field {field!r}")
+        values.update(range(start, end + 1, step_size))
+    return frozenset(values)
+
+
+class Cron:
+    """
+    Standard 5 field expression, `minute hour day-of-month month day-of-week`,
+    evaluated in UTC. Sunday is 0 or 7, when both day fields are restricted
+    either of them matching is enough, like in cron.
+    """
+
+    def __init__(self, expression: str) -> None:
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+
+        self.expression = expression
+        self.minutes = parse_cron_field(fields[0], 0, 59)
+        self.hours = parse_cron_field(fields[1], 0, 23)
+        self.days = parse_cron_field(fields[2], 1, 31)
+        self.months = parse_cron_field(fields[3], 1, 12)
+        self.weekdays = frozenset(day % 7 for day in parse_cron_field(fields[4], 0, 7))
+        self._days_restricted = not fields[2].startswith("*")
+        self._weekdays_restricted = not fields[4].startswith("*")
+
+    def _day_matches(self, time: datetime) -> bool:
+        day = time.day in self.days
+        # Python counts weekdays from Monday, cron from Sunday
+        weekday = (time.weekday() + 1) % 7 in self.weekdays
+        if self._days_restricted and self._weekdays_restricted:
+            return day or weekday
+        return day and weekday
+
+    def next_run(self, after: datetime) -> datetime:
+        time = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = time + CRON_LOOKAHEAD
+        # Skips whole months, days and hours that can't match
+        while time < limit:
+            if time.month not in self.months:
+                time = (time.replace(day=1) + timedelta(days=32)).replace(
+                    day=1, hour=0, minute=0
+                )
+            elif not self._day_matches(time):
+                time = (time + timedelta(days=1)).replace(hour=0, minute=0)
+            elif time.hour not in self.hours:
+                time = (time + timedelta(hours=1)).replace(minute=0)
+            elif time.minute not in self.minutes:
+                time += timedelta(minutes=1)
+            else:
+                return time
+        raise ValueError(f"Cron expression never matches: {self.expression!r}")
+
+    def __repr__(self) -> str:
+        return f"Cron({self.expression!r})"
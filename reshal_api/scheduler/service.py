@@ -0,0 +1,173 @@
+"""
+In-process job scheduler
+
+Every worker runs a scheduler, only the one holding a Postgres advisory lock
+runs jobs. The lock lives as long as its connection, when the leader dies
+another worker takes over on its next attempt.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from logging import getLogger
+from typing import Awaitable, Callable
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from reshal_api.config import get_config
+from reshal_api.database import async_engine
+
+from .jobs import register_jobs
+from .schedules import Schedule
+
+logger = getLogger(__name__)
+
+config = get_config()
+
+JobFunc = Callable[[], Awaitable[None]]
+
+
+@dataclass
+class Job:
+    name: str
+    func: JobFunc
+    schedule: Schedule
+    next_run_at: datetime | None = None
+
+
+class Scheduler:
+    def __init__(self, engine: AsyncEngine, lock_id: int, leader_retry: float) -> None:
+        self.engine = engine
+        self.lock_id = lock_id
+        # Also how often the leader checks its lock connection is alive
+        self.leader_retry = leader_retry
+        self.jobs: dict[str, Job] = {}
+
+        self._connection: AsyncConnection | None = None
+        self._running: dict[str, asyncio.Task] = {}
+        self._task: asyncio.Task | None = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._connection is not None
+
+    def add_job(self, name: str, func: JobFunc, schedule: Schedule) -> None:
+        self.jobs[name] = Job(name, func, schedule)
+
+    async def acquire(self) -> bool:
+        """Take or confirm leadership, return whether this worker is the leader"""
+        if self._connection is not None:
+            try:
+                await self._connection.execute(select(1))
+                await self._connection.commit()
+                return True
+            except Exception:
+                logger.warning("Scheduler lock connection lost", exc_info=True)
+                await self.release()
+
+        connection = await self.engine.connect()
+        try:
+            acquired = (
+                await connection.execute(
+                    select(func.pg_try_advisory_lock(self.lock_id))
+                )
+            ).scalar_one()
+            # Session level lock, survives the commit, no idle transaction is kept
+            await connection.commit()
+        except BaseException:
+            await connection.close()
+            raise
+        if not acquired:
+            await connection.close()
+            return False
+
+        logger.info("Acquired scheduler leadership")
+        self._connection = connection
+        now = datetime.utcnow()
+        for job in self.jobs.values():
+            job.next_run_at = job.schedule.next_run(now)
+        return True
+
+    async def release(self) -> None:
+        for task in self._running.values():
+            task.cancel()
+        await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+        connection, self._connection = self._connection, None
+        if connection is None:
+            return
+        try:
+            await connection.execute(select(func.pg_advisory_unlock(self.lock_id)))
+            await connection.commit()
+        except Exception:
+            # Never return a connection that may still hold the lock to the pool
+            await connection.invalidate()
+        finally:
+            await connection.close()
+
+    def run_pending(self, now: datetime) -> None:
+        for job in self.jobs.values():
+            if job.next_run_at is None or job.next_run_at > now:
+                continue
+            job.next_run_at = job.schedule.next_run(now)
+            if job.name in self._running:
+                logger.warning(f"Scheduled job {job.name} still running, skipped")
+                continue
+
+            task = asyncio.create_task(self._run_job(job))
+            self._running[job.name] = task
+            task.add_done_callback(lambda _, name=job.name: self._running.pop(name))
+
+    async def _run_job(self, job: Job) -> None:
+        start_time = time.perf_counter()
+        try:
+            await job.func()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception(f"Scheduled job {job.name} failed")
+        else:
+            elapsed = time.perf_counter() - start_time
+            logger.info(f"Scheduled job {job.name} finished in {elapsed:.2f}s")
+
+    async def run(self) -> None:
+        while True:
+            delay = self.leader_retry
+            try:
+                if await self.acquire():
+                    now = datetime.utcnow()
+                    self.run_pending(now)
+                    next_runs = [
+                        job.next_run_at for job in self.jobs.values() if job.next_run_at
+                    ]
+                    if next_runs:
+                        delay = min(delay, (min(next_runs) - now).total_seconds())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Scheduler tick failed")
+            await asyncio.sleep(max(delay, 0))
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.release()
+
+
+@lru_cache(maxsize=1)
+def get_scheduler() -> Scheduler:
+    scheduler = Scheduler(
+        async_engine,
+        lock_id=config.SCHEDULER_LOCK_ID,
+        leader_retry=config.SCHEDULER_LEADER_RETRY,
+    )
+    register_jobs(scheduler)
+    return scheduler
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from reshal_api.auth.dependencies import get_admin, get_db_session, get_user
-from reshal_api.auth.models import User, UserRole
+from reshal_api.auth.dependencies import get_admin, get_db_session, get_principal
+from reshal_api.auth.models import UserRole
+from reshal_api.auth.schemas import Principal
 from reshal_api.exceptions import Conflict, Forbidden, NotFound
 from reshal_api.facility.dependencies import facility_exists, get_facility_service
 from reshal_api.facility.models import Facility
@@ -43,7 +44,7 @@ async def create_timeframe(
     session: AsyncSession = Depends(get_db_session),
     timeframe_service: TimeFrameService = Depends(get_timeframe_service),
     facility_service: FacilityService = Depends(get_facility_service),
-    user: User = Depends(get_user),
+    user: Principal = Depends(get_principal),
 ):
     facility = await facility_service.get(session, id=data.facility_id)
     if facility is None:
@@ -70,7 +71,7 @@ async def remove_timeframe(
     session: AsyncSession = Depends(get_db_session),
     timeframe_service: TimeFrameService = Depends(get_timeframe_service),
     timeframe: TimeFrame = Depends(valid_timeframe),
-    user: User = Depends(get_user),
+    user: Principal = Depends(get_principal),
 ):
     await session.refresh(timeframe, ["facility"])
     if not (timeframe.facility.is_owner(user.id) or user.role == UserRole.admin):
@@ -0,0 +1,111 @@
+"""
+Event loop lag watchdog
+
+A task on the loop measures how late its sleeps wake up and exports that as
+a histogram. A thread checks the task's heartbeat, when the loop is blocked
+longer than the threshold it logs the stack of the code blocking it while
+the loop is still stuck, with the trace id of the request being served.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from contextlib import suppress
+from functools import lru_cache
+
+from reshal_api.config import get_config
+from reshal_api.opentelemetry import EVENT_LOOP_LAG, REQUEST_TRACE_IDS
+
+logger = logging.getLogger(__name__)
+
+config = get_config()
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float, threshold: float, app_name: str) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.app_name = app_name
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._heartbeat = time.monotonic()
+        self._reported_heartbeat: float | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    async def measure(self) -> None:
+        loop = asyncio.get_running_loop()
+        histogram = EVENT_LOOP_LAG.labels(app_name=self.app_name)
+        while True:
+            self._heartbeat = time.monotonic()
+            start_time = loop.time()
+            await asyncio.sleep(self.interval)
+            histogram.observe(max(loop.time() - start_time - self.interval, 0))
+
+    def blocked_for(self) -> float:
+        return time.monotonic() - self._heartbeat - self.interval
+
+    def report(self, blocked_for: float) -> None:
+        """Log what the loop thread is running, called from the watchdog thread"""
+        assert self._loop is not None and self._loop_thread_id is not None
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return
+        stack = "".join(traceback.format_stack(frame))
+        del frame
+
+        task = asyncio.current_task(self._loop)
+        task_name = task.get_name() if task is not None else "-"
+        trace_id = REQUEST_TRACE_IDS.get(task, "0") if task is not None else "0"
+        logger.warning(
+            f"Event loop blocked for {blocked_for * 1000:.0f}ms by task {task_name} "
+            f"[trace_id={trace_id}]\n{stack}"
+        )
+
+    def watch(self) -> None:
+        while not self._stopped.wait(self.interval):
+            heartbeat = self._heartbeat
+            blocked_for = self.blocked_for()
+            # Once per stall, the heartbeat moves on when the loop runs again
+            if blocked_for > self.threshold and heartbeat != self._reported_heartbeat:
+                self._reported_heartbeat = heartbeat
+                try:
+                    self.report(blocked_for)
+                except Exception:
+                    logger.exception("Event loop watchdog failed to report")
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self.measure())
+        self._thread = threading.Thread(
+            target=self.watch, name="loop-lag-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+@lru_cache(maxsize=1)
+def get_loop_lag_monitor() -> LoopLagMonitor:
+    return LoopLagMonitor(
+        interval=config.LOOP_LAG_INTERVAL,
+        threshold=config.LOOP_LAG_THRESHOLD,
+        app_name=config.OTLP_APP_NAME,
+    )
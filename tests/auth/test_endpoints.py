@@ -1,12 +1,16 @@
+import asyncio
+import uuid
+
 import pytest
 from faker import Faker
 from httpx import AsyncClient
 
+from reshal_api.auth import dependencies as auth_dependencies
 from reshal_api.auth import jwt as auth_jwt
-from reshal_api.auth.models import UserRole
+from reshal_api.auth.models import User, UserRole
 from reshal_api.config import Config
 from tests.factories import UserFactory
-from tests.utils import AuthClientFixture
+from tests.utils import AuthClientFixture, authenticate_client
 
 fake = Faker()
 
@@ -125,6 +129,33 @@ async def test_me_get_auth_header(client: AsyncClient, user_factory: UserFactory
     assert response_data["role"] == user.role
 
 
+async def test_me_get_trusts_token_claims(
+    client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+):
+    # Never persisted, so only the token claims can describe this user
+    user = User(
+        id=uuid.uuid4(),
+        email=fake.email(),
+        first_name=fake.first_name(),
+        last_name=fake.last_name(),
+        role=UserRole.normal,
+    )
+    client.headers = {"authorization": f"Bearer {auth_jwt.create_access_token(user)}"}
+
+    response = await client.get("/auth/me")
+    assert response.status_code == 404
+
+    monkeypatch.setattr(auth_dependencies.config, "AUTH_TRUST_TOKEN_CLAIMS", True)
+    response = await client.get("/auth/me")
+    assert response.status_code == 200
+
+    response_data = response.json()
+    assert response_data["id"] == str(user.id)
+    assert response_data["email"] == user.email
+    assert response_data["firstName"] == user.first_name
+    assert response_data["role"] == user.role
+
+
 @pytest.mark.parametrize(
     "data",
     (
@@ -205,3 +236,194 @@ async def test_logout(auth_client: AuthClientFixture):
 
     response = await auth_client.client.get("/auth/me")
     assert response.status_code == 401
+
+
+async def test_refresh(client: AsyncClient, user_factory: UserFactory):
+    user = user_factory.create()
+    response = await client.post(
+        "/auth/token",
+        json={"email": user.email, "password": user_factory._DEFAULT_PASSWORD},
+    )
+    assert response.status_code == 200
+    tokens = response.json()
+    assert tokens["expiresIn"] == app_config.ACCESS_TOKEN_EXPIRE * 60
+
+    response = await client.post(
+        "/auth/refresh", json={"refreshToken": tokens["refreshToken"]}
+    )
+    assert response.status_code == 200
+    refreshed_tokens = response.json()
+    assert refreshed_tokens["refreshToken"] != tokens["refreshToken"]
+    assert refreshed_tokens["accessToken"] != tokens["accessToken"]
+
+    # Rotated with the cookie as well
+    response = await client.post("/auth/refresh")
+    assert response.status_code == 200
+
+    response = await client.get("/auth/me")
+    assert response.status_code == 200
+    assert response.json()["id"] == str(user.id)
+
+
+async def test_refresh_reused_token_revokes_session(
+    client: AsyncClient, user_factory: UserFactory
+):
+    user = user_factory.create()
+    response = await client.post(
+        "/auth/token",
+        json={"email": user.email, "password": user_factory._DEFAULT_PASSWORD},
+    )
+    tokens = response.json()
+
+    response = await client.post(
+        "/auth/refresh", json={"refreshToken": tokens["refreshToken"]}
+    )
+    assert response.status_code == 200
+    refreshed_tokens = response.json()
+
+    # The reused token is locked by the request, revoking must not wait on it
+    response = await asyncio.wait_for(
+        client.post("/auth/refresh", json={"refreshToken": tokens["refreshToken"]}),
+        timeout=10,
+    )
+    assert response.status_code == 401
+
+    # Every token of the session is revoked, including the ones issued last
+    response = await client.post(
+        "/auth/refresh", json={"refreshToken": refreshed_tokens["refreshToken"]}
+    )
+    assert response.status_code == 401
+
+    client.cookies.clear()
+    client.headers = {"authorization": f"Bearer {refreshed_tokens['accessToken']}"}
+    response = await client.get("/auth/me")
+    assert response.status_code == 401
+
+
+async def test_refresh_rejects_access_token(auth_client: AuthClientFixture):
+    access_token = auth_jwt.create_access_token(auth_client.user)
+
+    response = await auth_client.client.post(
+        "/auth/refresh", json={"refreshToken": access_token}
+    )
+    assert response.status_code == 401
+
+
+async def test_logout_revokes_access_token(
+    client: AsyncClient, user_factory: UserFactory
+):
+    user = user_factory.create()
+    response = await client.post(
+        "/auth/token",
+        json={"email": user.email, "password": user_factory._DEFAULT_PASSWORD},
+    )
+    tokens = response.json()
+    client.cookies.clear()
+    client.headers = {"authorization": f"Bearer {tokens['accessToken']}"}
+
+    response = await client.get("/auth/me")
+    assert response.status_code == 200
+
+    response = await client.get("/auth/logout")
+    assert response.status_code == 204
+
+    response = await client.get("/auth/me")
+    assert response.status_code == 401
+
+    response = await client.post(
+        "/auth/refresh", json={"refreshToken": tokens["refreshToken"]}
+    )
+    assert response.status_code == 401
+
+
+async def test_token_rate_limited_per_email(
+    client: AsyncClient, user_factory: UserFactory, monkeypatch: pytest.MonkeyPatch
+):
+    user = user_factory.create()
+    monkeypatch.setattr(auth_dependencies.config, "LOGIN_RATE_LIMIT_PER_EMAIL", 2)
+
+    for _ in range(2):
+        response = await client.post(
+            "/auth/token", json={"email": user.email, "password": "wrongPassword1!"}
+        )
+        assert response.status_code == 401
+
+    # Rejected before the password is checked, even when it is correct
+    response = await client.post(
+        "/auth/token",
+        json={"email": user.email, "password": user_factory._DEFAULT_PASSWORD},
+    )
+    assert response.status_code == 429
+    assert response.headers["retry-after"]
+
+    response = await client.post(
+        "/auth/token",
+        json={"email": fake.email(), "password": user_factory._DEFAULT_PASSWORD},
+    )
+    assert response.status_code == 401
+
+
+async def test_import_users_csv(
+    admin_client: AuthClientFixture, user_factory: UserFactory
+):
+    existing_user = user_factory.create()
+    password = user_factory._DEFAULT_PASSWORD
+    content = "\n".join(
+        (
+            "email,first_name,last_name,password,role",
+            f"new1@example.com,John,Doe,{password},normal",
+            f"new2@example.com,Jane,Doe,{password},owner",
+            "invalid@example.com,Jim,Doe,weak,normal",
+            f"new1@example.com,John,Again,{password},normal",
+            f"{existing_user.email},Existing,User,{password},normal",
+        )
+    )
+
+    response = await admin_client.client.post(
+        "/auth/import", files={"file": ("users.csv", content, "text/csv")}
+    )
+    assert response.status_code == 200
+
+    report = response.json()
+    assert report["created"] == 2
+    assert report["failed"] == 3
+    assert [(row["line"], row["status"]) for row in report["rows"]] == [
+        (2, "created"),
+        (3, "created"),
+        (4, "invalid"),
+        (5, "duplicate"),
+        (6, "duplicate"),
+    ]
+
+    await authenticate_client(admin_client.client, "new2@example.com", password)
+    response = await admin_client.client.get("/auth/me")
+    assert response.json()["role"] == UserRole.owner
+
+
+async def test_import_users_ndjson_with_bom(admin_client: AuthClientFixture):
+    content = (
+        '{"email": "bom@example.com", "first_name": "John", "last_name": "Doe", '
+        '"password": "' + UserFactory._DEFAULT_PASSWORD + '"}\n'
+    ).encode("utf-8-sig")
+
+    response = await admin_client.client.post(
+        "/auth/import",
+        files={"file": ("users.ndjson", content, "application/x-ndjson")},
+    )
+    assert response.status_code == 200
+    assert response.json()["created"] == 1
+
+
+async def test_import_users_not_utf8(admin_client: AuthClientFixture):
+    response = await admin_client.client.post(
+        "/auth/import",
+        files={"file": ("users.csv", "email\ncafé@example.com".encode("latin-1"))},
+    )
+    assert response.status_code == 400
+
+
+async def test_import_users_forbidden(auth_client: AuthClientFixture):
+    response = await auth_client.client.post(
+        "/auth/import", files={"file": ("users.csv", "email", "text/csv")}
+    )
+    assert response.status_code == 403
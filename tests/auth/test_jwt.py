@@ -0,0 +1,83 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from reshal_api.auth import jwt as auth_jwt
+from reshal_api.auth.exceptions import InvalidToken
+from reshal_api.auth.models import UserRole
+from reshal_api.auth.revocation import revocation_list
+
+SECRET_KEY = "test-secret"
+
+
+def make_claims(expires_in: timedelta = timedelta(minutes=5)) -> dict:
+    return {
+        "exp": datetime.utcnow() + expires_in,
+        "jti": str(uuid.uuid4()),
+        "sid": str(uuid.uuid4()),
+        "user_id": str(uuid.uuid4()),
+        "role": UserRole.normal,
+    }
+
+
+@pytest.mark.parametrize(
+    "encoder, decoder",
+    (
+        (auth_jwt.HS256Codec(SECRET_KEY), auth_jwt.JoseCodec(SECRET_KEY, "HS256")),
+        (auth_jwt.JoseCodec(SECRET_KEY, "HS256"), auth_jwt.HS256Codec(SECRET_KEY)),
+        (auth_jwt.HS256Codec(SECRET_KEY), auth_jwt.HS256Codec(SECRET_KEY)),
+    ),
+)
+def test_codecs_are_compatible(
+    encoder: auth_jwt.TokenCodec, decoder: auth_jwt.TokenCodec
+):
+    claims = make_claims()
+    payload = decoder.decode(encoder.encode(claims))
+
+    assert payload["user_id"] == claims["user_id"]
+    assert payload["role"] == claims["role"]
+
+
+@pytest.mark.parametrize(
+    "token",
+    (
+        "",
+        "not.a.token",
+        auth_jwt.HS256Codec("other-secret").encode(make_claims()),
+        auth_jwt.HS256Codec(SECRET_KEY).encode(make_claims(timedelta(minutes=-5))),
+        auth_jwt.JoseCodec(SECRET_KEY, "HS512").encode(make_claims()),
+        # alg none
+        "eyJhbGciOiJub25lIiwidHlwIjoiSldUIn0.eyJ1c2VyX2lkIjoiMSJ9.",
+    ),
+)
+def test_hs256_codec_rejects_invalid_token(token: str):
+    with pytest.raises(auth_jwt.TokenDecodeError):
+        auth_jwt.HS256Codec(SECRET_KEY).decode(token)
+
+
+def test_decode_token_caches_verified_claims(monkeypatch: pytest.MonkeyPatch):
+    codec = auth_jwt.get_codec()
+    token = codec.encode(make_claims())
+    data = auth_jwt.decode_token(token)
+
+    def fail(token: str):
+        raise AssertionError("token decoded twice")
+
+    monkeypatch.setattr(codec, "decode", fail)
+    assert auth_jwt.decode_token(token) is data
+
+
+def test_decode_token_invalid():
+    with pytest.raises(InvalidToken):
+        auth_jwt.decode_token("not.a.token")
+    assert len(auth_jwt.verified_tokens) == 0
+
+
+def test_decode_token_revoked_session():
+    token = auth_jwt.get_codec().encode(make_claims())
+    data = auth_jwt.decode_token(token)
+
+    revocation_list.add(data.sid)
+    with pytest.raises(InvalidToken):
+        auth_jwt.decode_token(token)
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from reshal_api.auth.exceptions import PasswordHasherBusy
+from reshal_api.auth.security import PasswordHasher
+
+
+async def test_password_hasher_hash_verify():
+    hasher = PasswordHasher(workers=2, queue_size=2)
+    hashed = await hasher.hash("Password123!")
+
+    assert await hasher.verify("Password123!", hashed)
+    assert not await hasher.verify("Password321!", hashed)
+    assert hasher.pending == 0
+    hasher.shutdown()
+
+
+async def test_password_hasher_sheds_load_when_full():
+    hasher = PasswordHasher(workers=1, queue_size=1)
+
+    results = await asyncio.gather(
+        *(hasher.hash("Password123!") for _ in range(3)), return_exceptions=True
+    )
+
+    assert sum(isinstance(result, str) for result in results) == 2
+    assert isinstance(results[2], PasswordHasherBusy)
+    assert results[2].status_code == 429
+    assert hasher.pending == 0
+    hasher.shutdown()
+
+
+async def test_password_hasher_does_not_block_event_loop():
+    hasher = PasswordHasher(workers=1, queue_size=0)
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    ticker = asyncio.create_task(tick())
+    await hasher.hash("Password123!")
+    ticker.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await ticker
+    assert ticks > 1
+    hasher.shutdown()
@@ -3,7 +3,13 @@ from faker import Faker
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from reshal_api.auth.exceptions import InvalidAuthRequest
-from reshal_api.auth.schemas import AuthRequest, UserCreate, UserUpdate
+from reshal_api.auth.schemas import (
+    AuthRequest,
+    UserCreate,
+    UserImportStatus,
+    UserUpdate,
+)
+from reshal_api.auth.security import pwd_context
 from reshal_api.auth.service import AuthService
 from tests.factories import UserFactory
 
@@ -123,6 +129,28 @@ async def test_authenticate_user(
     assert authenticated_user.id == user.id
 
 
+async def test_authenticate_user_rehashes_outdated_hash(
+    db_session: AsyncSession, auth_service: AuthService, user_factory: UserFactory
+):
+    outdated_hash = (
+        pwd_context.handler("argon2")
+        .using(time_cost=1, memory_cost=8192, parallelism=1)
+        .hash(user_factory._DEFAULT_PASSWORD)
+    )
+    user = user_factory.create(password=outdated_hash)
+    assert pwd_context.needs_update(outdated_hash)
+
+    authenticated_user = await auth_service.authenticate_user(
+        db_session,
+        AuthRequest(email=user.email, password=user_factory._DEFAULT_PASSWORD),
+    )
+    assert authenticated_user.password != outdated_hash
+    assert not pwd_context.needs_update(authenticated_user.password)
+    assert pwd_context.verify(
+        user_factory._DEFAULT_PASSWORD, authenticated_user.password
+    )
+
+
 async def test_authenticate_user_user_does_not_exist(
     db_session: AsyncSession, auth_service: AuthService, user_factory: UserFactory
 ):
@@ -143,3 +171,66 @@ async def test_authenticate_user_invalid_password(
             db_session,
             AuthRequest(email=user.email, password="invalidPassword"),
         )
+
+
+async def test_bulk_create(
+    db_session: AsyncSession, auth_service: AuthService, user_factory: UserFactory
+):
+    existing_user = user_factory.create()
+    rows = [
+        (
+            1,
+            {
+                "email": fake.email(),
+                "firstName": "John",
+                "lastName": "Doe",
+                "password": user_factory._DEFAULT_PASSWORD,
+            },
+        ),
+        (
+            2,
+            {
+                "email": existing_user.email,
+                "firstName": "John",
+                "lastName": "Doe",
+                "password": user_factory._DEFAULT_PASSWORD,
+            },
+        ),
+        (3, {}),
+    ]
+
+    results = await auth_service.bulk_create(db_session, rows, batch_size=1)
+
+    assert [result.status for result in results] == [
+        UserImportStatus.created,
+        UserImportStatus.duplicate,
+        UserImportStatus.invalid,
+    ]
+    user = await auth_service.get_by_email(db_session, rows[0][1]["email"])
+    assert user is not None
+    assert user.id == results[0].id
+    assert await auth_service.is_password_valid(user, user_factory._DEFAULT_PASSWORD)
+
+
+async def test_bulk_create_non_string_email(
+    db_session: AsyncSession, auth_service: AuthService, user_factory: UserFactory
+):
+    rows = [
+        (
+            line,
+            {
+                "email": email,
+                "firstName": "John",
+                "lastName": "Doe",
+                "password": user_factory._DEFAULT_PASSWORD,
+            },
+        )
+        for line, email in enumerate([12345, {"address": "john@example.com"}], 1)
+    ]
+
+    results = await auth_service.bulk_create(db_session, rows)
+
+    assert [(result.status, result.email) for result in results] == [
+        (UserImportStatus.invalid, None),
+        (UserImportStatus.invalid, None),
+    ]
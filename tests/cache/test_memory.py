@@ -0,0 +1,49 @@
+import time
+
+from reshal_api.cache.memory import TTLCache
+
+
+def test_ttl_cache_get_set():
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60)
+
+    assert cache.get("key") is None
+
+    cache.set("key", 1)
+
+    assert cache.get("key") == 1
+
+
+def test_ttl_cache_expired():
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=0.01)
+    cache.set("key", 1)
+    time.sleep(0.02)
+
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_disabled():
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=0)
+    cache.set("key", 1)
+
+    assert cache.get("key") is None
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_delete():
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60)
+    cache.set("key", 1)
+    cache.delete("key")
+
+    assert cache.get("key") is None
@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+
+from reshal_api.cache.memory import MemoryBackend
+from reshal_api.cache.service import Cache
+
+
+@pytest.fixture()
+def cache():
+    return Cache(MemoryBackend(maxsize=100), prefix="test", lock_timeout=1)
+
+
+class Loader:
+    def __init__(self, value, delay: float = 0.01) -> None:
+        self.value = value
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.value
+
+
+async def test_get_or_set(cache: Cache):
+    loader = Loader({"id": "1"})
+
+    assert await cache.get_or_set("facility", "1", loader, ttl=60) == {"id": "1"}
+    assert await cache.get_or_set("facility", "1", loader, ttl=60) == {"id": "1"}
+    assert loader.calls == 1
+
+
+async def test_get_or_set_caches_none(cache: Cache):
+    loader = Loader(None)
+
+    assert await cache.get_or_set("facility", "1", loader, ttl=60) is None
+    assert await cache.get_or_set("facility", "1", loader, ttl=60) is None
+    assert loader.calls == 1
+
+
+async def test_get_or_set_disabled(cache: Cache):
+    loader = Loader(1)
+
+    await cache.get_or_set("facility", "1", loader, ttl=0)
+    await cache.get_or_set("facility", "1", loader, ttl=0)
+
+    assert loader.calls == 2
+
+
+async def test_get_or_set_single_flight(cache: Cache):
+    loader = Loader([1, 2, 3])
+
+    results = await asyncio.gather(
+        *(cache.get_or_set("facility", "1", loader, ttl=60) for _ in range(10))
+    )
+
+    assert results == [[1, 2, 3]] * 10
+    assert loader.calls == 1
+
+
+async def test_get_or_set_loader_cancelled(cache: Cache):
+    loader = Loader({"id": "1"}, delay=0.1)
+
+    leader = asyncio.create_task(cache.get_or_set("facility", "1", loader, ttl=60))
+    await asyncio.sleep(0.01)
+    waiters = [
+        asyncio.create_task(cache.get_or_set("facility", "1", loader, ttl=60))
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    assert await asyncio.gather(*waiters) == [{"id": "1"}] * 3
+    assert leader.cancelled()
+    assert loader.calls == 2
+
+
+async def test_get_or_set_waits_for_lock_holder(cache: Cache):
+    """Another worker holds the lock and fills the cache"""
+    full_key = await cache._key("facility", "1")
+    await cache.backend.add(f"{full_key}:lock", b"1", 1)
+    loader = Loader("from loader")
+
+    async def fill():
+        await asyncio.sleep(0.1)
+        await cache.backend.set(full_key, b'"from other worker"', 60)
+
+    result, _ = await asyncio.gather(
+        cache.get_or_set("facility", "1", loader, ttl=60), fill()
+    )
+
+    assert result == "from other worker"
+    assert loader.calls == 0
+
+
+async def test_get_or_set_keeps_lock_taken_after_timeout():
+    cache = Cache(MemoryBackend(maxsize=100), prefix="test", lock_timeout=0.05)
+    lock_key = f"{await cache._key('facility', '1')}:lock"
+
+    async def loader():
+        await asyncio.sleep(0.1)
+        # Our lock expired and another worker took it
+        assert await cache.backend.add(lock_key, b"other worker", 60)
+        return 1
+
+    assert await cache.get_or_set("facility", "1", loader, ttl=60) == 1
+    assert await cache.backend.get(lock_key) == b"other worker"
+
+
+async def test_invalidate_namespace(cache: Cache):
+    loader = Loader(1)
+    await cache.get_or_set("facility", "1", loader, ttl=60)
+    await cache.get_or_set("facility_types", "all", loader, ttl=60)
+
+    await cache.invalidate_namespace("facility")
+    await cache.get_or_set("facility", "1", loader, ttl=60)
+    await cache.get_or_set("facility_types", "all", loader, ttl=60)
+
+    assert loader.calls == 3
+
+
+async def test_delete(cache: Cache):
+    loader = Loader(1)
+    await cache.get_or_set("user", "1", loader, ttl=60)
+
+    await cache.delete("user", "1")
+    await cache.get_or_set("user", "1", loader, ttl=60)
+
+    assert loader.calls == 2
+
+
+async def test_redis_backend():
+    fakeredis = pytest.importorskip("fakeredis")
+    from reshal_api.cache.redis_backend import RedisBackend
+
+    cache = Cache(
+        RedisBackend(fakeredis.FakeAsyncRedis()), prefix="test", lock_timeout=1
+    )
+    loader = Loader({"name": "Stadium"})
+
+    assert await cache.get_or_set("facility", "1", loader, ttl=60) == loader.value
+    assert await cache.get_or_set("facility", "1", loader, ttl=60) == loader.value
+    await cache.invalidate_namespace("facility")
+    assert await cache.get_or_set("facility", "1", loader, ttl=60) == loader.value
+    assert loader.calls == 2
+
+    await cache.close()
+
+
+async def test_redis_backend_delete_if_equal():
+    fakeredis = pytest.importorskip("fakeredis")
+    from reshal_api.cache.redis_backend import RedisBackend
+
+    backend = RedisBackend(fakeredis.FakeAsyncRedis())
+    await backend.set("lock", b"mine", 60)
+
+    await backend.delete_if_equal("lock", b"other")
+    assert await backend.get("lock") == b"mine"
+
+    await backend.delete_if_equal("lock", b"mine")
+    assert await backend.get("lock") is None
+
+    await backend.close()
@@ -6,12 +6,19 @@ from sqlalchemy import create_engine
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy_utils import create_database, database_exists, drop_database
 
+from reshal_api.auth.jwt import verified_tokens
 from reshal_api.auth.models import UserRole
+from reshal_api.auth.revocation import revocation_list
 from reshal_api.auth.service import AuthService
 from reshal_api.config import DatabaseSettings
 from reshal_api.database import Base
+from reshal_api.cache.memory import MemoryBackend
+from reshal_api.cache.service import get_cache
 from reshal_api.facility.service import FacilityService, FacilityTypeService
 from reshal_api.main import app
+from reshal_api.ratelimit.memory import MemoryBackend as RateLimitMemoryBackend
+from reshal_api.ratelimit.service import get_rate_limiter
+from reshal_api.reservation.availability import availability_cache
 from reshal_api.reservation.service import ReservationService
 from tests.factories import (
     FacilityFactory,
@@ -98,6 +105,20 @@ def session_override(db_session: AsyncSession):
     app.dependency_overrides[AsyncSession] = lambda: db_session
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Factories write through their own session, bypassing cache invalidation"""
+    cache = get_cache()
+    if isinstance(cache.backend, MemoryBackend):
+        cache.backend.clear()
+    availability_cache.clear()
+    verified_tokens.clear()
+    revocation_list.clear()
+    rate_limiter = get_rate_limiter()
+    if isinstance(rate_limiter.backend, RateLimitMemoryBackend):
+        rate_limiter.backend.clear()
+
+
 @pytest.fixture()
 async def client():
     app.dependency_overrides[AsyncSession] = lambda: db_session
@@ -0,0 +1,112 @@
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from reshal_api.email.dispatcher import EmailDispatcher, retry_delay
+from reshal_api.email.models import EmailOutbox, EmailStatus
+from reshal_api.email.service import OUTBOX_PENDING, EmailOutboxService
+from reshal_api.email.transport import FakeTransport
+
+
+def create_dispatcher(
+    db_session: AsyncSession, transport: FakeTransport, max_attempts: int = 3
+) -> EmailDispatcher:
+    # Sessions join the test transaction through a savepoint
+    return EmailDispatcher(
+        transport,
+        async_sessionmaker(bind=db_session.bind, expire_on_commit=False),
+        workers=1,
+        batch_size=10,
+        max_attempts=max_attempts,
+        poll_interval=0.1,
+        retry_backoff=0,
+    )
+
+
+async def dispatch(dispatcher: EmailDispatcher) -> int:
+    claimed = await dispatcher.claim()
+    worker = asyncio.create_task(dispatcher._send_worker())
+    await dispatcher._queue.join()
+    worker.cancel()
+    await dispatcher.flush_results()
+    return claimed
+
+
+async def enqueue(db_session: AsyncSession) -> EmailOutbox:
+    email = await EmailOutboxService().enqueue(
+        db_session, to="user@example.com", subject="Subject", content="<p>Hi</p>"
+    )
+    await db_session.flush()
+    return email
+
+
+async def get_email(db_session: AsyncSession, email: EmailOutbox) -> EmailOutbox:
+    # Expired attributes can't be lazy loaded in async code, read the id first
+    email_id = email.id
+    db_session.expire_all()
+    return (
+        await db_session.execute(select(EmailOutbox).where(EmailOutbox.id == email_id))
+    ).scalar_one()
+
+
+async def test_enqueue_marks_session(db_session: AsyncSession):
+    await enqueue(db_session)
+
+    assert db_session.info[OUTBOX_PENDING] is True
+
+
+async def test_dispatch_sends_pending_email(db_session: AsyncSession):
+    email = await enqueue(db_session)
+    transport = FakeTransport()
+
+    assert await dispatch(create_dispatcher(db_session, transport)) == 1
+
+    assert [message.id for message in transport.sent] == [email.id]
+    email = await get_email(db_session, email)
+    assert email.status == EmailStatus.sent
+    assert email.sent_at is not None
+
+
+async def test_dispatch_skips_claimed_email(db_session: AsyncSession):
+    await enqueue(db_session)
+    dispatcher = create_dispatcher(db_session, FakeTransport())
+
+    assert await dispatcher.claim() == 1
+    # Leased until the first claim is sent or expires
+    assert await dispatcher.claim() == 0
+
+
+async def test_dispatch_retries_failed_email(db_session: AsyncSession):
+    email = await enqueue(db_session)
+    transport = FakeTransport(fail_first=1)
+    dispatcher = create_dispatcher(db_session, transport)
+
+    await dispatch(dispatcher)
+    email = await get_email(db_session, email)
+    assert email.status == EmailStatus.pending
+    assert email.attempts == 1
+    assert email.last_error is not None
+
+    await dispatch(dispatcher)
+    email = await get_email(db_session, email)
+    assert email.status == EmailStatus.sent
+    assert len(transport.sent) == 1
+
+
+async def test_dispatch_gives_up_after_max_attempts(db_session: AsyncSession):
+    email = await enqueue(db_session)
+    dispatcher = create_dispatcher(db_session, FakeTransport(fail_first=2), 2)
+
+    await dispatch(dispatcher)
+    await dispatch(dispatcher)
+
+    email = await get_email(db_session, email)
+    assert email.status == EmailStatus.failed
+    assert email.attempts == 2
+    assert await dispatch(dispatcher) == 0
+
+
+def test_retry_delay_is_capped():
+    for attempts in range(1, 30):
+        assert 0 <= retry_delay(attempts, base=30, cap=600) <= 600
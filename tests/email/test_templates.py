@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from reshal_api.email.service import TemplatesService
+
+CONTEXT = {
+    "first_name": "John",
+    "facility_name": "Court 1",
+    "start_time": "2026-10-17 10:00",
+    "end_time": "2026-10-17 11:00",
+    "price": "$25.00",
+}
+
+
+async def test_create_reservation_successfull_content():
+    content = await TemplatesService().create_reservation_successfull_content(**CONTEXT)
+
+    assert "Dear John," in content
+    assert "Court 1" in content
+    assert "$25.00" in content
+
+
+async def test_render_many():
+    service = TemplatesService()
+    contexts = [{**CONTEXT, "first_name": name} for name in ("Ann", "Bob")]
+
+    rendered = await service.render_many(service.RESERVATION_CREATED, contexts)
+
+    assert len(rendered) == 2
+    assert "Dear Ann," in rendered[0]
+    assert "Dear Bob," in rendered[1]
+
+
+async def test_precompiled_templates_render_the_same(tmp_path: Path):
+    (tmp_path / "cache").mkdir()
+    service = TemplatesService(bytecode_cache_dir=str(tmp_path / "cache"))
+    service.compile(str(tmp_path / "compiled"))
+    precompiled = TemplatesService(precompiled_dir=str(tmp_path / "compiled"))
+
+    assert await precompiled.render(
+        service.RESERVATION_CREATED, CONTEXT
+    ) == await service.render(service.RESERVATION_CREATED, CONTEXT)
@@ -1,4 +1,5 @@
 from datetime import datetime, timedelta, timezone
+from decimal import Decimal
 
 import humps
 import pytest
@@ -9,6 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from reshal_api.auth.models import UserRole
 from reshal_api.auth.service import AuthService
+from reshal_api.facility.geo import haversine
 from reshal_api.facility.models import Facility, FacilityType
 from reshal_api.facility.schemas import FacilityCreate, FacilityReadAdmin
 from tests.database import scoped_session_local
@@ -112,6 +114,40 @@ async def test_facility_get_all(client: AsyncClient, facility_factory: FacilityF
     )
 
 
+async def test_facility_get_all_paginated(
+    client: AsyncClient, facility_factory: FacilityFactory
+):
+    facilities = facility_factory.create_batch(3)
+    newest_first = [str(facility.id) for facility in reversed(facilities)]
+
+    response = await client.get("/facilities", params={"limit": 2})
+    assert response.status_code == 200
+    assert [f["id"] for f in response.json()] == newest_first[:2]
+
+    cursor = response.headers["X-Next-Cursor"]
+    response = await client.get("/facilities", params={"limit": 1, "cursor": cursor})
+    assert response.status_code == 200
+    assert [f["id"] for f in response.json()] == newest_first[2:]
+
+
+async def test_facility_get_all_unpaged_by_default(
+    client: AsyncClient, facility_factory: FacilityFactory
+):
+    facilities = facility_factory.create_batch(3)
+
+    response = await client.get("/facilities")
+    assert response.status_code == 200
+    ids = [f["id"] for f in response.json()]
+    assert all(str(facility.id) in ids for facility in facilities)
+    assert "X-Next-Cursor" not in response.headers
+
+
+async def test_facility_get_all_invalid_cursor(client: AsyncClient):
+    response = await client.get("/facilities", params={"cursor": "invalid"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
 async def test_facility_get_by_id(
     client: AsyncClient, facility_factory: FacilityFactory
 ):
@@ -122,6 +158,12 @@ async def test_facility_get_by_id(
     assert response.json()["id"] == str(facility.id)
 
 
+async def test_facility_get_by_id_malformed_id(client: AsyncClient):
+    response = await client.get("/facilities/not-a-uuid")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Facility not found"
+
+
 async def test_create_facility(
     admin_client: AuthClientFixture,
     facility_type_factory: FacilityTypeFactory,
@@ -433,3 +475,130 @@ async def test_facility_delete_rasies_if_reserations_in_future(
 
     response = await admin_client.client.get(f"/facilities/{str(facility.id)}")
     assert response.status_code == 200
+
+
+async def test_facility_availability(
+    client: AsyncClient,
+    facility_factory: FacilityFactory,
+    reservation_factory: ReservationFactory,
+    payment_factory: PaymentFactory,
+):
+    facility = facility_factory.create()
+    base_dt = datetime.now(tz=timezone.utc).replace(
+        minute=0, second=0, microsecond=0
+    ) + timedelta(days=3)
+    reservation_factory.create(
+        start_time=base_dt + timedelta(hours=1),
+        end_time=base_dt + timedelta(hours=2),
+        facility_id=facility.id,
+        payment_id=payment_factory.create().id,
+    )
+
+    response = await client.get(
+        f"/facilities/{facility.id}/availability",
+        params={
+            "from": base_dt.isoformat(),
+            "to": (base_dt + timedelta(hours=4)).isoformat(),
+            "slot": 60,
+        },
+    )
+    assert response.status_code == 200
+    assert [datetime.fromisoformat(slot["startTime"]) for slot in response.json()] == [
+        base_dt,
+        base_dt + timedelta(hours=2),
+        base_dt + timedelta(hours=3),
+    ]
+
+
+async def test_facility_availability_invalid_window(
+    client: AsyncClient, facility_factory: FacilityFactory
+):
+    facility = facility_factory.create()
+    base_dt = datetime.now(tz=timezone.utc)
+
+    response = await client.get(
+        f"/facilities/{facility.id}/availability",
+        params={
+            "from": base_dt.isoformat(),
+            "to": (base_dt - timedelta(hours=1)).isoformat(),
+        },
+    )
+    assert response.status_code == 400
+
+
+async def test_search_available_facilities(
+    client: AsyncClient,
+    facility_type_factory: FacilityTypeFactory,
+    facility_factory: FacilityFactory,
+    reservation_factory: ReservationFactory,
+    payment_factory: PaymentFactory,
+):
+    facility_type = facility_type_factory.create()
+    free_facility, reserved_facility = facility_factory.create_batch(
+        2, type=facility_type
+    )
+    facility_factory.create()  # other type
+    base_dt = datetime.now(tz=timezone.utc) + timedelta(days=5)
+    reservation_factory.create(
+        start_time=base_dt + timedelta(minutes=30),
+        end_time=base_dt + timedelta(hours=1),
+        facility_id=reserved_facility.id,
+        payment_id=payment_factory.create().id,
+    )
+
+    response = await client.post(
+        "/facilities/search/available",
+        json={
+            "startTime": base_dt.isoformat(),
+            "endTime": (base_dt + timedelta(hours=2)).isoformat(),
+            "typeId": str(facility_type.id),
+        },
+    )
+    assert response.status_code == 200
+
+    response_data = response.json()
+    assert [item["facility"]["id"] for item in response_data] == [str(free_facility.id)]
+    assert Decimal(response_data[0]["price"]) == free_facility.price * 2
+
+
+async def test_facilities_nearby(
+    client: AsyncClient, facility_factory: FacilityFactory
+):
+    lat, lon = Decimal("-45.12345678"), Decimal("-120.12345678")
+    near = facility_factory.create(lat=lat, lon=lon + Decimal("0.01"))
+    nearest = facility_factory.create(lat=lat, lon=lon)
+    facility_factory.create(lat=lat + Decimal("1"), lon=lon)  # ~111km away
+
+    response = await client.get(
+        "/facilities/nearby",
+        params={"lat": str(lat), "lon": str(lon), "radius": 10_000},
+    )
+    assert response.status_code == 200
+
+    response_data = response.json()
+    assert [item["facility"]["id"] for item in response_data] == [
+        str(nearest.id),
+        str(near.id),
+    ]
+    assert response_data[0]["distance"] == pytest.approx(0, abs=1)
+    assert response_data[1]["distance"] == pytest.approx(
+        haversine(float(lat), float(lon), float(lat), float(lon) + 0.01), rel=1e-2
+    )
+
+
+async def test_get_facility_by_id_cache_invalidated_on_update(
+    admin_client: AuthClientFixture, facility_factory: FacilityFactory
+):
+    facility = facility_factory.create()
+
+    response = await admin_client.client.get(f"/facilities/{facility.id}")
+    assert response.status_code == 200
+
+    response = await admin_client.client.put(
+        f"/facilities/{facility.id}", json={"name": "Updated name"}
+    )
+    assert response.status_code == 200
+
+    response = await admin_client.client.get(f"/facilities/{facility.id}")
+    assert response.status_code == 200
+    assert response.json()["name"] == "Updated name"
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from reshal_api.facility.geo import (
+    GeohashIndex,
+    geohash_encode,
+    haversine,
+    nearby_full_scan,
+)
+
+
+def test_geohash_encode():
+    assert geohash_encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+
+@pytest.mark.parametrize(
+    "lat1, lon1, lat2, lon2, expected",
+    (
+        (0, 0, 0, 0, 0),
+        (0, 0, 0, 1, 111_319),
+        (50.0614, 19.9366, 52.2297, 21.0122, 252_785),
+    ),
+)
+def test_haversine(lat1: float, lon1: float, lat2: float, lon2: float, expected: int):
+    assert haversine(lat1, lon1, lat2, lon2) == pytest.approx(expected, rel=1e-3)
+
+
+@pytest.mark.parametrize(
+    "lat, lon, radius",
+    (
+        (50.0614, 19.9366, 5_000),
+        (50.0614, 19.9366, 100_000),
+        (10.0, 179.99, 50_000),  # crosses the antimeridian
+        (89.9, 0.0, 50_000),  # touches the pole
+    ),
+)
+def test_geohash_index_matches_full_scan(lat: float, lon: float, radius: float):
+    rng = random.Random(0)
+    points = [
+        (i, lat + rng.uniform(-1, 1), (lon + rng.uniform(-1, 1) + 180) % 360 - 180)
+        for i in range(2000)
+    ]
+    points = [(i, min(max(p_lat, -90), 90), p_lon) for i, p_lat, p_lon in points]
+    index: GeohashIndex[int] = GeohashIndex(precision=4)
+    index.add_many(points)
+
+    result = index.nearby(lat, lon, radius, limit=50)
+
+    assert result == nearby_full_scan(points, lat, lon, radius, limit=50)
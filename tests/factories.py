@@ -1,5 +1,5 @@
 import random
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 import factory
 from factory.alchemy import SQLAlchemyModelFactory
@@ -114,8 +114,10 @@ class ReservationFactory(BaseFactory):
     class Meta:
         model = Reservation
 
-    start_time = factory.Faker(
-        "date_time_this_year", before_now=False, after_now=True, tzinfo=UTC
+    # Spaced out so reservations for the same facility never overlap
+    start_time = factory.Sequence(
+        lambda n: datetime.now(tz=UTC).replace(minute=0, second=0, microsecond=0)
+        + timedelta(days=365, hours=2 * n)
     )
     end_time = factory.LazyAttribute(lambda obj: obj.start_time + timedelta(hours=1))
     price = factory.Faker("pydecimal", left_digits=2, right_digits=2, positive=True)
@@ -0,0 +1,102 @@
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from reshal_api.profiling.middleware import ProfilingMiddleware, get_profile_store
+from reshal_api.profiling.sampler import Profile, ProfileStore
+from tests.utils import AuthClientFixture
+
+
+@pytest.fixture(autouse=True)
+def profile_store():
+    store = get_profile_store()
+    store.clear()
+    yield store
+    store.clear()
+
+
+def create_app(store: ProfileStore, sample_every: int) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(
+        ProfilingMiddleware, sample_every=sample_every, interval=0.001, store=store
+    )
+
+    @app.get("/slow")
+    async def slow():
+        end = time.perf_counter() + 0.02
+        while time.perf_counter() < end:
+            pass
+        return {}
+
+    return app
+
+
+async def test_profiling_middleware_samples_requests():
+    store = ProfileStore(10)
+    app = create_app(store, sample_every=2)
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        responses = [await client.get("/slow") for _ in range(4)]
+
+    profiles = store.list()
+    assert len(profiles) == 2
+    assert [response.headers.get("x-profile-id") for response in responses] == [
+        None,
+        profiles[1].id,
+        None,
+        profiles[0].id,
+    ]
+    assert profiles[0].status_code == 200
+    assert profiles[0].samples > 0
+
+
+async def test_profiling_middleware_profile_header(admin_client: AuthClientFixture):
+    store = ProfileStore(10)
+    app = create_app(store, sample_every=0)
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        await client.get("/slow", headers={"X-Profile": "1"})
+    assert store.list() == []
+
+    async with httpx.AsyncClient(
+        app=app, base_url="http://test", cookies=admin_client.client.cookies
+    ) as client:
+        response = await client.get("/slow", headers={"X-Profile": "1"})
+
+    assert [profile.id for profile in store.list()] == [
+        response.headers["x-profile-id"]
+    ]
+
+
+async def test_get_profiles(
+    admin_client: AuthClientFixture, profile_store: ProfileStore
+):
+    profile = Profile("GET", "/facilities", interval=0.001)
+    profile.stacks[(("handler", "app.py", 1),)] = 2
+    profile_store.add(profile)
+
+    response = await admin_client.client.get("/profiles")
+    assert response.status_code == 200
+    assert [row["id"] for row in response.json()] == [profile.id]
+    assert response.json()[0]["samples"] == 2
+
+    response = await admin_client.client.get(f"/profiles/{profile.id}")
+    assert response.status_code == 200
+    assert response.json()["profiles"][0]["weights"] == [0.002]
+
+    response = await admin_client.client.get(
+        f"/profiles/{profile.id}", params={"format": "collapsed"}
+    )
+    assert response.text == "handler (app.py:1) 2"
+
+
+async def test_get_profile_not_found(admin_client: AuthClientFixture):
+    response = await admin_client.client.get("/profiles/missing")
+    assert response.status_code == 404
+
+
+async def test_get_profiles_forbidden(auth_client: AuthClientFixture):
+    response = await auth_client.client.get("/profiles")
+    assert response.status_code == 403
@@ -0,0 +1,96 @@
+import asyncio
+import sys
+import time
+
+from reshal_api.profiling.sampler import Profile, ProfileStore, StackSampler
+
+ROOT = ("handle", "app.py", 1)
+HANDLER = ("handler", "app.py", 10)
+QUERY = ("query", "db.py", 5)
+
+
+def create_profile() -> Profile:
+    profile = Profile("GET", "/facilities", interval=0.001)
+    profile.stacks[(ROOT, HANDLER)] = 3
+    profile.stacks[(ROOT, HANDLER, QUERY)] = 2
+    return profile
+
+
+def test_collapsed():
+    assert create_profile().collapsed().splitlines() == [
+        "handle (app.py:1);handler (app.py:10) 3",
+        "handle (app.py:1);handler (app.py:10);query (db.py:5) 2",
+    ]
+
+
+def test_speedscope():
+    speedscope = create_profile().speedscope()
+
+    frames = speedscope["shared"]["frames"]
+    assert [frame["name"] for frame in frames] == ["handle", "handler", "query"]
+    (profile,) = speedscope["profiles"]
+    assert profile["samples"] == [[0, 1], [0, 1, 2]]
+    assert profile["weights"] == [0.003, 0.002]
+    assert profile["endValue"] == 0.005
+
+
+def test_profile_store_keeps_the_latest():
+    store = ProfileStore(2)
+    profiles = [create_profile() for _ in range(3)]
+    for profile in profiles:
+        store.add(profile)
+
+    assert store.list() == [profiles[2], profiles[1]]
+    assert store.get(profiles[0].id) is None
+    assert store.get(profiles[1].id) is profiles[1]
+
+
+def busy_work(duration: float) -> None:
+    end = time.perf_counter() + duration
+    while time.perf_counter() < end:
+        pass
+
+
+async def profiled_request(sampler: StackSampler, profile: Profile) -> None:
+    profile.root = sys._getframe()
+    sampler.start(profile)
+    try:
+        busy_work(0.05)
+        await asyncio.sleep(0)
+    finally:
+        sampler.stop(profile)
+
+
+async def other_request() -> None:
+    busy_work(0.05)
+
+
+async def test_stack_sampler_only_samples_the_profiled_request():
+    sampler = StackSampler(interval=0.001)
+    profile = Profile("GET", "/", interval=sampler.interval)
+
+    await asyncio.gather(profiled_request(sampler, profile), other_request())
+
+    assert profile.samples > 0
+    functions = {name for stack in profile.stacks for name, _, _ in stack}
+    assert "busy_work" in functions
+    assert "other_request" not in functions
+    assert all(stack[0][0] == "profiled_request" for stack in profile.stacks)
+
+
+def test_stack_sampler_ignores_samples_after_stop():
+    sampler = StackSampler(interval=0.001)
+    profile = Profile("GET", "/", interval=sampler.interval)
+    frame = sys._getframe()
+    profile.root = frame
+    sampler.start(profile)
+    sampler.sample(frame, [profile])
+    sampler.stop(profile)
+    samples = profile.samples
+    assert samples > 0
+
+    # A sample the thread took while the profile was still active
+    profile.root = frame
+    sampler.sample(frame, [profile])
+
+    assert profile.samples == samples
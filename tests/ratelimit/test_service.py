@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from reshal_api.exceptions import TooManyRequests
+from reshal_api.ratelimit.memory import MemoryBackend
+from reshal_api.ratelimit.service import RateLimiter
+
+
+@pytest.fixture()
+def rate_limiter():
+    return RateLimiter(MemoryBackend(maxsize=100), prefix="test")
+
+
+async def test_hit_within_limit(rate_limiter: RateLimiter):
+    for _ in range(5):
+        await rate_limiter.hit("scope", "key", limit=5, window=60)
+
+
+async def test_hit_over_limit(rate_limiter: RateLimiter):
+    for _ in range(5):
+        await rate_limiter.hit("scope", "key", limit=5, window=60)
+
+    with pytest.raises(TooManyRequests) as exc_info:
+        await rate_limiter.hit("scope", "key", limit=5, window=60)
+
+    assert exc_info.value.status_code == 429
+    # One token is refilled every 12 seconds
+    assert exc_info.value.headers == {"Retry-After": "12"}
+
+
+async def test_hit_keys_are_independent(rate_limiter: RateLimiter):
+    await rate_limiter.hit("scope", "key", limit=1, window=60)
+    await rate_limiter.hit("scope", "other", limit=1, window=60)
+    await rate_limiter.hit("other_scope", "key", limit=1, window=60)
+
+    with pytest.raises(TooManyRequests):
+        await rate_limiter.hit("scope", "key", limit=1, window=60)
+
+
+async def test_memory_backend_refills():
+    backend = MemoryBackend(maxsize=100)
+
+    assert await backend.hit("key", limit=2, window=0.05) == 0
+    assert await backend.hit("key", limit=2, window=0.05) == 0
+    assert await backend.hit("key", limit=2, window=0.05) > 0
+
+    await asyncio.sleep(0.05)
+    assert await backend.hit("key", limit=2, window=0.05) == 0
+
+
+async def test_redis_backend():
+    fakeredis = pytest.importorskip("fakeredis")
+    from reshal_api.ratelimit.redis_backend import RedisBackend
+
+    rate_limiter = RateLimiter(RedisBackend(fakeredis.FakeAsyncRedis()), prefix="test")
+    for _ in range(3):
+        await rate_limiter.hit("scope", "key", limit=3, window=60)
+
+    with pytest.raises(TooManyRequests):
+        await rate_limiter.hit("scope", "key", limit=3, window=60)
+    await rate_limiter.close()
@@ -0,0 +1,77 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from reshal_api.reservation.availability import (
+    AvailabilityCache,
+    TimeSlot,
+    free_intervals,
+    iter_days,
+    merge_intervals,
+    split_into_slots,
+)
+
+BASE_DT = datetime(2030, 1, 1, 8, tzinfo=timezone.utc)
+
+
+def slot(start_hours: float, end_hours: float) -> TimeSlot:
+    return TimeSlot(
+        BASE_DT + timedelta(hours=start_hours), BASE_DT + timedelta(hours=end_hours)
+    )
+
+
+def test_merge_intervals():
+    intervals = [slot(3, 4), slot(0, 1), slot(1, 2), slot(5, 7), slot(6, 6.5)]
+
+    assert merge_intervals(intervals) == [slot(0, 2), slot(3, 4), slot(5, 7)]
+
+
+def test_free_intervals():
+    busy = [slot(1, 2), slot(-1, 0.5), slot(3, 4), slot(9, 12)]
+
+    result = free_intervals(busy, BASE_DT, BASE_DT + timedelta(hours=10))
+
+    assert result == [slot(0.5, 1), slot(2, 3), slot(4, 9)]
+
+
+def test_free_intervals_no_reservations():
+    end_time = BASE_DT + timedelta(hours=10)
+
+    assert free_intervals([], BASE_DT, end_time) == [TimeSlot(BASE_DT, end_time)]
+
+
+def test_split_into_slots():
+    free = [slot(0, 2.5), slot(3, 3.5)]
+
+    result = split_into_slots(free, timedelta(hours=1))
+
+    assert result == [slot(0, 1), slot(1, 2)]
+
+
+def test_iter_days():
+    start_time = datetime(2030, 1, 1, 22, tzinfo=timezone.utc)
+
+    assert list(iter_days(start_time, start_time + timedelta(hours=2))) == [
+        start_time.date()
+    ]
+    assert len(list(iter_days(start_time, start_time + timedelta(hours=3)))) == 2
+
+
+def test_availability_cache_invalidate():
+    cache = AvailabilityCache(ttl=60)
+    facility_id = uuid.uuid4()
+    day = BASE_DT.date()
+    cache.set(facility_id, day, [slot(0, 1)])
+
+    assert cache.get(facility_id, day) == [slot(0, 1)]
+
+    cache.invalidate(facility_id, *slot(0, 1))
+
+    assert cache.get(facility_id, day) is None
+
+
+def test_availability_cache_expired():
+    cache = AvailabilityCache(ttl=-1)
+    facility_id = uuid.uuid4()
+    cache.set(facility_id, BASE_DT.date(), [])
+
+    assert cache.get(facility_id, BASE_DT.date()) is None
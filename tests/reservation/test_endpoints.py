@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 
+import orjson
 import pytest
 import pytz
 from httpx import AsyncClient
@@ -53,6 +54,41 @@ async def test_get_all(
     )
 
 
+@pytest.mark.parametrize("export_format", ("ndjson", "json"))
+async def test_export(
+    export_format: str,
+    admin_client: AuthClientFixture,
+    facility_factory: FacilityFactory,
+    payment_factory: PaymentFactory,
+    reservation_factory: ReservationFactory,
+):
+    facility = facility_factory.create()
+    reservations = [
+        reservation_factory.create(
+            facility_id=facility.id,
+            payment_id=payment_factory.create().id,
+            start_time=BASE_DT + timedelta(days=i),
+            end_time=BASE_DT + timedelta(days=i, hours=1),
+        )
+        for i in range(5)
+    ]
+
+    response = await admin_client.client.get(
+        "/reservations/export", params={"format": export_format}
+    )
+    assert response.status_code == 200
+
+    if export_format == "ndjson":
+        assert response.headers["content-type"] == "application/x-ndjson"
+        data = [orjson.loads(line) for line in response.text.splitlines()]
+    else:
+        data = response.json()
+
+    assert all(
+        (str(reservation.id) in [r["id"] for r in data] for reservation in reservations)
+    )
+
+
 async def test_get_all_skips_if_facility_id_null(
     admin_client: AuthClientFixture,
     facility_factory: FacilityFactory,
@@ -154,6 +190,72 @@ async def test_create(
     assert reservation
 
 
+async def test_create_reservation_overlapping(
+    admin_client: AuthClientFixture,
+    facility_factory: FacilityFactory,
+    payment_factory: PaymentFactory,
+    reservation_factory: ReservationFactory,
+):
+    facility = facility_factory.create()
+    start_time = BASE_DT + timedelta(days=14)
+    reservation_factory.create(
+        facility_id=facility.id,
+        payment_id=payment_factory.create().id,
+        start_time=start_time,
+        end_time=start_time + timedelta(hours=2),
+    )
+
+    data = {
+        "facilityId": str(facility.id),
+        "startTime": (start_time + timedelta(hours=1)).isoformat(),
+        "endTime": (start_time + timedelta(hours=3)).isoformat(),
+    }
+
+    response = await admin_client.client.post("/reservations", json=data)
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Reservation overlaps with another reservation"
+
+    # Back to back reservations don't overlap
+    data["startTime"] = (start_time + timedelta(hours=2)).isoformat()
+    response = await admin_client.client.post("/reservations", json=data)
+    assert response.status_code == 201
+
+
+async def test_create_reservation_invalidates_availability(
+    admin_client: AuthClientFixture,
+    facility_factory: FacilityFactory,
+):
+    facility = facility_factory.create()
+    start_time = (BASE_DT + timedelta(days=21)).replace(
+        minute=0, second=0, microsecond=0
+    )
+    params = {
+        "from": start_time.isoformat(),
+        "to": (start_time + timedelta(hours=2)).isoformat(),
+        "slot": 60,
+    }
+
+    response = await admin_client.client.get(
+        f"/facilities/{facility.id}/availability", params=params
+    )
+    assert len(response.json()) == 2
+
+    data = {
+        "facilityId": str(facility.id),
+        "startTime": start_time.isoformat(),
+        "endTime": (start_time + timedelta(hours=1)).isoformat(),
+    }
+    response = await admin_client.client.post("/reservations", json=data)
+    assert response.status_code == 201
+
+    response = await admin_client.client.get(
+        f"/facilities/{facility.id}/availability", params=params
+    )
+    assert [datetime.fromisoformat(slot["startTime"]) for slot in response.json()] == [
+        start_time + timedelta(hours=1)
+    ]
+
+
 async def test_create_reservation_length_too_short(
     admin_client: AuthClientFixture,
     facility_factory: FacilityFactory,
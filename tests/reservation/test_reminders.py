@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+import pytz
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from reshal_api.email.models import EmailOutbox
+from reshal_api.email.service import EmailOutboxService, TemplatesService
+from reshal_api.reservation.models import Reservation
+from reshal_api.reservation.reminders import send_reservation_reminders
+from tests.factories import (
+    FacilityFactory,
+    PaymentFactory,
+    ReservationFactory,
+    UserFactory,
+)
+
+
+async def send_reminders(db_session: AsyncSession) -> int:
+    return await send_reservation_reminders(
+        async_sessionmaker(bind=db_session.bind, expire_on_commit=False),
+        TemplatesService(),
+        EmailOutboxService(),
+        ahead=timedelta(hours=24),
+        batch_size=2,
+    )
+
+
+async def test_send_reservation_reminders(
+    db_session: AsyncSession,
+    user_factory: UserFactory,
+    facility_factory: FacilityFactory,
+    payment_factory: PaymentFactory,
+    reservation_factory: ReservationFactory,
+):
+    user = user_factory.create()
+    facility = facility_factory.create()
+    now = datetime.now(tz=pytz.UTC)
+    due = [
+        reservation_factory.create(
+            start_time=now + timedelta(hours=hours),
+            end_time=now + timedelta(hours=hours, minutes=30),
+            user_id=user.id,
+            facility_id=facility.id,
+            payment_id=payment_factory.create().id,
+        )
+        for hours in (1, 2, 3)
+    ]
+    later = reservation_factory.create(
+        start_time=now + timedelta(hours=30),
+        end_time=now + timedelta(hours=31),
+        user_id=user.id,
+        facility_id=facility.id,
+        payment_id=payment_factory.create().id,
+    )
+
+    assert await send_reminders(db_session) >= len(due)
+
+    reminded = set(
+        (
+            await db_session.execute(
+                select(Reservation.id).where(Reservation.reminder_sent_at.is_not(None))
+            )
+        ).scalars()
+    )
+    assert {reservation.id for reservation in due} <= reminded
+    assert later.id not in reminded
+
+    emails = (
+        await db_session.execute(
+            select(EmailOutbox).where(EmailOutbox.recipient == user.email)
+        )
+    ).scalars()
+    contents = [email.content for email in emails]
+    assert len(contents) == len(due)
+    assert all(facility.name in content for content in contents)
+
+    # Reminded reservations are skipped on the next run
+    assert await send_reminders(db_session) == 0
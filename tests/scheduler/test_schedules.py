@@ -0,0 +1,61 @@
+from datetime import datetime
+
+import pytest
+
+from reshal_api.scheduler.schedules import Cron, Interval, parse_cron_field
+
+
+def test_interval_next_run():
+    assert Interval(90).next_run(datetime(2026, 1, 1, 12, 0)) == datetime(
+        2026, 1, 1, 12, 1, 30
+    )
+
+
+@pytest.mark.parametrize(
+    "field, expected",
+    (
+        ("*", set(range(0, 60))),
+        ("5", {5}),
+        ("1-3", {1, 2, 3}),
+        ("*/20", {0, 20, 40}),
+        ("10-30/10", {10, 20, 30}),
+        ("5/20", {5, 25, 45}),
+        ("1,2,40-41", {1, 2, 40, 41}),
+    ),
+)
+def test_parse_cron_field(field: str, expected: set[int]):
+    assert parse_cron_field(field, 0, 59) == expected
+
+
+@pytest.mark.parametrize(
+    "expression", ("* * * *", "60 * * * *", "* * 0 * *", "5-1 * * * *", "*/0 * * * *")
+)
+def test_invalid_cron(expression: str):
+    with pytest.raises(ValueError):
+        Cron(expression)
+
+
+@pytest.mark.parametrize(
+    "expression, after, expected",
+    (
+        ("*/10 * * * *", datetime(2026, 1, 1, 12, 3, 15), datetime(2026, 1, 1, 12, 10)),
+        ("*/10 * * * *", datetime(2026, 1, 1, 12, 10), datetime(2026, 1, 1, 12, 20)),
+        ("0 3 * * *", datetime(2026, 1, 1, 12, 0), datetime(2026, 1, 2, 3, 0)),
+        ("30 8 1 * *", datetime(2026, 1, 31, 9, 0), datetime(2026, 2, 1, 8, 30)),
+        ("0 0 29 2 *", datetime(2026, 3, 1), datetime(2028, 2, 29)),
+        # 2026-10-17 is a Saturday, Sunday is both 0 and 7
+        ("0 9 * * 0", datetime(2026, 10, 17), datetime(2026, 10, 18, 9, 0)),
+        ("0 9 * * 7", datetime(2026, 10, 17), datetime(2026, 10, 18, 9, 0)),
+        ("0 9 * * 1-5", datetime(2026, 10, 17), datetime(2026, 10, 19, 9, 0)),
+        # Either restricted day field matching is enough
+        ("0 9 20 * 0", datetime(2026, 10, 17), datetime(2026, 10, 18, 9, 0)),
+        ("0 9 20 * 0", datetime(2026, 10, 18, 10), datetime(2026, 10, 20, 9, 0)),
+    ),
+)
+def test_cron_next_run(expression: str, after: datetime, expected: datetime):
+    assert Cron(expression).next_run(after) == expected
+
+
+def test_cron_never_matching():
+    with pytest.raises(ValueError):
+        Cron("0 0 31 2 *").next_run(datetime(2026, 1, 1))
@@ -0,0 +1,74 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from reshal_api.scheduler.schedules import Interval
+from reshal_api.scheduler.service import Scheduler
+
+LOCK_ID = 918273645
+
+
+async def test_single_leader(async_engine: AsyncEngine):
+    first = Scheduler(async_engine, LOCK_ID, leader_retry=1)
+    second = Scheduler(async_engine, LOCK_ID, leader_retry=1)
+
+    try:
+        assert await first.acquire()
+        assert not await second.acquire()
+        # The leader keeps its lock
+        assert await first.acquire()
+
+        await first.release()
+        assert await second.acquire()
+    finally:
+        await first.release()
+        await second.release()
+
+
+async def test_run_pending_runs_due_jobs(async_engine: AsyncEngine):
+    runs: list[str] = []
+    started = asyncio.Event()
+
+    async def job() -> None:
+        runs.append("job")
+        started.set()
+
+    scheduler = Scheduler(async_engine, LOCK_ID, leader_retry=1)
+    scheduler.add_job("job", job, Interval(60))
+    try:
+        assert await scheduler.acquire()
+        now = datetime.utcnow()
+        scheduler.run_pending(now)
+        assert runs == []
+
+        scheduler.run_pending(now + timedelta(seconds=61))
+        await asyncio.wait_for(started.wait(), 1)
+        assert runs == ["job"]
+        assert scheduler.jobs["job"].next_run_at == now + timedelta(seconds=121)
+    finally:
+        await scheduler.release()
+
+
+async def test_run_pending_skips_running_job(async_engine: AsyncEngine):
+    runs: list[str] = []
+    release = asyncio.Event()
+
+    async def job() -> None:
+        runs.append("job")
+        await release.wait()
+
+    scheduler = Scheduler(async_engine, LOCK_ID, leader_retry=1)
+    scheduler.add_job("job", job, Interval(1))
+    try:
+        assert await scheduler.acquire()
+        now = datetime.utcnow()
+        scheduler.run_pending(now + timedelta(seconds=1))
+        await asyncio.sleep(0)
+        scheduler.run_pending(now + timedelta(seconds=3))
+        await asyncio.sleep(0)
+
+        assert runs == ["job"]
+    finally:
+        release.set()
+        await scheduler.release()
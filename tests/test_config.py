@@ -0,0 +1,13 @@
+import inspect
+
+import uvicorn
+
+from reshal_api.config import UvicornSettings
+
+
+def test_uvicorn_settings_are_uvicorn_options():
+    settings = UvicornSettings(forwarded_allow_ips="10.0.0.2")
+
+    assert set(settings.dict()) <= set(inspect.signature(uvicorn.Config).parameters)
+    assert settings.dict()["forwarded_allow_ips"] == "10.0.0.2"
+    assert settings.proxy_headers is True
@@ -0,0 +1,200 @@
+import asyncio
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from reshal_api.config import DatabaseSettings, ReplicaDatabaseSettings, get_config
+from reshal_api.database import (
+    ReplicaRouter,
+    after_commit,
+    create_engine_from_settings,
+    run_after_commit,
+    sessionmaker,
+)
+
+
+def test_engine_options():
+    db_config = DatabaseSettings(
+        POOL_SIZE=20,
+        MAX_OVERFLOW=5,
+        POOL_PRE_PING=True,
+        POOL_RECYCLE=600,
+        POOL_TIMEOUT=2.5,
+        STATEMENT_TIMEOUT=5000,
+        STATEMENT_CACHE_SIZE=0,
+    )
+
+    options = db_config.engine_options
+
+    assert options["pool_size"] == 20
+    assert options["max_overflow"] == 5
+    assert options["pool_pre_ping"] is True
+    assert options["pool_recycle"] == 600
+    assert options["pool_timeout"] == 2.5
+    assert options["connect_args"] == {
+        "prepared_statement_cache_size": 0,
+        "server_settings": {"statement_timeout": "5000"},
+    }
+
+
+def test_engine_options_connect_args_only_for_asyncpg():
+    db_config = DatabaseSettings(DRIVER="psycopg2", STATEMENT_TIMEOUT=5000)
+
+    assert db_config.engine_options["connect_args"] == {}
+
+
+async def test_pool_wait_time_recorded_on_checkout(async_engine: AsyncEngine):
+    engine = create_engine_from_settings(DatabaseSettings())
+    labels = {"app_name": get_config().OTLP_APP_NAME}
+
+    def checkouts() -> float:
+        name = "db_pool_wait_duration_seconds_count"
+        return REGISTRY.get_sample_value(name, labels) or 0
+
+    try:
+        before = checkouts()
+        async with async_sessionmaker(bind=engine)() as session:
+            async with session.begin():
+                # No SQL yet, no connection is taken from the pool
+                assert checkouts() == before
+                await session.execute(select(1))
+
+        assert checkouts() == before + 1
+    finally:
+        await engine.dispose()
+
+
+def test_replica_urls():
+    replica_config = ReplicaDatabaseSettings(HOSTS=["replica1", "replica2:5433"])
+
+    assert [url.split("@")[1] for url in replica_config.urls] == [
+        f"replica1:{replica_config.PORT}/{replica_config.NAME}",
+        f"replica2:5433/{replica_config.NAME}",
+    ]
+
+
+async def test_replica_router_without_replicas_uses_primary():
+    router = ReplicaRouter(
+        [], sessionmaker, max_lag=5, health_check_interval=10, health_check_timeout=1
+    )
+
+    assert router.get_sessionmaker() is sessionmaker
+
+
+async def test_replica_router_round_robin():
+    db_config = DatabaseSettings()
+    engines = [create_async_engine(db_config.url) for _ in range(2)]
+    router = ReplicaRouter(
+        engines,
+        sessionmaker,
+        max_lag=5,
+        health_check_interval=10,
+        health_check_timeout=1,
+    )
+
+    await router.check_all()
+    first = router.get_sessionmaker()
+    second = router.get_sessionmaker()
+    third = router.get_sessionmaker()
+
+    assert first is router.replicas[0].sessionmaker
+    assert second is router.replicas[1].sessionmaker
+    assert third is first
+
+    await router.dispose()
+
+
+async def test_replica_router_unhealthy_replica_falls_back_to_primary():
+    replica_config = ReplicaDatabaseSettings(HOSTS=["127.0.0.1:1"])
+    engines = [create_async_engine(url) for url in replica_config.urls]
+    router = ReplicaRouter(
+        engines,
+        sessionmaker,
+        max_lag=5,
+        health_check_interval=10,
+        health_check_timeout=1,
+    )
+
+    await router.check_all()
+    assert router.replicas[0].healthy is False
+    assert router.get_sessionmaker() is sessionmaker
+
+    await router.dispose()
+
+
+async def test_replica_router_unchecked_replica_is_not_used():
+    db_config = DatabaseSettings()
+    engines = [create_async_engine(db_config.url)]
+    router = ReplicaRouter(
+        engines,
+        sessionmaker,
+        max_lag=5,
+        health_check_interval=10,
+        health_check_timeout=1,
+    )
+
+    assert router.get_sessionmaker() is sessionmaker
+
+    await router.dispose()
+
+
+async def test_replica_router_slow_health_check_times_out(monkeypatch):
+    db_config = DatabaseSettings()
+    engines = [create_async_engine(db_config.url)]
+    router = ReplicaRouter(
+        engines,
+        sessionmaker,
+        max_lag=5,
+        health_check_interval=10,
+        health_check_timeout=0.05,
+    )
+
+    async def hanging_probe(replica):
+        await asyncio.sleep(60)
+
+    monkeypatch.setattr(router, "_replication_lag", hanging_probe)
+
+    await asyncio.wait_for(router.check_all(), 1)
+    assert router.replicas[0].healthy is False
+    assert router.get_sessionmaker() is sessionmaker
+
+    await router.dispose()
+
+
+async def test_after_commit_runs_committed_callbacks(async_engine: AsyncEngine):
+    calls = []
+
+    async def invalidate():
+        calls.append("async")
+
+    async with async_sessionmaker(bind=async_engine)() as session:
+        async with session.begin():
+            await session.execute(select(1))
+            after_commit(session, invalidate)
+            after_commit(session, lambda: calls.append("sync"))
+            await run_after_commit(session)
+            # Not committed yet
+            assert calls == []
+
+        await run_after_commit(session)
+
+    assert calls == ["async", "sync"]
+
+
+async def test_after_commit_drops_callbacks_on_rollback(async_engine: AsyncEngine):
+    calls = []
+
+    async with async_sessionmaker(bind=async_engine)() as session:
+        with pytest.raises(RuntimeError):
+            async with session.begin():
+                await session.execute(select(1))
+                after_commit(session, lambda: calls.append("rolled back"))
+                raise RuntimeError()
+
+        async with session.begin():
+            await session.execute(select(1))
+        await run_after_commit(session)
+
+    assert calls == []
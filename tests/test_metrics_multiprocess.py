@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from prometheus_client import CollectorRegistry
+from prometheus_client.multiprocess import MultiProcessCollector
+from prometheus_client.openmetrics.parser import text_string_to_metric_families
+
+from reshal_api.opentelemetry import (
+    MULTIPROC_DIR_ENV,
+    cleanup_dead_workers,
+    metrics,
+    prepare_multiprocess_dir,
+)
+
+LABELS = {"method": "GET", "path": "/multiprocess", "app_name": "test_multiprocess"}
+
+# Serves 2 requests and is still handling a third when it exits,
+# `shutdown` runs the cleanup done by lifespan on a graceful exit
+WORKER = f"""
+import sys
+
+from reshal_api.opentelemetry import (
+    REQUESTS,
+    REQUESTS_IN_PROGRESS,
+    cleanup_multiprocess_metrics,
+)
+
+labels = {LABELS!r}
+REQUESTS.labels(**labels).inc(2)
+REQUESTS_IN_PROGRESS.labels(**labels).inc()
+if sys.argv[1] == "shutdown":
+    cleanup_multiprocess_metrics()
+"""
+
+
+def run_workers(path: Path, *modes: str) -> None:
+    env = {**os.environ, MULTIPROC_DIR_ENV: str(path)}
+    workers = [
+        subprocess.Popen([sys.executable, "-c", WORKER, mode], env=env)
+        for mode in modes
+    ]
+    for worker in workers:
+        assert worker.wait(timeout=60) == 0
+
+
+def sample(path: Path, name: str) -> float | None:
+    registry = CollectorRegistry()
+    MultiProcessCollector(registry, path=str(path))
+    return registry.get_sample_value(name, LABELS)
+
+
+def test_counters_are_summed_across_workers(tmp_path: Path):
+    run_workers(tmp_path, "crash", "crash", "crash")
+
+    assert sample(tmp_path, "fastapi_requests_total") == 6
+    assert sample(tmp_path, "fastapi_requests_in_progress") == 3
+
+
+def test_live_gauges_drop_exited_workers(tmp_path: Path):
+    run_workers(tmp_path, "shutdown", "shutdown", "crash")
+
+    assert sample(tmp_path, "fastapi_requests_total") == 6
+    assert sample(tmp_path, "fastapi_requests_in_progress") == 1
+
+    # Done by the next worker to start
+    cleanup_dead_workers(str(tmp_path))
+    assert sample(tmp_path, "fastapi_requests_total") == 6
+    assert not sample(tmp_path, "fastapi_requests_in_progress")
+
+
+def test_prepare_multiprocess_dir(tmp_path: Path):
+    run_workers(tmp_path, "shutdown")
+
+    prepare_multiprocess_dir(str(tmp_path))
+
+    assert list(tmp_path.glob("*.db")) == []
+
+
+def test_metrics_endpoint_aggregates_workers(tmp_path: Path, monkeypatch):
+    run_workers(tmp_path, "shutdown", "shutdown")
+    monkeypatch.setenv(MULTIPROC_DIR_ENV, str(tmp_path))
+
+    response = metrics(None)  # type: ignore
+
+    samples = [
+        sample
+        for family in text_string_to_metric_families(response.body.decode())
+        for sample in family.samples
+        if sample.name == "fastapi_requests_total" and sample.labels == LABELS
+    ]
+    assert [sample.value for sample in samples] == [4]
@@ -0,0 +1,179 @@
+import logging
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from prometheus_client import REGISTRY
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from starlette.staticfiles import StaticFiles
+
+from reshal_api.opentelemetry import (
+    PrometheusMiddleware,
+    QueryMetrics,
+    RouteTemplates,
+    normalize_statement,
+    statement_label,
+    track_queries,
+)
+
+
+def create_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(PrometheusMiddleware, app_name="test_metrics")
+
+    @app.get("/items")
+    async def list_items():
+        return []
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"id": item_id}
+
+    @app.delete("/items/{item_id}")
+    async def delete_item(item_id: int):
+        raise ValueError("Not deletable")
+
+    @app.get("/{page}")
+    async def get_page(page: str):
+        return {"page": page}
+
+    return app
+
+
+@pytest.mark.parametrize(
+    "method, path, template",
+    (
+        ("GET", "/items", "/items"),
+        ("GET", "/items/1", "/items/{item_id}"),
+        ("DELETE", "/items/1", "/items/{item_id}"),
+        ("POST", "/items/1", None),
+        ("GET", "/items/1/details", None),
+        ("GET", "/about", "/{page}"),
+        ("GET", "/static/logo.png", "/static"),
+    ),
+)
+def test_route_templates(method: str, path: str, template: str | None):
+    app = create_app()
+    app.mount("/static", StaticFiles(directory=".", check_dir=False), name="static")
+    routes = RouteTemplates(app.routes)
+
+    assert routes.lookup(method, path) == template
+    # Remembered for routes without parameters
+    assert routes.lookup(method, path) == template
+
+
+def sample(name: str, **labels: str) -> float:
+    value = REGISTRY.get_sample_value(name, {"app_name": "test_metrics", **labels})
+    return value or 0
+
+
+async def test_prometheus_middleware():
+    app = create_app()
+    labels = {"method": "GET", "path": "/items/{item_id}"}
+    requests = sample("fastapi_requests_total", **labels)
+    responses = sample("fastapi_responses_total", **labels, status_code="200")
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        for item_id in range(3):
+            assert (await client.get(f"/items/{item_id}")).status_code == 200
+        assert (await client.get("/items/1/details")).status_code == 404
+
+    assert sample("fastapi_requests_total", **labels) == requests + 3
+    assert (
+        sample("fastapi_responses_total", **labels, status_code="200") == responses + 3
+    )
+    assert sample("fastapi_requests_in_progress", **labels) == 0
+    assert sample("fastapi_requests_duration_seconds_count", **labels) >= 3
+
+
+async def test_prometheus_middleware_exception():
+    app = create_app()
+    labels = {"method": "DELETE", "path": "/items/{item_id}"}
+    exceptions = sample(
+        "fastapi_exceptions_total", **labels, exception_type="ValueError"
+    )
+
+    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+        with pytest.raises(ValueError):
+            await client.delete("/items/1")
+
+    assert (
+        sample("fastapi_exceptions_total", **labels, exception_type="ValueError")
+        == exceptions + 1
+    )
+    assert sample("fastapi_responses_total", **labels, status_code="500") >= 1
+
+
+@pytest.fixture()
+def query_metrics(async_engine: AsyncEngine):
+    query_metrics = QueryMetrics("test_metrics")
+    query_metrics.install(async_engine)
+    yield query_metrics
+    query_metrics.remove(async_engine)
+
+
+@pytest.mark.parametrize(
+    "statement, normalized",
+    (
+        (
+            "SELECT facility.id \nFROM facility\nWHERE facility.id IN ($1, $2, $3)",
+            "SELECT facility.id FROM facility WHERE facility.id IN (?)",
+        ),
+        (
+            "INSERT INTO users (id, email) VALUES ($1, $2), ($3, $4) RETURNING users.id",
+            "INSERT INTO users (id, email) VALUES (?) RETURNING users.id",
+        ),
+        (
+            "DELETE FROM refresh_token WHERE refresh_token.id = %(id_1)s",
+            "DELETE FROM refresh_token WHERE refresh_token.id = ?",
+        ),
+    ),
+)
+def test_normalize_statement(statement: str, normalized: str):
+    assert normalize_statement(statement) == normalized
+
+
+def test_statement_label():
+    label = statement_label("UPDATE users SET email=$1 WHERE users.id = $2")
+
+    assert label.startswith("UPDATE users ")
+    # Same statement with other parameters
+    assert label == statement_label("UPDATE users SET email=$3 WHERE users.id = $4")
+
+
+async def test_track_queries(db_session: AsyncSession, query_metrics: QueryMetrics):
+    with track_queries() as stats:
+        for _ in range(3):
+            await db_session.execute(select(1))
+
+    assert stats.count == 3
+    assert stats.duration > 0
+    assert list(stats.statements.values()) == [3]
+
+
+async def test_prometheus_middleware_query_budget(
+    db_session: AsyncSession, query_metrics: QueryMetrics, caplog
+):
+    app = FastAPI()
+    app.add_middleware(PrometheusMiddleware, app_name="test_metrics", query_budget=2)
+
+    @app.get("/queries/{count}")
+    async def run_queries(count: int):
+        for _ in range(count):
+            await db_session.execute(select(1))
+
+    labels = {"method": "GET", "path": "/queries/{count}"}
+    requests = sample("db_request_statements_count", **labels)
+    statements = sample("db_request_statements_sum", **labels)
+
+    with caplog.at_level(logging.WARNING, logger="reshal_api.opentelemetry"):
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            await client.get("/queries/2")
+            assert "SQL statements" not in caplog.text
+
+            await client.get("/queries/3")
+
+    assert "ran 3 SQL statements, over the budget of 2" in caplog.text
+    assert sample("db_request_statements_count", **labels) == requests + 2
+    assert sample("db_request_statements_sum", **labels) == statements + 5
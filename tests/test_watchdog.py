@@ -0,0 +1,63 @@
+import asyncio
+import logging
+import time
+
+from prometheus_client import REGISTRY
+
+from reshal_api.opentelemetry import REQUEST_TRACE_IDS
+from reshal_api.watchdog import LoopLagMonitor
+
+
+def lag_count(app_name: str) -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "event_loop_lag_seconds_count", {"app_name": app_name}
+        )
+        or 0
+    )
+
+
+def block_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+async def test_loop_lag_is_observed():
+    monitor = LoopLagMonitor(interval=0.01, threshold=1, app_name="test_watchdog")
+    before = lag_count("test_watchdog")
+    monitor.start()
+    await asyncio.sleep(0.1)
+    await monitor.stop()
+
+    assert lag_count("test_watchdog") > before
+
+
+async def test_blocked_loop_logs_stack_and_trace_id(caplog):
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.05, app_name="test_watchdog")
+    task = asyncio.current_task()
+    REQUEST_TRACE_IDS[task] = "4bf92f3577b34da6a3ce929d0e0e4736"
+    monitor.start()
+    try:
+        with caplog.at_level(logging.WARNING, logger="reshal_api.watchdog"):
+            await asyncio.sleep(0.02)
+            block_loop(0.3)
+            await asyncio.sleep(0.05)
+    finally:
+        REQUEST_TRACE_IDS.pop(task, None)
+        await monitor.stop()
+
+    records = [r for r in caplog.records if r.name == "reshal_api.watchdog"]
+    # One report per stall, however long it lasts
+    assert len(records) == 1
+    message = records[0].getMessage()
+    assert "trace_id=4bf92f3577b34da6a3ce929d0e0e4736" in message
+    assert "block_loop" in message
+
+
+async def test_no_report_without_stall(caplog):
+    monitor = LoopLagMonitor(interval=0.01, threshold=0.2, app_name="test_watchdog")
+    monitor.start()
+    with caplog.at_level(logging.WARNING, logger="reshal_api.watchdog"):
+        await asyncio.sleep(0.1)
+    await monitor.stop()
+
+    assert "Event loop blocked" not in caplog.text